@@ -0,0 +1,219 @@
+# Airport_data.py
+"""
+Build step + loader for the precompiled commercial-airport table.
+
+Build (or rebuild) the local artifact:
+    python -m app.agents.Itinerary_Data.Airport_data
+    python -m app.agents.Itinerary_Data.Airport_data --csv airports.csv
+"""
+from dotenv import load_dotenv
+from io import StringIO
+from app.agents.Itinerary_Data.Airport_table import AirportTable
+from app.utils import http_client
+from app.utils.logger import get_logger
+import argparse
+import struct
+import json
+import mmap
+import time
+import csv
+import os
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# ---------------------------------------------------
+# PRIVATE AIRPORTS BLACKLIST (Business jet only)
+# ---------------------------------------------------
+PRIVATE_AIRPORT_BLACKLIST = {
+    "LBG",   # Paris-Le Bourget
+    "TNF",   # Toussus-le-Noble
+    "JLN",   # example private
+}
+
+AIRPORTS_URL = "https://ourairports.com/data/airports.csv"
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+AIRPORTS_DATA_PATH = os.getenv("AIRPORTS_DATA_PATH", os.path.join(DATA_DIR, "airports.bin"))
+AIRPORTS_MAX_AGE_DAYS = float(os.getenv("AIRPORTS_MAX_AGE_DAYS", "30"))
+
+# ---------------------------------------------------
+# ARTIFACT LAYOUT
+# ---------------------------------------------------
+# header  : magic, version, built_at (unix time), row count, strings length
+# columns : lat float64[count], lon float64[count]   (8-byte aligned)
+# strings : UTF-8 JSON object of string columns
+MAGIC = b"APTS"
+VERSION = 1
+HEADER = struct.Struct("<4sIdII")
+
+
+# ---------------------------------------------------
+# 1. PARSE OURAIRPORTS CSV
+# ---------------------------------------------------
+
+def parse_airports_csv(raw: str):
+    """Filter the ourairports.com CSV down to commercial airports."""
+    airports = []
+    csv_file = csv.reader(StringIO(raw))
+    header = next(csv_file)
+
+    for row in csv_file:
+        try:
+            airport_type = row[2]       # large_airport, medium_airport, small_airport
+            name = row[3]
+            lat = row[4]
+            lon = row[5]
+            country = row[8]
+            city = row[10]
+            iata = row[13]
+            scheduled = row[18]         # yes/no
+
+            # Skip private airports
+            if iata in PRIVATE_AIRPORT_BLACKLIST:
+                continue
+
+            # Must have valid 3-letter IATA
+            if not iata or iata == "\\N" or len(iata) != 3:
+                continue
+
+            # Large & medium airports → always commercial
+            if airport_type in ["large_airport", "medium_airport"]:
+                pass
+
+            # Small airports → require scheduled=yes
+            elif airport_type == "small_airport":
+                if not scheduled or scheduled.lower() not in ["yes", "true", "1"]:
+                    continue
+            else:
+                continue
+
+            airports.append({
+                "name": name,
+                "city": city,
+                "country": country,
+                "iata": iata,
+                "lat": float(lat),
+                "lon": float(lon),
+                "type": airport_type,
+            })
+
+        except:
+            continue
+
+    return airports
+
+
+def download_airports():
+    """Download and filter the live ourairports.com dataset."""
+    logger.info("Downloading commercial airports...")
+    response = http_client.get(AIRPORTS_URL, timeout=60)
+    response.raise_for_status()
+    raw = response.text
+    airports = AirportTable.from_records(parse_airports_csv(raw))
+    logger.info("Downloaded %d commercial airports.", len(airports))
+    return airports
+
+
+# ---------------------------------------------------
+# 2. WRITE / READ BINARY ARTIFACT
+# ---------------------------------------------------
+
+def write_artifact(airports, path=AIRPORTS_DATA_PATH):
+    """Compile an AirportTable (or list of dicts) into the artifact (atomic replace)."""
+    if not isinstance(airports, AirportTable):
+        airports = AirportTable.from_records(airports)
+
+    columns = {
+        "name": airports.names,
+        "city": airports.cities,
+        "country": airports.countries,
+        "iata": airports.iatas,
+        "type": airports.types,
+    }
+    strings = json.dumps(columns, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, time.time(), len(airports), len(strings)))
+        f.write(memoryview(airports.lats).cast("B"))
+        f.write(memoryview(airports.lons).cast("B"))
+        f.write(strings)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_header(path=AIRPORTS_DATA_PATH):
+    """Return (built_at, count) or None if the artifact is missing/invalid."""
+    try:
+        with open(path, "rb") as f:
+            magic, version, built_at, count, _ = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or version != VERSION:
+        return None
+    return built_at, count
+
+
+def read_artifact(path=AIRPORTS_DATA_PATH):
+    """
+    Open the artifact as an AirportTable. lat/lon are zero-copy views over
+    a read-only mmap, so processes opening the same file share its pages.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, built_at, count, strings_len = HEADER.unpack_from(mm)
+    if magic != MAGIC or version != VERSION:
+        mm.close()
+        raise ValueError(f"Unsupported airport artifact: {path}")
+
+    view = memoryview(mm)
+    offset = HEADER.size
+    lats = view[offset:offset + 8 * count].cast("d")
+    offset += 8 * count
+    lons = view[offset:offset + 8 * count].cast("d")
+    offset += 8 * count
+    strings = json.loads(bytes(view[offset:offset + strings_len]).decode("utf-8"))
+
+    return AirportTable(
+        lats, lons,
+        strings["name"], strings["city"], strings["country"],
+        strings["iata"], strings["type"],
+        mm=mm,
+    )
+
+
+def is_stale(path=AIRPORTS_DATA_PATH, max_age_days=AIRPORTS_MAX_AGE_DAYS):
+    header = read_header(path)
+    if header is None:
+        return True
+    built_at, _ = header
+    return time.time() - built_at > max_age_days * 86400
+
+
+# ---------------------------------------------------
+# 3. BUILD STEP
+# ---------------------------------------------------
+
+def build(csv_path=None, path=AIRPORTS_DATA_PATH):
+    """Compile the artifact from a local CSV file or the live download."""
+    if csv_path:
+        with open(csv_path, encoding="utf-8") as f:
+            airports = AirportTable.from_records(parse_airports_csv(f.read()))
+    else:
+        airports = download_airports()
+
+    write_artifact(airports, path)
+    logger.info("Wrote %d airports to %s", len(airports), path)
+    return airports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the commercial airport table.")
+    parser.add_argument("--csv", help="Local ourairports.com airports.csv (default: download)")
+    parser.add_argument("--out", default=AIRPORTS_DATA_PATH, help="Artifact path")
+    args = parser.parse_args()
+    airports = build(args.csv, args.out)
+    print(f"Wrote {len(airports)} airports to {args.out}")
@@ -0,0 +1,69 @@
+# Airport_distance.py
+import numpy as np
+
+# ---------------------------------------------------
+# VECTORIZED HAVERSINE
+# ---------------------------------------------------
+# Same formula and earth radius as haversine.haversine(..., Unit.KILOMETERS),
+# evaluated for many points at once instead of one Python call per airport.
+
+EARTH_RADIUS_KM = 6371.0088
+BATCH_ROWS = 256   # query rows per distance-matrix chunk (bounds memory)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in km. Arguments are degrees and broadcast like
+    NumPy arrays: pass column vectors for the queries and row vectors for
+    the airports to get a (queries × airports) matrix.
+    """
+    lat1 = np.radians(lat1)
+    lon1 = np.radians(lon1)
+    lat2 = np.radians(lat2)
+    lon2 = np.radians(lon2)
+    d = (np.sin((lat2 - lat1) * 0.5) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) * 0.5) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(d))
+
+
+def distance_matrix(points, table):
+    """Distances (km) from each (lat, lon) in `points` to every airport row."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return haversine_km(
+        points[:, 0:1], points[:, 1:2],
+        table.lat_array[np.newaxis, :], table.lon_array[np.newaxis, :],
+    )
+
+
+def _top_k(dists, k):
+    """Row indices of the k smallest distances, ties broken by row order."""
+    if k >= len(dists):
+        return np.lexsort((np.arange(len(dists)), dists))
+
+    # Everything up to the k-th smallest distance (inclusive, to keep ties),
+    # then a stable (distance, row) sort — same order as sorted(AIRPORTS, ...)
+    kth = np.partition(dists, k - 1)[k - 1]
+    candidates = np.flatnonzero(dists <= kth)
+    order = np.lexsort((candidates, dists[candidates]))
+    return candidates[order][:k]
+
+
+def nearest_airports_batch(points, table, k=5):
+    """
+    For each (lat, lon) in `points`, return its k nearest airports as
+    [(airport, distance_km), ...] — one distance pass per chunk of queries.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    k = min(k, len(table))
+    results = []
+    if k <= 0:
+        return [[] for _ in range(len(points))]
+
+    for start in range(0, len(points), BATCH_ROWS):
+        matrix = distance_matrix(points[start:start + BATCH_ROWS], table)
+        for dists in matrix:
+            results.append([
+                (table.row(int(i)), float(dists[i])) for i in _top_k(dists, k)
+            ])
+
+    return results
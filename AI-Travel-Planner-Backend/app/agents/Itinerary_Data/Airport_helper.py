@@ -1,17 +1,23 @@
 # Airport_helper.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from serpapi import GoogleSearch
-from haversine import haversine, Unit
+from app.agents.Itinerary_Data.Serp_client import serp_search
 from dotenv import load_dotenv
-import requests
+import threading
+import time
 import os
 import re
-import csv
-from io import StringIO
+from app.agents.Itinerary_Data import Airport_data
+from app.agents.Itinerary_Data.Airport_index import AirportIndex
+from app.agents.Itinerary_Data.Airport_distance import nearest_airports_batch
+from app.agents.Itinerary_Data.Place_store import place_store
+from app.agents.Itinerary_Data.Country_table import is_code_like, lookup_country
+from app.utils.logger import get_logger
+from app.utils.metrics import stage, timed
 
 # Load ENV
 load_dotenv()
+logger = get_logger(__name__)
 SERP_API_KEY = os.getenv("Serp_API")
 
 app = FastAPI()
@@ -25,78 +31,108 @@ app.add_middleware(
 )
 
 # ---------------------------------------------------
-# PRIVATE AIRPORTS BLACKLIST (Business jet only)
+# 1. LOAD COMMERCIAL AIRPORTS (lazy, from local artifact)
 # ---------------------------------------------------
-PRIVATE_AIRPORT_BLACKLIST = {
-    "LBG",   # Paris-Le Bourget
-    "TNF",   # Toussus-le-Noble
-    "JLN",   # example private
-}
+# The filtered table is compiled ahead of time by
+#   python -m app.agents.Itinerary_Data.Airport_data
+# and loaded on first use. A stale artifact is still served while a
+# background thread re-downloads and swaps in a fresh copy.
 
-# ---------------------------------------------------
-# 1. LOAD COMMERCIAL AIRPORTS
-# ---------------------------------------------------
+_airports = None
+_airport_index = None
+_airports_lock = threading.Lock()
+_refreshing = False
+_stale_after = float("inf")
 
-AIRPORTS_URL = "https://ourairports.com/data/airports.csv"
+REFRESH_RETRY_SECONDS = 3600
 
 
-def load_airports():
-    airports = []
-    print("Loading commercial airports...")
+def _set_airports(airports, built_at):
+    global _airports, _airport_index, _stale_after
+    index = AirportIndex(airports)
+    _airports, _airport_index = airports, index
+    _stale_after = built_at + Airport_data.AIRPORTS_MAX_AGE_DAYS * 86400
+
+
+def _refresh_airports():
+    global _refreshing, _stale_after
+    try:
+        airports = Airport_data.download_airports()
+        Airport_data.write_artifact(airports)
+        _set_airports(airports, time.time())
+        logger.info("Refreshed airport table (%d airports).", len(airports))
+    except Exception as e:
+        logger.warning("Airport table refresh failed, keeping current copy: %s", e)
+        _stale_after = time.time() + REFRESH_RETRY_SECONDS
+    finally:
+        _refreshing = False
+
+
+def _refresh_in_background():
+    global _refreshing
+    with _airports_lock:
+        if _refreshing:
+            return
+        _refreshing = True
+    logger.info("Airport table is stale, refreshing in background...")
+    threading.Thread(target=_refresh_airports, name="airports-refresh", daemon=True).start()
 
-    raw = requests.get(AIRPORTS_URL).text
-    csv_file = csv.reader(StringIO(raw))
-    header = next(csv_file)
 
-    for row in csv_file:
+def load_airports():
+    """
+    Load the compiled airport table, falling back to a live download.
+    Returns (airports, built_at).
+    """
+    path = Airport_data.AIRPORTS_DATA_PATH
+
+    try:
+        airports = Airport_data.read_artifact(path)
+        built_at, _ = Airport_data.read_header(path)
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning("No usable airport artifact at %s (%s), downloading...", path, e)
+        airports = Airport_data.download_airports()
         try:
-            airport_type = row[2]       # large_airport, medium_airport, small_airport
-            name = row[3]
-            lat = row[4]
-            lon = row[5]
-            country = row[8]
-            city = row[10]
-            iata = row[13]
-            scheduled = row[18]         # yes/no
-
-            # Skip private airports
-            if iata in PRIVATE_AIRPORT_BLACKLIST:
-                continue
-
-            # Must have valid 3-letter IATA
-            if not iata or iata == "\\N" or len(iata) != 3:
-                continue
-
-            # Large & medium airports → always commercial
-            if airport_type in ["large_airport", "medium_airport"]:
-                pass
-
-            # Small airports → require scheduled=yes
-            elif airport_type == "small_airport":
-                if not scheduled or scheduled.lower() not in ["yes", "true", "1"]:
-                    continue
-            else:
-                continue
-
-            airports.append({
-                "name": name,
-                "city": city,
-                "country": country,
-                "iata": iata,
-                "lat": float(lat),
-                "lon": float(lon),
-                "type": airport_type,
-            })
-
-        except:
-            continue
+            Airport_data.write_artifact(airports, path)
+        except OSError as write_error:
+            logger.warning("Could not write airport artifact: %s", write_error)
+        return airports, time.time()
+
+    logger.info("Loaded %d commercial airports.", len(airports))
+    return airports, built_at
+
 
-    print(f"Loaded {len(airports)} commercial airports.")
-    return airports
+def _ensure_loaded():
+    if _airport_index is None:
+        with _airports_lock:
+            if _airport_index is None:
+                _set_airports(*load_airports())
 
+    if time.time() > _stale_after:
+        _refresh_in_background()
 
-# Load airports globally
-AIRPORTS = load_airports()
+
+def get_airports():
+    """
+    Commercial airports as an AirportTable (loaded on first call).
+    Call once in the parent process before forking workers to share it.
+    """
+    _ensure_loaded()
+    return _airports
+
+
+def get_airport_index():
+    """Spatial index over get_airports() (built on first call)."""
+    _ensure_loaded()
+    return _airport_index
+
+
+def __getattr__(name):
+    # Backwards compatible module attributes, resolved lazily
+    if name == "AIRPORTS":
+        return get_airports()
+    if name == "AIRPORT_INDEX":
+        return get_airport_index()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ---------------------------------------------------
 # 2. GPS EXTRACTION FROM SERPAPI RESULTS
@@ -137,28 +173,29 @@ def extract_gps(data):
     return None
 
 
+@timed("airports.geocode")
 def get_coordinates(query: str):
     q = query.lower()
 
     # 1. type=place
-    r1 = GoogleSearch({
+    r1 = serp_search({
         "engine": "google_maps",
         "q": q,
         "type": "place",
         "api_key": SERP_API_KEY
-    }).get_dict()
+    })
 
     gps = extract_gps(r1)
     if gps:
         return gps
 
     # 2. type=search
-    r2 = GoogleSearch({
+    r2 = serp_search({
         "engine": "google_maps",
         "q": q,
         "type": "search",
         "api_key": SERP_API_KEY
-    }).get_dict()
+    })
 
     gps = extract_gps(r2)
     if gps:
@@ -167,12 +204,12 @@ def get_coordinates(query: str):
     # 3. Fallback to append country names
     fallback_countries = ["nepal", "india", "usa", "uk", "china", "japan"]
     for country in fallback_countries:
-        r3 = GoogleSearch({
+        r3 = serp_search({
             "engine": "google_maps",
             "q": f"{q}, {country}",
             "type": "search",
             "api_key": SERP_API_KEY
-        }).get_dict()
+        })
 
         gps = extract_gps(r3)
         if gps:
@@ -184,15 +221,12 @@ def get_coordinates(query: str):
 # 3. COUNTRY → CAPITAL LOOKUP
 # ---------------------------------------------------
 
+@timed("airports.capital_lookup")
 def get_capital_if_country(query: str):
-    try:
-        res = requests.get(f"https://restcountries.com/v3.1/name/{query}").json()
-        if isinstance(res, list):
-            capitals = res[0].get("capital", [])
-            if capitals:
-                return capitals[0]
-    except:
-        pass
+    """Capital city if `query` names a country (bundled table, no network)."""
+    country = lookup_country(query)
+    if country:
+        return country["capital"]
     return None
 
 # ---------------------------------------------------
@@ -200,43 +234,63 @@ def get_capital_if_country(query: str):
 # ---------------------------------------------------
 
 def nearest_international_airport(lat, lon):
-    closest = None
-    min_dist = float("inf")
-
-    for ap in AIRPORTS:
-        dist = haversine((lat, lon), (ap["lat"], ap["lon"]), unit=Unit.KILOMETERS)
-        if dist < min_dist:
-            closest = ap
-            min_dist = dist
+    hits = get_airport_index().nearest(lat, lon, k=1)
+    if not hits:
+        return None, float("inf")
 
+    closest, min_dist = hits[0]
     return closest, round(min_dist, 2)
 
 # ---------------------------------------------------
 # 5. MAIN RESOLVE FUNCTION (SAME RESPONSE FORMAT)
 # ---------------------------------------------------
 
+def locate_place(place: str):
+    """
+    place → (resolved place name, (lat, lon) or None, came from the store).
+    Answers from the persistent place store when the place was seen before;
+    otherwise does the capital substitution + geocoding upstream.
+    """
+    with stage("airports.place_store"):
+        stored = place_store.get(place)
+    if stored:
+        return stored["place"], (stored["lat"], stored["lon"]), True
+
+    # Convert country to capital automatically — the table already knows
+    # where the capital is, so no geocoding is needed. An airport code
+    # ("CAN", "MEX") is not read as an ISO3 country code; it goes to geocoding
+    with stage("airports.capital_lookup"):
+        airport_code = is_code_like(place) and get_airports().lookup(place.strip()) is not None
+        country = lookup_country(place, iso3=not airport_code)
+    if country:
+        return country["capital"], (country["lat"], country["lon"]), False
+
+    return place, get_coordinates(place), False
+
+
+@timed("airports.resolve")
 def resolve_airport_code(place: str):
     """
     Convert a place → its nearest commercial airport.
     Return structure is EXACTLY the same as your original.
     """
-
-    # Convert country to capital automatically
-    capital = get_capital_if_country(place)
-    if capital:
-        place = capital
-
-    coords = get_coordinates(place)
+    original_place = place
+    place, coords, stored = locate_place(original_place)
     if not coords:
         return {"error": f"Could not find coordinates for '{place}'"}
 
     lat, lon = coords
 
-    airport, distance = nearest_international_airport(lat, lon)
+    with stage("airports.nearest"):
+        airport, distance = nearest_international_airport(lat, lon)
 
     if airport is None:
         return {"error": "No commercial airport found near this location"}
 
+    if not stored:
+        capital = place if place != original_place else None
+        place_store.put(original_place, place, capital, lat, lon)
+
     # SAME RESPONSE FORMAT AS BEFORE
     return {
         "place": place,
@@ -249,3 +303,52 @@ def resolve_airport_code(place: str):
         },
         "distance_km": distance
     }
+
+# ---------------------------------------------------
+# 6. BATCH LOOKUPS (multi-city trips, cache pre-warming)
+# ---------------------------------------------------
+
+def nearest_airports_for_points(points, k=5):
+    """
+    k nearest commercial airports for many (lat, lon) points in one
+    vectorized distance pass. Returns one [(airport, distance_km), ...]
+    list per point.
+    """
+    return nearest_airports_batch(points, get_airports(), k=k)
+
+
+def resolve_nearby_airports(places, k=5):
+    """
+    Resolve several places to their k nearest commercial airports.
+    Geocoding runs per place; the airport ranking runs once for all of them.
+    """
+    resolved = []
+    for place in places:
+        query, coords, _ = locate_place(place)
+        resolved.append((place, query, coords))
+
+    located = [coords for _, _, coords in resolved if coords]
+    nearby = iter(nearest_airports_for_points(located, k=k)) if located else iter([])
+
+    results = []
+    for place, query, coords in resolved:
+        if not coords:
+            results.append({"error": f"Could not find coordinates for '{query}'"})
+            continue
+
+        lat, lon = coords
+        results.append({
+            "place": query,
+            "place_coordinates": {"lat": lat, "lon": lon},
+            "airports": [
+                {
+                    "name": ap["name"],
+                    "airport_code": ap["iata"],
+                    "airport_coordinates": {"lat": ap["lat"], "lon": ap["lon"]},
+                    "distance_km": round(dist, 2),
+                }
+                for ap, dist in next(nearby)
+            ],
+        })
+
+    return results
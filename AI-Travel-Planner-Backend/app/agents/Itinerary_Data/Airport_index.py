@@ -0,0 +1,154 @@
+# Airport_index.py
+import heapq
+import math
+from haversine import haversine, Unit
+
+# ---------------------------------------------------
+# SPATIAL INDEX OVER COMMERCIAL AIRPORTS
+# ---------------------------------------------------
+# Airports are projected onto the unit sphere (x, y, z) and stored in a
+# k-d tree. Straight-line (chord) distance between two points on the sphere
+# grows monotonically with great-circle distance, so the k nearest points in
+# 3D are exactly the k nearest airports — with no special cases for the
+# poles or the antimeridian.
+
+EARTH_RADIUS_KM = 6371.0088   # same mean radius the haversine package uses
+LEAF_SIZE = 16
+
+
+def to_unit_vector(lat, lon):
+    """Convert latitude/longitude in degrees to a point on the unit sphere."""
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+def km_to_chord(radius_km):
+    """Great-circle distance in km → squared chord length on the unit sphere."""
+    angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+    chord = 2.0 * math.sin(angle / 2.0)
+    return chord * chord
+
+
+class AirportIndex:
+    """
+    k-d tree over an AirportTable's coordinate columns.
+
+    Results are returned as (airport, distance_km) pairs, ordered exactly
+    like a linear scan would order them: by haversine distance, ties broken
+    by row order.
+    """
+
+    def __init__(self, airports, leaf_size=LEAF_SIZE):
+        self.airports = airports
+        self.leaf_size = leaf_size
+        self._points = [to_unit_vector(lat, lon) for lat, lon in zip(airports.lats, airports.lons)]
+        self._root = self._build(list(range(len(airports))))
+
+    def __len__(self):
+        return len(self.airports)
+
+    # ---------------------------------------------------
+    # BUILD
+    # ---------------------------------------------------
+
+    def _build(self, idxs):
+        if len(idxs) <= self.leaf_size:
+            return (None, None, idxs, None)
+
+        points = self._points
+        spreads = []
+        for axis in range(3):
+            values = [points[i][axis] for i in idxs]
+            spreads.append(max(values) - min(values))
+        axis = spreads.index(max(spreads))
+
+        idxs.sort(key=lambda i: points[i][axis])
+        mid = len(idxs) // 2
+        split = points[idxs[mid]][axis]
+
+        left = self._build(idxs[:mid])
+        right = self._build(idxs[mid:])
+        return (axis, split, left, right)
+
+    # ---------------------------------------------------
+    # QUERIES
+    # ---------------------------------------------------
+
+    def _knn(self, target, k):
+        """Return the k nearest (chord², index) pairs, unsorted."""
+        points = self._points
+        tx, ty, tz = target
+        heap = []   # max-heap of (-d2, -idx): root is the current worst
+
+        def visit(node):
+            axis, split, left, right = node
+            if axis is None:
+                for i in left:
+                    px, py, pz = points[i]
+                    d2 = (px - tx) ** 2 + (py - ty) ** 2 + (pz - tz) ** 2
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d2, -i))
+                    elif (d2, i) < (-heap[0][0], -heap[0][1]):
+                        heapq.heapreplace(heap, (-d2, -i))
+                return
+
+            diff = target[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if len(heap) < k or diff * diff <= -heap[0][0]:
+                visit(far)
+
+        visit(self._root)
+        return [(-d2, -i) for d2, i in heap]
+
+    def _within(self, target, max_d2):
+        points = self._points
+        tx, ty, tz = target
+        found = []
+        stack = [self._root]
+
+        while stack:
+            axis, split, left, right = stack.pop()
+            if axis is None:
+                for i in left:
+                    px, py, pz = points[i]
+                    if (px - tx) ** 2 + (py - ty) ** 2 + (pz - tz) ** 2 <= max_d2:
+                        found.append(i)
+                continue
+
+            diff = target[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            stack.append(near)
+            if diff * diff <= max_d2:
+                stack.append(far)
+
+        return found
+
+    def _ranked(self, lat, lon, idxs):
+        """Attach haversine distances and order like the linear scan does."""
+        lats, lons = self.airports.lats, self.airports.lons
+        ranked = [
+            (haversine((lat, lon), (lats[i], lons[i]), unit=Unit.KILOMETERS), i)
+            for i in idxs
+        ]
+        ranked.sort()
+        return [(self.airports.row(i), dist) for dist, i in ranked]
+
+    def nearest(self, lat, lon, k=1):
+        """Return the k nearest airports as [(airport, distance_km), ...]."""
+        if k <= 0 or not len(self.airports):
+            return []
+        hits = self._knn(to_unit_vector(lat, lon), min(k, len(self.airports)))
+        return self._ranked(lat, lon, [i for _, i in hits])
+
+    def within(self, lat, lon, radius_km):
+        """Return every airport within `radius_km`, nearest first."""
+        if not len(self.airports):
+            return []
+        hits = self._within(to_unit_vector(lat, lon), km_to_chord(radius_km) * (1 + 1e-9))
+        return [
+            (ap, dist) for ap, dist in self._ranked(lat, lon, hits)
+            if dist <= radius_km
+        ]
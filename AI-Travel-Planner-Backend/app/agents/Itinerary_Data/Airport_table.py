@@ -0,0 +1,89 @@
+# Airport_table.py
+from array import array
+import numpy as np
+import sys
+
+# ---------------------------------------------------
+# COLUMNAR AIRPORT TABLE
+# ---------------------------------------------------
+# Replaces the list of ~5k airport dicts. Coordinates live in two
+# contiguous float64 columns; when the table is opened from the compiled
+# artifact those columns are views over a read-only mmap, so every uvicorn
+# worker shares the same physical pages. String columns are interned
+# (country and type only have a handful of distinct values).
+
+COLUMNS = ("name", "city", "country", "iata", "lat", "lon", "type")
+
+
+class AirportTable:
+    """
+    Column store for commercial airports.
+
+    Indexing / iterating yields the same dicts the old AIRPORTS list held:
+        {"name", "city", "country", "iata", "lat", "lon", "type"}
+    """
+
+    def __init__(self, lats, lons, names, cities, countries, iatas, types, mm=None):
+        self.lats = lats
+        self.lons = lons
+        # Zero-copy NumPy views of the same buffers for vectorized distance math
+        self.lat_array = np.frombuffer(lats, dtype=np.float64)
+        self.lon_array = np.frombuffer(lons, dtype=np.float64)
+        self.names = [sys.intern(s) for s in names]
+        self.cities = [sys.intern(s) for s in cities]
+        self.countries = [sys.intern(s) for s in countries]
+        self.iatas = [sys.intern(s) for s in iatas]
+        self.types = [sys.intern(s) for s in types]
+        self._mm = mm   # keeps the backing mmap alive
+
+        # IATA → row (first occurrence wins, like a linear search would)
+        self.iata_index = {}
+        for i, code in enumerate(self.iatas):
+            self.iata_index.setdefault(code, i)
+
+    @classmethod
+    def from_records(cls, airports):
+        """Build a table from an iterable of airport dicts."""
+        airports = list(airports)
+        return cls(
+            array("d", (ap["lat"] for ap in airports)),
+            array("d", (ap["lon"] for ap in airports)),
+            [ap["name"] for ap in airports],
+            [ap["city"] for ap in airports],
+            [ap["country"] for ap in airports],
+            [ap["iata"] for ap in airports],
+            [ap["type"] for ap in airports],
+        )
+
+    def __len__(self):
+        return len(self.iatas)
+
+    def row(self, i):
+        """Row i as an airport dict."""
+        return {
+            "name": self.names[i],
+            "city": self.cities[i],
+            "country": self.countries[i],
+            "iata": self.iatas[i],
+            "lat": self.lats[i],
+            "lon": self.lons[i],
+            "type": self.types[i],
+        }
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("airport row out of range")
+        return self.row(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def lookup(self, iata):
+        """Airport dict for an IATA code, or None."""
+        i = self.iata_index.get((iata or "").upper())
+        return None if i is None else self.row(i)
@@ -0,0 +1,251 @@
+# Cache_warmer.py
+"""
+Keeps popular trips on the warm path: airports, location and hotels for
+the places in a configured list and the trips users actually ask for.
+
+Run one warming pass by hand:
+    python -m app.agents.Itinerary_Data.Cache_warmer
+    python -m app.agents.Itinerary_Data.Cache_warmer --budget 20
+"""
+from datetime import date, datetime, timedelta
+from dotenv import load_dotenv
+import threading
+import argparse
+import sqlite3
+import time
+import os
+
+from app.agents.Itinerary_Data.Place_store import SEED_DESTINATIONS_PATH, load_seed_places, warm
+from app.agents.Itinerary_Data.Serp_client import serp_refresh_ahead
+from app.agents.Itinerary_Data.Serp_quota import serp_budget, serp_priority
+from app.utils.logger import get_logger, log_fields
+from app.utils.metrics import stage
+import logging
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# ---------------------------------------------------
+# CACHE WARMING (popular trips stay fast)
+# ---------------------------------------------------
+# Most traffic goes to a few dozen destinations, but the first request
+# after a restart or a cache expiry still pays for geocoding, hotels and
+# the location search. Every CACHE_WARMER_INTERVAL_SECONDS this warmer
+# walks the most requested recent trips (learned from itinerary requests)
+# and the places in CACHE_WARMER_PLACES_PATH, and refreshes any cached
+# SerpAPI answer that would expire within CACHE_WARMER_REFRESH_AHEAD_SECONDS.
+# Answers with plenty of life left cost nothing. Each pass runs at
+# background priority and spends at most CACHE_WARMER_BUDGET searches. Its
+# hotel and location lookups are never coalesced with user requests (the
+# single-flight keys include the priority class), so a user never gets an
+# answer shaped by the warmer's budget.
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+CACHE_WARMER_ENABLED = os.getenv("CACHE_WARMER", "0") == "1"
+CACHE_WARMER_PATH = os.getenv("CACHE_WARMER_PATH", os.path.join(DATA_DIR, "cache_warmer.sqlite3"))
+CACHE_WARMER_PLACES_PATH = os.getenv("CACHE_WARMER_PLACES_PATH", SEED_DESTINATIONS_PATH)
+CACHE_WARMER_INTERVAL_SECONDS = float(os.getenv("CACHE_WARMER_INTERVAL_SECONDS", "900"))
+CACHE_WARMER_BUDGET = int(os.getenv("CACHE_WARMER_BUDGET", "50"))
+CACHE_WARMER_REFRESH_AHEAD_SECONDS = float(
+    os.getenv("CACHE_WARMER_REFRESH_AHEAD_SECONDS", str(2 * CACHE_WARMER_INTERVAL_SECONDS))
+)
+# Learned trips: asked for at least MIN_HITS times within the window, most popular first
+CACHE_WARMER_LEARNED_TRIPS = int(os.getenv("CACHE_WARMER_LEARNED_TRIPS", "20"))
+CACHE_WARMER_MIN_HITS = int(os.getenv("CACHE_WARMER_MIN_HITS", "2"))
+CACHE_WARMER_LEARN_WINDOW_SECONDS = float(os.getenv("CACHE_WARMER_LEARN_WINDOW_SECONDS", str(3 * 86400)))
+
+
+def _place_key(place):
+    # Same folding as the SerpAPI cache key, so warmed entries are the ones requests hit
+    return " ".join(str(place or "").lower().split())
+
+
+class CacheWarmer:
+    def __init__(self, path=CACHE_WARMER_PATH, places_path=CACHE_WARMER_PLACES_PATH,
+                 interval=CACHE_WARMER_INTERVAL_SECONDS, budget=CACHE_WARMER_BUDGET,
+                 refresh_ahead=CACHE_WARMER_REFRESH_AHEAD_SECONDS):
+        self.path = path
+        self.places_path = places_path
+        self.interval = interval
+        self.budget = budget
+        self.refresh_ahead = refresh_ahead
+        self._lock = threading.Lock()
+        self._pending = {}      # trips seen since the last flush: key -> [hits, last_seen]
+        self._stopping = threading.Event()
+        self._thread = None
+        self._counters = {"passes": 0, "searches_spent": 0, "trips_warmed": 0,
+                          "places_warmed": 0, "budget_exhausted": 0}
+        self._last_pass = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS trips (
+                destination TEXT NOT NULL,
+                departure TEXT NOT NULL,
+                check_in TEXT NOT NULL,
+                check_out TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (destination, departure, check_in, check_out)
+            )
+        """)
+
+    # ---------------------------------------------------
+    # LEARNING
+    # ---------------------------------------------------
+
+    def record(self, destination, departure_city, start_date, num_days):
+        """Note an itinerary request (cheap: buffered in memory until the next pass)."""
+        try:
+            start = datetime.strptime(str(start_date), "%Y-%m-%d")
+            end = start + timedelta(days=int(num_days) - 1)
+        except (TypeError, ValueError):
+            return
+        if not destination:
+            return
+        key = (_place_key(destination), _place_key(departure_city),
+               start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+        with self._lock:
+            entry = self._pending.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] = time.time()
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for (destination, departure, check_in, check_out), (hits, last_seen) in pending.items():
+                self._conn.execute(
+                    "INSERT INTO trips (destination, departure, check_in, check_out, hits, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (destination, departure, check_in, check_out) "
+                    "DO UPDATE SET hits = hits + excluded.hits, last_seen = MAX(last_seen, excluded.last_seen)",
+                    (destination, departure, check_in, check_out, hits, last_seen),
+                )
+            # Trips that have started, or nobody asked for lately, are no longer worth keeping
+            self._conn.execute(
+                "DELETE FROM trips WHERE check_in < ? OR last_seen < ?",
+                (date.today().isoformat(), time.time() - CACHE_WARMER_LEARN_WINDOW_SECONDS),
+            )
+
+    def popular_trips(self, limit=CACHE_WARMER_LEARNED_TRIPS):
+        """[(destination, departure, check_in, check_out, hits)], most requested first."""
+        self._flush()
+        with self._lock:
+            return self._conn.execute(
+                "SELECT destination, departure, check_in, check_out, hits FROM trips "
+                "WHERE hits >= ? ORDER BY hits DESC, last_seen DESC LIMIT ?",
+                (CACHE_WARMER_MIN_HITS, limit),
+            ).fetchall()
+
+    def configured_places(self):
+        try:
+            return load_seed_places(self.places_path)
+        except OSError as e:
+            logger.warning("Cache warmer place list unavailable: %s", e)
+            return []
+
+    # ---------------------------------------------------
+    # WARMING
+    # ---------------------------------------------------
+
+    def run_once(self, budget=None):
+        """One warming pass; returns its report."""
+        # Imported here: these pull in the whole data layer
+        from app.agents.Itinerary_Data.Hotels import get_hotels
+        from app.agents.Itinerary_Data.Maps import Maps
+
+        maps = Maps()
+        started = time.monotonic()
+        trips = self.popular_trips()
+        places = self.configured_places()
+        warmed_trips = warmed_places = 0
+
+        with stage("cache_warmer.pass"), serp_priority("background"), \
+                serp_budget(self.budget if budget is None else budget) as spend, \
+                serp_refresh_ahead(self.refresh_ahead):
+            # Popular trips first: the hotels for their exact dates are what requests will hit
+            for destination, departure, check_in, check_out, _ in trips:
+                if spend.exhausted:
+                    break
+                warm([place for place in (destination, departure) if place])
+                maps.get_location(destination)
+                get_hotels(destination, check_in, check_out)
+                warmed_trips += 1
+
+            for place in places:
+                if spend.exhausted:
+                    break
+                warm([place])
+                maps.get_location(place)
+                warmed_places += 1
+
+        report = {
+            "finished_at": time.time(),
+            "seconds": round(time.monotonic() - started, 3),
+            "searches_spent": spend.spent,
+            "trips": len(trips),
+            "trips_warmed": warmed_trips,
+            "places": len(places),
+            "places_warmed": warmed_places,
+            "budget_exhausted": spend.exhausted,
+        }
+        with self._lock:
+            self._counters["passes"] += 1
+            self._counters["searches_spent"] += spend.spent
+            self._counters["trips_warmed"] += warmed_trips
+            self._counters["places_warmed"] += warmed_places
+            self._counters["budget_exhausted"] += int(spend.exhausted)
+            self._last_pass = report
+        log_fields(logger, logging.INFO, "Cache warming pass", **report)
+        return report
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Cache warming pass failed: %s", e)
+            self._stopping.wait(self.interval)
+
+    def start(self):
+        """Warm now and every `interval` seconds in a background thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._loop, name="cache-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            learned = self._conn.execute(
+                "SELECT COUNT(*) FROM trips WHERE hits >= ?", (CACHE_WARMER_MIN_HITS,)
+            ).fetchone()[0]
+            return {
+                "running": self._thread is not None,
+                "interval_seconds": self.interval,
+                "budget": self.budget,
+                "learned_trips": learned,
+                **self._counters,
+                "last_pass": dict(self._last_pass),
+            }
+
+
+cache_warmer = CacheWarmer() if CACHE_WARMER_ENABLED else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one cache-warming pass.")
+    parser.add_argument("--budget", type=int, default=CACHE_WARMER_BUDGET, help="Most SerpAPI searches to spend")
+    args = parser.parse_args()
+
+    report = (cache_warmer or CacheWarmer()).run_once(budget=args.budget)
+    for key, value in report.items():
+        print(f"{key:<18} {value}")
@@ -0,0 +1,100 @@
+# Country_table.py
+import unicodedata
+import threading
+import difflib
+import json
+import re
+import os
+
+# ---------------------------------------------------
+# BUNDLED COUNTRY → CAPITAL TABLE
+# ---------------------------------------------------
+# data/countries.json lists every country with its ISO codes, common
+# aliases, capital and capital coordinates. It replaces the per-request
+# restcountries.com call, and the coordinates let a country query skip
+# geocoding entirely.
+
+COUNTRIES_PATH = os.path.join(os.path.dirname(__file__), "data", "countries.json")
+
+FUZZY_MIN_LENGTH = 6      # shorter queries must match exactly
+FUZZY_CUTOFF = 0.9        # difflib ratio needed for a typo match
+
+_by_name = None
+_by_code = None
+_names = None
+_lock = threading.Lock()
+
+
+def normalize_country(text: str):
+    """'  Côte d’Ivoire ' → 'cote divoire', 'St. Lucia' → 'saint lucia'"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace("&", " and ")
+    text = re.sub(r"['’`.]", "", text)
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    words = text.split()
+    if words and words[0] == "the":
+        words = words[1:]
+    words = ["saint" if w == "st" else w for w in words]
+    return " ".join(words)
+
+
+def _load():
+    global _by_name, _by_code, _names
+    with open(COUNTRIES_PATH, encoding="utf-8") as f:
+        countries = json.load(f)
+
+    by_name, by_code = {}, {}
+    for country in countries:
+        for name in [country["name"], *country.get("aliases", [])]:
+            by_name.setdefault(normalize_country(name), country)
+        by_code[country["iso2"]] = country
+        by_code[country["iso3"]] = country
+
+    _by_name, _by_code, _names = by_name, by_code, list(by_name)
+
+
+def _ensure_loaded():
+    if _by_name is None:
+        with _lock:
+            if _by_name is None:
+                _load()
+
+
+def country_by_code(code: str):
+    """Country entry for an ISO 3166 alpha-2 or alpha-3 code, or None."""
+    _ensure_loaded()
+    return _by_code.get((code or "").strip().upper())
+
+
+def is_code_like(query: str):
+    """Three upper-case letters: how an ISO3 (or IATA airport) code is written."""
+    stripped = (query or "").strip()
+    return len(stripped) == 3 and stripped.isalpha() and stripped.isupper()
+
+
+def lookup_country(query: str, iso3=True):
+    """
+    Country entry for a country name / alias / upper-case ISO3 code, or None.
+    Entry: {"name", "iso2", "iso3", "capital", "lat", "lon", "aliases"}
+    iso3=False skips the code match (e.g. the text is an airport code).
+    """
+    _ensure_loaded()
+    if not query:
+        return None
+
+    # "USA", "GBR" — only when written as a code, so city names never collide
+    stripped = query.strip()
+    if iso3 and is_code_like(stripped):
+        country = _by_code.get(stripped)
+        if country:
+            return country
+
+    key = normalize_country(query)
+    country = _by_name.get(key)
+    if country or len(key) < FUZZY_MIN_LENGTH:
+        return country
+
+    # Typos: "phillipines", "argentinia"
+    match = difflib.get_close_matches(key, _names, n=1, cutoff=FUZZY_CUTOFF)
+    return _by_name[match[0]] if match else None
@@ -1,26 +1,90 @@
 # Flight.py
-from serpapi import GoogleSearch
+from app.agents.Itinerary_Data.Serp_client import serp_search
+from app.agents.Itinerary_Data.Serp_cache import normalize_params
+from app.agents.Itinerary_Data.Serp_quota import serp_budget
+from app.utils.single_flight import SingleFlight
+from app.utils.threads import submit_with_context
+from app.utils.logger import get_logger
+from app.utils.metrics import stage, timed, observe_pairs_tried
 from dotenv import load_dotenv
-from app.agents.Itinerary_Data.Airport_helper import resolve_airport_code, AIRPORTS
-from haversine import haversine, Unit
+from app.agents.Itinerary_Data.Airport_helper import resolve_airport_code, get_airport_index
+from app.agents.Itinerary_Data.Route_index import route_index, is_empty_result
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
 import os
 
 load_dotenv()
+logger = get_logger(__name__)
 SERP_API_KEY = os.getenv("Serp_API")
 
+# Airport-pair searches in flight at once per get_flights call (1 = sequential)
+FLIGHT_SEARCH_CONCURRENCY = int(os.getenv("FLIGHT_SEARCH_CONCURRENCY", "5"))
+# Threads shared by all concurrent get_flights calls
+FLIGHT_SEARCH_POOL_SIZE = int(os.getenv("FLIGHT_SEARCH_POOL_SIZE", "32"))
+
+_search_pool = ThreadPoolExecutor(max_workers=FLIGHT_SEARCH_POOL_SIZE, thread_name_prefix="flight-search")
+
+# Concurrent identical trips share one airport resolution + pair search
+_in_flight = SingleFlight("flights")
+_calendar_in_flight = SingleFlight("price_calendar")
+
+# Flexible-dates price calendar: flight searches sent upstream per request
+# (finding the airport pair included), and how many of them run at once
+PRICE_CALENDAR_MAX_SEARCHES = int(os.getenv("PRICE_CALENDAR_MAX_SEARCHES", "60"))
+PRICE_CALENDAR_CONCURRENCY = int(os.getenv("PRICE_CALENDAR_CONCURRENCY", "5"))
+# Without a pair the route index knows has flights, the pair is found by a
+# full nearby-airports search on up to this many date combinations
+PRICE_CALENDAR_PAIR_ATTEMPTS = int(os.getenv("PRICE_CALENDAR_PAIR_ATTEMPTS", "3"))
+
+# ---------------------------------------------------
+# RESPONSE VIEWS
+# ---------------------------------------------------
+# view="full"    → every part, raw SerpAPI data included (the original shape)
+# view="summary" → what the UI renders: trimmed flight options, the Google
+#                  Flights link, lowest price, our summary and coordinates
+# fields=[...]   → only these parts (in the chosen view)
+
+FLIGHT_PARTS = (
+    "search_metadata", "search_parameters", "price_insights", "airports",
+    "best_flights", "other_flights", "summary", "coordinates",
+)
+SUMMARY_PARTS = ("search_metadata", "price_insights", "best_flights", "other_flights", "summary", "coordinates")
+
+# Flight options kept per list in the summary view
+FLIGHT_SUMMARY_MAX_OPTIONS = int(os.getenv("FLIGHT_SUMMARY_MAX_OPTIONS", "6"))
+
+OPTION_KEYS = (
+    "flights", "layovers", "total_duration", "carbon_emissions", "price", "type",
+    "airline_logo", "departure_token", "booking_token",
+)
+LEG_KEYS = (
+    "departure_airport", "arrival_airport", "duration", "airplane", "airline", "airline_logo",
+    "travel_class", "flight_number", "legroom", "extensions", "overnight",
+    "often_delayed_by_over_30_min", "ticket_also_sold_by",
+)
+
 
 def get_nearest_airports(lat, lon, limit=5):
-    """Return the nearest `limit` commercial airports sorted by distance."""
-    sorted_airports = sorted(
-        AIRPORTS,
-        key=lambda ap: haversine((lat, lon), (ap["lat"], ap["lon"]), unit=Unit.KILOMETERS)
-    )
-    return sorted_airports[:limit]
+    """Return the nearest `limit` commercial airports as [(airport, distance_km), ...]."""
+    return get_airport_index().nearest(lat, lon, k=limit)
 
 
-def try_flight(dep_code, arr_code, outbound_date, return_date, currency):
-    """Try one flight search via SerpAPI."""
-    params = {
+def rank_airport_pairs(dep_airports, arr_airports):
+    """
+    (dep_code, arr_code) pairs to try, best first: by the route index when
+    enabled (past success + combined distance, known-empty pairs last),
+    else every combination, departure airport first.
+    Returns (pairs, proven): how many leading pairs are known to have flights.
+    """
+    dep = [(ap["iata"], km) for ap, km in dep_airports]
+    arr = [(ap["iata"], km) for ap, km in arr_airports]
+    if route_index is None:
+        return [(dep_code, arr_code) for dep_code, _ in dep for arr_code, _ in arr], 0
+    return route_index.rank_pairs(dep, arr)
+
+
+def _flight_params(dep_code, arr_code, outbound_date, return_date, currency):
+    return {
         "engine": "google_flights",
         "departure_id": dep_code,
         "arrival_id": arr_code,
@@ -31,32 +95,144 @@ def try_flight(dep_code, arr_code, outbound_date, return_date, currency):
         "api_key": SERP_API_KEY
     }
 
-    search = GoogleSearch(params)
-    results = search.get_dict()
 
-    if results.get("best_flights") or results.get("other_flights"):
-        return results
+def try_flight(dep_code, arr_code, outbound_date, return_date, currency):
+    """Try one flight search via SerpAPI."""
+    results = serp_search(_flight_params(dep_code, arr_code, outbound_date, return_date, currency))
+    has_flights = bool(results.get("best_flights") or results.get("other_flights"))
+
+    # Remember the outcome for ranking; API failures (quota, key, network) say nothing about the route
+    if route_index is not None and (has_flights or is_empty_result(results)):
+        route_index.record(dep_code, arr_code, has_flights)
+
+    return results if has_flights else None
+
+
+def search_airport_pairs(pairs, outbound_date, return_date, currency, concurrency=None, first_wave=None):
+    """
+    Search (dep_code, arr_code) pairs in priority order and return
+    (results, dep_code, arr_code) for the first pair with flights.
+
+    Pairs are queried in waves of `concurrency` parallel requests. Within a
+    wave, results are checked in priority order, so a lower-ranked pair
+    never wins over a higher-ranked one — same answer as the sequential loop,
+    a fraction of the wall-clock time. `first_wave` shrinks the first wave
+    (e.g. to the pairs known to have flights, so those alone are tried first).
+    """
+    concurrency = max(1, concurrency or FLIGHT_SEARCH_CONCURRENCY)
+    first_wave = min(first_wave or concurrency, concurrency)
+    starts = [0, *range(first_wave, len(pairs), concurrency)] if pairs else []
+
+    for start in starts:
+        wave = pairs[start:start + (first_wave if start == 0 else concurrency)]
+
+        logger.debug("Trying %s", ", ".join(f"{dep} → {arr}" for dep, arr in wave))
+
+        if len(wave) == 1:
+            dep_code, arr_code = wave[0]
+            futures = None
+            outcomes = [try_flight(dep_code, arr_code, outbound_date, return_date, currency)]
+        else:
+            futures = [
+                submit_with_context(_search_pool, try_flight, dep_code, arr_code, outbound_date, return_date, currency)
+                for dep_code, arr_code in wave
+            ]
+            outcomes = (future.result() for future in futures)
+
+        for (dep_code, arr_code), result in zip(wave, outcomes):
+            if result:
+                if futures:
+                    for future in futures:
+                        future.cancel()
+                observe_pairs_tried(start + len(wave), found=True)
+                return result, dep_code, arr_code
 
-    return None
+    observe_pairs_tried(len(pairs), found=False)
+    return None, None, None
 
 
+@timed("flights")
 def get_flights(
     departure_id: str,
     arrival_id: str,
     outbound_date: str,
     return_date: str,
-    currency: str = "USD"
+    currency: str = "USD",
+    concurrency: int = None,
+    view: str = "full",
+    fields=None
 ):
     """
     Fetch flight options.
     If no flights found → try next nearest airports until flights appear.
+    `concurrency` caps parallel pair searches (default FLIGHT_SEARCH_CONCURRENCY).
+    `view` ("full" | "summary") and `fields` (list or comma-separated parts,
+    see FLIGHT_PARTS) choose which parts of the response are built.
+    Concurrent identical searches are coalesced; each caller gets its own view.
+    """
+    key = normalize_params({
+        "departure_id": departure_id,
+        "arrival_id": arrival_id,
+        "outbound_date": outbound_date,
+        "return_date": return_date,
+        "currency": currency,
+    })
+    search = _in_flight.do(
+        key, search_flights, departure_id, arrival_id, outbound_date, return_date, currency, concurrency
+    )
+
+    if "error" in search:
+        return search
+    return build_flights_response(search, currency, view, fields)
+
+
+def search_flights(
+    departure_id: str,
+    arrival_id: str,
+    outbound_date: str,
+    return_date: str,
+    currency: str = "USD",
+    concurrency: int = None
+):
+    """
+    Resolve both places and search airport pairs (nearest first).
+    Returns {"results", "dep_code", "arr_code", "dep_info", "arr_info"} or {"error"}.
+    """
+    trip = resolve_trip(departure_id, arrival_id)
+    if "error" in trip:
+        return trip
+
+    with stage("flights.pair_search", pairs=len(trip["pairs"])) as search:
+        final_results, final_dep_code, final_arr_code = search_airport_pairs(
+            trip["pairs"], outbound_date, return_date, currency, concurrency, first_wave=trip["proven"]
+        )
+        if not final_results:
+            search.outcome = "not_found"
+
+    if not final_results:
+        return {"error": "No flights found for any nearby airport combinations."}
+
+    return {
+        "results": final_results,
+        "dep_code": final_dep_code,
+        "arr_code": final_arr_code,
+        "dep_info": trip["dep_info"],
+        "arr_info": trip["arr_info"],
+    }
+
+
+def resolve_trip(departure_id: str, arrival_id: str):
+    """
+    Resolve both places and rank the airport pairs between them.
+    Returns {"dep_info", "arr_info", "pairs", "proven"} or {"error"}.
     """
 
     # -----------------------------------------
     # Resolve departure + arrival place + airport
     # -----------------------------------------
-    dep_info = resolve_airport_code(departure_id)
-    arr_info = resolve_airport_code(arrival_id)
+    with stage("flights.resolve_airports"):
+        dep_info = resolve_airport_code(departure_id)
+        arr_info = resolve_airport_code(arrival_id)
 
     if "error" in dep_info or "error" in arr_info:
         return {"error": "Could not resolve airports."}
@@ -71,41 +247,254 @@ def get_flights(
     dep_airports = get_nearest_airports(dep_lat, dep_lon)
     arr_airports = get_nearest_airports(arr_lat, arr_lon)
 
-    final_results = None
-    final_dep_code = None
-    final_arr_code = None
-
     # -----------------------------------------
-    # Try airport combinations (nearest first)
+    # Airport combinations to try (likeliest first)
     # -----------------------------------------
-    for dep_ap in dep_airports:
-        for arr_ap in arr_airports:
+    pairs, proven = rank_airport_pairs(dep_airports, arr_airports)
+    return {"dep_info": dep_info, "arr_info": arr_info, "pairs": pairs, "proven": proven}
+
+
+# ---------------------------------------------------
+# FLEXIBLE DATES: PRICE CALENDAR
+# ---------------------------------------------------
+# "Sometime in March" used to mean one /api/flight call per date pair,
+# each resolving the same airports and searching the same airport pairs.
+# The calendar resolves both places and picks the airport pair once: the
+# route index's proven pair when it has one, else the first pair with
+# flights on the first date combinations that have any (at most
+# PRICE_CALENDAR_PAIR_ATTEMPTS of them). Every other combination is then
+# searched on that pair only, a few at a time. Each cell is an ordinary
+# google_flights query, so repeated calendars come from the SerpAPI cache.
+# Finding the pair can take a search per airport pair on each attempt, so
+# all of a calendar's upstream searches share one PRICE_CALENDAR_MAX_SEARCHES
+# budget, and the pair search only spends what the cells leave over.
+# Window sizes and the number of combinations are checked before any date
+# list is built, so an oversized window costs nothing.
+
+
+def _parse_date(value):
+    return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+
+
+def _date_range(first, last):
+    days = (last - first).days
+    return [first + timedelta(days=offset) for offset in range(days + 1)]
+
+
+def _count_date_pairs(out_first, out_last, ret_first, ret_last, min_nights, max_nights):
+    """How many (outbound, return) pairs calendar_date_pairs would build, without building them."""
+    count = 0
+    for offset in range((out_last - out_first).days + 1):
+        out = out_first + timedelta(days=offset)
+        earliest = max(ret_first, out + timedelta(days=min_nights))
+        latest = ret_last if max_nights is None else min(ret_last, out + timedelta(days=max_nights))
+        count += max(0, (latest - earliest).days + 1)
+    return count
+
+
+def calendar_date_pairs(outbound_from, outbound_to, return_from=None, return_to=None,
+                        min_nights=1, max_nights=None, max_searches=None):
+    """
+    (outbound_dates, return_dates, [(outbound, return), ...]) for a date
+    window, as YYYY-MM-DD strings. Return dates default to the outbound
+    window shifted by min_nights..max_nights; a pair must be at least
+    min_nights (and at most max_nights) apart. Raises ValueError for an
+    invalid window, or one with more than `max_searches` days on either
+    side or combinations in total.
+    """
+    out_first, out_last = _parse_date(outbound_from), _parse_date(outbound_to or outbound_from)
+    min_nights = 1 if min_nights is None else max(0, int(min_nights))
+    max_nights = int(max_nights) if max_nights not in (None, "") else None
+    if out_last < out_first:
+        raise ValueError("outbound_to is before outbound_from")
+    if max_nights is not None and max_nights < min_nights:
+        raise ValueError("max_nights is less than min_nights")
+
+    if return_from:
+        ret_first, ret_last = _parse_date(return_from), _parse_date(return_to or return_from)
+    else:
+        ret_first = out_first + timedelta(days=min_nights)
+        ret_last = out_last + timedelta(days=max_nights if max_nights is not None else min_nights)
+    if ret_last < ret_first:
+        raise ValueError("return_to is before return_from")
+
+    if max_searches is not None:
+        for side, first, last in (("outbound", out_first, out_last), ("return", ret_first, ret_last)):
+            if (last - first).days + 1 > max_searches:
+                raise ValueError(f"the {side} window is longer than {max_searches} days")
+        count = _count_date_pairs(out_first, out_last, ret_first, ret_last, min_nights, max_nights)
+        if count > max_searches:
+            raise ValueError(f"{count} combinations; at most {max_searches} can be searched at once")
+
+    outbound_dates = _date_range(out_first, out_last)
+    return_dates = _date_range(ret_first, ret_last)
+    combos = [
+        (out.isoformat(), ret.isoformat())
+        for out in outbound_dates
+        for ret in return_dates
+        if (ret - out).days >= min_nights and (max_nights is None or (ret - out).days <= max_nights)
+    ]
+    return [d.isoformat() for d in outbound_dates], [d.isoformat() for d in return_dates], combos
+
+
+def lowest_price(results):
+    """Cheapest option in a google_flights response, or None."""
+    prices = [
+        option["price"]
+        for option in results.get("best_flights", []) + results.get("other_flights", [])
+        if isinstance(option.get("price"), (int, float))
+    ]
+    if prices:
+        return min(prices)
+    return results.get("price_insights", {}).get("lowest_price")
+
+
+def _calendar_cell(dep_code, arr_code, outbound_date, return_date, currency):
+    """One date combination on the chosen pair → ("ok" | "none" | "error", price)."""
+    results = serp_search(_flight_params(dep_code, arr_code, outbound_date, return_date, currency))
+    if results.get("best_flights") or results.get("other_flights"):
+        if route_index is not None:
+            route_index.record(dep_code, arr_code, True)
+        return "ok", lowest_price(results)
+    # No flights on these dates says nothing about the route on other dates,
+    # so empty cells are not recorded in the route index
+    return ("none" if is_empty_result(results) else "error"), None
 
-            dep_code = dep_ap["iata"]
-            arr_code = arr_ap["iata"]
 
-            print(f"Trying {dep_code} → {arr_code}")
+@timed("flights.calendar")
+def get_price_calendar(
+    departure_id: str,
+    arrival_id: str,
+    outbound_from: str,
+    outbound_to: str = None,
+    return_from: str = None,
+    return_to: str = None,
+    min_nights: int = 1,
+    max_nights: int = None,
+    currency: str = "USD",
+    concurrency: int = None
+):
+    """
+    Lowest price for every outbound/return combination in a date window,
+    as a compact grid (rows = outbound dates, columns = return dates, null
+    where the combination was not searched or had no flights).
+    """
+    currency = currency or "USD"
+    try:
+        outbound_dates, return_dates, combos = calendar_date_pairs(
+            outbound_from, outbound_to, return_from, return_to, min_nights, max_nights,
+            max_searches=PRICE_CALENDAR_MAX_SEARCHES
+        )
+    except (TypeError, ValueError) as e:
+        return {"error": f"Invalid date window: {e}"}
+
+    if not combos:
+        return {"error": "No outbound/return combinations in this date window."}
+
+    key = normalize_params({
+        "departure_id": departure_id,
+        "arrival_id": arrival_id,
+        "combos": combos,
+        "currency": currency,
+    })
+    return _calendar_in_flight.do(
+        key, _search_calendar, departure_id, arrival_id, outbound_dates, return_dates, combos,
+        currency, concurrency
+    )
 
-            result = try_flight(
-                dep_code, arr_code,
-                outbound_date, return_date, currency
-            )
 
-            if result:
-                final_results = result
-                final_dep_code = dep_code
-                final_arr_code = arr_code
+def _settle_calendar_pair(trip, combos, currency, budget):
+    """
+    The airport pair for the whole calendar: (dep_code, arr_code, cells
+    already searched), with no codes if none was found. Dates that no
+    nearby pair has flights on are "none" cells, not a failed calendar.
+    Each attempt searches only as many pairs as `budget` can spare while
+    keeping one search for every combination not yet searched.
+    """
+    pairs, proven = trip["pairs"], trip["proven"]
+    if proven:
+        dep_code, arr_code = pairs[0]
+        return dep_code, arr_code, {}
+
+    cells = {}
+    with stage("flights.calendar_pair", pairs=len(pairs)) as search:
+        for combo in combos[:max(1, PRICE_CALENDAR_PAIR_ATTEMPTS)]:
+            spare = budget.limit - budget.spent - (len(combos) - len(cells) - 1)
+            if spare < 1:
+                break
+            results, dep_code, arr_code = search_airport_pairs(pairs[:spare], *combo, currency)
+            if results:
+                cells[combo] = ("ok", lowest_price(results))
+                return dep_code, arr_code, cells
+            cells[combo] = ("none", None)
+        search.outcome = "not_found"
+    return None, None, cells
+
+
+def _search_calendar(departure_id, arrival_id, outbound_dates, return_dates, combos, currency, concurrency):
+    trip = resolve_trip(departure_id, arrival_id)
+    if "error" in trip:
+        return trip
+    with serp_budget(PRICE_CALENDAR_MAX_SEARCHES) as budget:
+        return _search_calendar_cells(trip, outbound_dates, return_dates, combos, currency, concurrency, budget)
+
+
+def _search_calendar_cells(trip, outbound_dates, return_dates, combos, currency, concurrency, budget):
+    dep_code, arr_code, cells = _settle_calendar_pair(trip, combos, currency, budget)
+    if dep_code is None:
+        return {"error": "No flights found for any nearby airport combinations on the first "
+                         f"{len(cells)} date combination(s) ({budget.spent} searches)."}
+
+    limit = max(1, concurrency or PRICE_CALENDAR_CONCURRENCY)
+    remaining = iter([combo for combo in combos if combo not in cells])
+    pending = {}
+
+    with stage("flights.calendar_search", searches=len(combos)):
+        while True:
+            for combo in remaining:
+                future = submit_with_context(_search_pool, _calendar_cell, dep_code, arr_code, *combo, currency)
+                pending[future] = combo
+                if len(pending) >= limit:
+                    break
+            if not pending:
                 break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                combo = pending.pop(future)
+                try:
+                    cells[combo] = future.result()
+                except Exception as e:
+                    logger.warning("Calendar search %s → %s failed: %s", *combo, e)
+                    cells[combo] = ("error", None)
+
+    priced = [(price, out, ret) for (out, ret), (_, price) in cells.items() if price is not None]
+    cheapest = min(priced) if priced else None
+    outcomes = [outcome for outcome, _ in cells.values()]
+
+    return {
+        "route": f"{dep_code} → {arr_code}",
+        "dep_code": dep_code,
+        "arr_code": arr_code,
+        "currency": currency,
+        "outbound_dates": outbound_dates,
+        "return_dates": return_dates,
+        "prices": [
+            [cells.get((out, ret), (None, None))[1] for ret in return_dates]
+            for out in outbound_dates
+        ],
+        "cheapest": {
+            "outbound_date": cheapest[1],
+            "return_date": cheapest[2],
+            "price": cheapest[0],
+        } if cheapest else None,
+        "searched": len(cells),
+        "no_flights": outcomes.count("none"),
+        "failed": outcomes.count("error"),
+        "upstream_searches": budget.spent,
+    }
 
-        if final_results:
-            break
 
-    if not final_results:
-        return {"error": "No flights found for any nearby airport combinations."}
-
-    # -----------------------------------------
-    # Build return structure
-    # -----------------------------------------
+def build_summary(final_results, final_dep_code, final_arr_code, currency):
     best_flights = final_results.get("best_flights", [])
     other_flights = final_results.get("other_flights", [])
     all_flights = (best_flights + other_flights)[:3]
@@ -160,35 +549,65 @@ def get_flights(
             "airline_logo": airline_logo
         })
 
-    # -----------------------------------------
-    # FINAL RESPONSE (same structure as before)
-    # -----------------------------------------
-
-    
-    final_response = {
-        "search_metadata": final_results.get("search_metadata", {}),
-        "search_parameters": final_results.get("search_parameters", {}),
-        "price_insights": final_results.get("price_insights", {}),
-        "airports": final_results.get("airports", []),
-        "best_flights": final_results.get("best_flights", []),
-        "other_flights": final_results.get("other_flights", []),
-        "summary": {
-            "route": f"{final_dep_code} → {final_arr_code}",
-            "flights_found": len(all_flights),
-            "flights": flights_summary
-        }
+    return {
+        "route": f"{final_dep_code} → {final_arr_code}",
+        "flights_found": len(all_flights),
+        "flights": flights_summary
     }
 
+
+def _trim_option(option):
+    trimmed = {key: option[key] for key in OPTION_KEYS if key in option}
+    trimmed["flights"] = [
+        {key: leg[key] for key in LEG_KEYS if key in leg}
+        for leg in option.get("flights", [])
+    ]
+    return trimmed
+
+
+def _build_part(part, search, currency, view):
+    results = search["results"]
+    compact = view == "summary"
+
+    if part == "summary":
+        return build_summary(results, search["dep_code"], search["arr_code"], currency)
+
     # -----------------------------------------
     # ⭐ ADDING COORDINATES (YOUR REQUIREMENT)
     # -----------------------------------------
-    final_response["coordinates"] = {
-        "departure_place": dep_info.get("place_coordinates"),
-        "departure_airport": dep_info.get("airport_coordinates"),
-        "arrival_place": arr_info.get("place_coordinates"),
-        "arrival_airport": arr_info.get("airport_coordinates")
-    }
+    if part == "coordinates":
+        dep_info, arr_info = search["dep_info"], search["arr_info"]
+        return {
+            "departure_place": dep_info.get("place_coordinates"),
+            "departure_airport": dep_info.get("airport_coordinates"),
+            "arrival_place": arr_info.get("place_coordinates"),
+            "arrival_airport": arr_info.get("airport_coordinates")
+        }
+
+    if part in ("best_flights", "other_flights"):
+        options = results.get(part, [])
+        if compact:
+            return [_trim_option(option) for option in options[:FLIGHT_SUMMARY_MAX_OPTIONS]]
+        return options
 
-    
+    if part == "search_metadata" and compact:
+        return {"google_flights_url": results.get("search_metadata", {}).get("google_flights_url")}
 
-    return final_response
+    if part == "price_insights" and compact:
+        insights = results.get("price_insights", {})
+        return {key: value for key, value in insights.items() if key != "price_history"}
+
+    return results.get(part, [] if part == "airports" else {})
+
+
+def build_flights_response(search, currency="USD", view="full", fields=None):
+    """Build only the requested parts of the get_flights response from a search_flights result."""
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+    parts = fields or (SUMMARY_PARTS if view == "summary" else FLIGHT_PARTS)
+
+    # Same key order as the original response
+    return {
+        part: _build_part(part, search, currency, view)
+        for part in FLIGHT_PARTS if part in parts
+    }
@@ -1,12 +1,35 @@
-from serpapi import GoogleSearch
+from app.agents.Itinerary_Data.Serp_client import serp_search
+from app.agents.Itinerary_Data.Serp_quota import current_priority
+from app.agents.Itinerary_Data.Serp_cache import normalize_params
+from app.utils.single_flight import SingleFlight
+from app.utils.logger import get_logger
+from app.utils.metrics import timed
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
+logger = get_logger(__name__)
 SERP_API_KEY = os.getenv("Serp_API")
 
+# Concurrent identical hotel searches share one lookup (only within one
+# priority class: a user never inherits a cache-warming call's budget)
+_in_flight = SingleFlight("hotels")
 
+
+@timed("hotels")
 def get_hotels(destination: str, check_in: str, check_out: str, adults: int = 2, currency: str = "USD"):
+    """Hotels for a stay (see _get_hotels); concurrent identical calls are coalesced."""
+    key = normalize_params({
+        "q": destination,
+        "check_in_date": check_in,
+        "check_out_date": check_out,
+        "adults": str(adults),
+        "currency": currency,
+    })
+    return _in_flight.do((key, current_priority()), _get_hotels, destination, check_in, check_out, adults, currency)
+
+
+def _get_hotels(destination: str, check_in: str, check_out: str, adults: int = 2, currency: str = "USD"):
     """
     Fetch top 5 hotel results using SerpAPI Google Hotels.
     Returns list of hotels with:
@@ -31,8 +54,7 @@ def get_hotels(destination: str, check_in: str, check_out: str, adults: int = 2,
     }
 
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = serp_search(params)
 
         # Prefer sponsored 'ads' first, else use organic 'properties'
         hotels_data = results.get("ads", []) or results.get("properties", [])
@@ -62,7 +84,7 @@ def get_hotels(destination: str, check_in: str, check_out: str, adults: int = 2,
         return hotels_list
 
     except Exception as e:
-        print(f"❌ Error fetching hotels: {e}")
+        logger.error("Error fetching hotels: %s", e)
         return []
 
 
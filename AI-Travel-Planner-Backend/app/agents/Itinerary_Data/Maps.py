@@ -1,6 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from serpapi import GoogleSearch
+from app.agents.Itinerary_Data.Serp_client import serp_search
+from app.agents.Itinerary_Data.Serp_quota import current_priority
+from app.agents.Itinerary_Data.Serp_cache import normalize_params
+from app.utils.single_flight import SingleFlight
+from app.utils.metrics import timed
 from dotenv import load_dotenv
 import os
 
@@ -8,17 +12,24 @@ import os
 load_dotenv()
 SERP_API_KEY = os.getenv("Serp_API")
 
+# Concurrent lookups of the same place share one request (per priority class)
+_in_flight = SingleFlight("location")
+
 # --- Maps Class ---
 class Maps:
+    @timed("location")
     def get_location(self, query: str):
+        key = (normalize_params({"q": query}), current_priority())
+        return _in_flight.do(key, self._get_location, query)
+
+    def _get_location(self, query: str):
         params = {
             "engine": "google_maps",
             "q": query,
             "type": "search",
             "api_key": SERP_API_KEY
         }
-        search = GoogleSearch(params)
-        return search.get_dict()
+        return serp_search(params)
 
 
 def get_location(q: str):
@@ -0,0 +1,165 @@
+# Place_store.py
+"""
+Persistent place → airport resolution store.
+
+Warm it from the bundled seed list (or your own file, one place per line):
+    python -m app.agents.Itinerary_Data.Place_store
+    python -m app.agents.Itinerary_Data.Place_store --seed my_places.txt
+"""
+from collections import OrderedDict
+from dotenv import load_dotenv
+import threading
+import argparse
+import sqlite3
+import time
+import re
+import os
+
+load_dotenv()
+
+# ---------------------------------------------------
+# RESOLVED PLACES (survive restarts)
+# ---------------------------------------------------
+# Place → coordinates almost never changes, so once resolve_airport_code
+# has done the capital substitution + geocoding for a place, the answer is
+# kept here and the place never goes upstream again.
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+PLACE_STORE_PATH = os.getenv("PLACE_STORE_PATH", os.path.join(DATA_DIR, "place_store.sqlite3"))
+SEED_DESTINATIONS_PATH = os.path.join(DATA_DIR, "seed_destinations.txt")
+# Places kept in memory (LRU); the rest are read back from SQLite on demand
+PLACE_STORE_MEMORY_ENTRIES = int(os.getenv("PLACE_STORE_MEMORY_ENTRIES", "10000"))
+
+
+def normalize_place(place: str):
+    """'  New York City! ' → 'new york city'"""
+    text = re.sub(r"[^\w\s,'-]", " ", (place or "").lower())
+    return " ".join(text.split()).strip(" ,")
+
+
+class PlaceStore:
+    def __init__(self, path=PLACE_STORE_PATH, memory_entries=PLACE_STORE_MEMORY_ENTRIES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()   # LRU hot copy of rows already read/written by this process
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS places (
+                key TEXT PRIMARY KEY,
+                place TEXT NOT NULL,
+                capital TEXT,
+                lat REAL NOT NULL,
+                lon REAL NOT NULL,
+                resolved_at REAL NOT NULL
+            )
+        """)
+
+    def _remember(self, key, entry):
+        # Caller holds self._lock
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, place):
+        """Stored resolution dict for a place, or None."""
+        key = normalize_place(place)
+        if not key:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+            row = self._conn.execute(
+                "SELECT place, capital, lat, lon, resolved_at FROM places WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            entry = {
+                "place": row[0],
+                "capital": row[1],
+                "lat": row[2],
+                "lon": row[3],
+                "resolved_at": row[4],
+            }
+            self._remember(key, entry)
+        return entry
+
+    def put(self, place, resolved_place, capital, lat, lon):
+        key = normalize_place(place)
+        if not key:
+            return
+        entry = {
+            "place": resolved_place,
+            "capital": capital,
+            "lat": lat,
+            "lon": lon,
+            "resolved_at": time.time(),
+        }
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places (key, place, capital, lat, lon, resolved_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, resolved_place, capital, lat, lon, entry["resolved_at"]),
+            )
+            self._remember(key, entry)
+
+    def __contains__(self, place):
+        return self.get(place) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+
+
+place_store = PlaceStore()
+
+
+# ---------------------------------------------------
+# WARMING
+# ---------------------------------------------------
+
+def load_seed_places(path=SEED_DESTINATIONS_PATH):
+    """One place per line; blank lines and # comments are ignored."""
+    with open(path, encoding="utf-8") as f:
+        return [
+            line.strip() for line in f
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+
+def warm(places):
+    """Resolve every place that is not stored yet. Returns (resolved, failed)."""
+    # Imported here: Airport_helper itself depends on this module
+    from app.agents.Itinerary_Data.Airport_helper import resolve_airport_code
+
+    resolved, failed = 0, []
+    for place in places:
+        if place in place_store:
+            continue
+        result = resolve_airport_code(place)
+        if "error" in result:
+            failed.append(place)
+        else:
+            resolved += 1
+    return resolved, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-resolve places into the place store.")
+    parser.add_argument("--seed", default=SEED_DESTINATIONS_PATH, help="File with one place per line")
+    args = parser.parse_args()
+
+    places = load_seed_places(args.seed)
+    resolved, failed = warm(places)
+    print(f"Resolved {resolved} new places ({len(place_store)} stored).")
+    if failed:
+        print(f"⚠️ Could not resolve: {', '.join(failed)}")
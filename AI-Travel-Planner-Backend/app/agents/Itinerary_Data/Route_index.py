@@ -0,0 +1,208 @@
+# Route_index.py
+"""
+Persistent record of which airport pairs Google Flights has flights for.
+
+Show what it knows:
+    python -m app.agents.Itinerary_Data.Route_index
+    python -m app.agents.Itinerary_Data.Route_index --forget-empty
+"""
+from dotenv import load_dotenv
+import threading
+import argparse
+import sqlite3
+import time
+import os
+
+load_dotenv()
+
+# ---------------------------------------------------
+# ROUTE KNOWLEDGE (survives restarts)
+# ---------------------------------------------------
+# Every airport-pair search teaches us something: the pair has flights, or
+# SerpAPI came back empty for it. get_flights uses that to try pairs that
+# worked before first and to push pairs that were empty recently to the end
+# of the list, instead of paying for the same empty query before the likely
+# ones. An empty answer was for one set of dates, so those pairs are still
+# tried when nothing else has flights. Empty marks expire after
+# ROUTE_EMPTY_TTL_SECONDS. Other processes write to the same table, so rows
+# cached in memory are re-read after ROUTE_INDEX_MEMORY_TTL_SECONDS.
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+ROUTE_INDEX_PATH = os.getenv("ROUTE_INDEX_PATH", os.path.join(DATA_DIR, "route_index.sqlite3"))
+ROUTE_INDEX_ENABLED = os.getenv("ROUTE_INDEX", "1") != "0"
+ROUTE_EMPTY_TTL_SECONDS = float(os.getenv("ROUTE_EMPTY_TTL_SECONDS", str(3 * 86400)))
+# A pair that had flights before ranks like one this much closer (km)
+ROUTE_SUCCESS_BONUS_KM = float(os.getenv("ROUTE_SUCCESS_BONUS_KM", "150"))
+ROUTE_INDEX_MEMORY_TTL_SECONDS = float(os.getenv("ROUTE_INDEX_MEMORY_TTL_SECONDS", "60"))
+
+# SerpAPI's answer when a pair simply has no flights (other errors say nothing about the route)
+EMPTY_RESULT_ERROR = "hasn't returned any results"
+
+
+def is_empty_result(results):
+    """True when a google_flights response means "no flights for this pair"."""
+    error = results.get("error")
+    if error:
+        return EMPTY_RESULT_ERROR in error
+    return not (results.get("best_flights") or results.get("other_flights"))
+
+
+class RouteIndex:
+    def __init__(self, path=ROUTE_INDEX_PATH, empty_ttl=ROUTE_EMPTY_TTL_SECONDS, success_bonus_km=ROUTE_SUCCESS_BONUS_KM,
+                 memory_ttl=ROUTE_INDEX_MEMORY_TTL_SECONDS):
+        self.path = path
+        self.empty_ttl = empty_ttl
+        self.success_bonus_km = success_bonus_km
+        self.memory_ttl = memory_ttl
+        self._lock = threading.Lock()
+        self._memory = {}   # hot copy of rows read by this process: pair -> (loaded_at, row or None)
+        self._counters = {"ranked_searches": 0, "pairs_demoted": 0, "successes_recorded": 0, "empties_recorded": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS routes (
+                dep TEXT NOT NULL,
+                arr TEXT NOT NULL,
+                successes INTEGER NOT NULL DEFAULT 0,
+                empties INTEGER NOT NULL DEFAULT 0,
+                last_success REAL,
+                last_empty REAL,
+                PRIMARY KEY (dep, arr)
+            )
+        """)
+
+    # ---------------------------------------------------
+    # LOOKUPS
+    # ---------------------------------------------------
+
+    def get_many(self, pairs):
+        """{(dep, arr): row dict} for the pairs the index knows about."""
+        now = time.monotonic()
+        with self._lock:
+            cached = {pair: self._memory.get(pair) for pair in pairs}
+        missing = [pair for pair, entry in cached.items() if entry is None or now - entry[0] >= self.memory_ttl]
+        if missing:
+            deps = sorted({dep for dep, _ in missing})
+            arrs = sorted({arr for _, arr in missing})
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT dep, arr, successes, empties, last_success, last_empty FROM routes "
+                    f"WHERE dep IN ({','.join('?' * len(deps))}) AND arr IN ({','.join('?' * len(arrs))})",
+                    (*deps, *arrs),
+                ).fetchall()
+                found = {(row[0], row[1]): row for row in rows}
+                for pair in missing:
+                    row = found.get(pair)
+                    cached[pair] = self._memory[pair] = (now, None if row is None else {
+                        "successes": row[2],
+                        "empties": row[3],
+                        "last_success": row[4],
+                        "last_empty": row[5],
+                    })
+        return {pair: entry[1] for pair, entry in cached.items() if entry[1]}
+
+    def is_known_empty(self, route, now=None):
+        """Empty more recently than it had flights, and within the TTL."""
+        if not route or not route["last_empty"]:
+            return False
+        if route["last_success"] and route["last_success"] >= route["last_empty"]:
+            return False
+        return (now or time.time()) - route["last_empty"] < self.empty_ttl
+
+    def rank_pairs(self, dep_airports, arr_airports):
+        """
+        Candidate (dep_iata, arr_iata) pairs, best first, from the nearest
+        airports on each side ([(iata, distance_km), ...]). Pairs are ordered
+        by combined distance, with pairs that had flights before pulled
+        forward by success_bonus_km; recently empty pairs go last (still
+        tried, since the empty answer was for other dates).
+        Returns (pairs, proven): proven = how many leading pairs had flights before.
+        """
+        candidates = [
+            ((dep, arr), dep_km + arr_km)
+            for dep, dep_km in dep_airports
+            for arr, arr_km in arr_airports
+        ]
+        known = self.get_many([pair for pair, _ in candidates])
+        now = time.time()
+
+        ranked, demoted = [], 0
+        for order, (pair, distance) in enumerate(candidates):
+            route = known.get(pair)
+            known_empty = self.is_known_empty(route, now)
+            demoted += known_empty
+            has_flights = bool(route and route["successes"] and route["last_success"] >= (route["last_empty"] or 0))
+            if has_flights:
+                distance -= self.success_bonus_km
+            ranked.append((known_empty, distance, order, pair, has_flights))
+        ranked.sort()
+
+        proven = 0
+        while proven < len(ranked) and ranked[proven][4]:
+            proven += 1
+
+        with self._lock:
+            self._counters["ranked_searches"] += 1
+            self._counters["pairs_demoted"] += demoted
+        return [pair for _, _, _, pair, _ in ranked], proven
+
+    # ---------------------------------------------------
+    # RECORDING
+    # ---------------------------------------------------
+
+    def record(self, dep, arr, has_flights):
+        now = time.time()
+        column = "successes" if has_flights else "empties"
+        stamp = "last_success" if has_flights else "last_empty"
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO routes (dep, arr, {column}, {stamp}) VALUES (?, ?, 1, ?) "
+                f"ON CONFLICT (dep, arr) DO UPDATE SET {column} = {column} + 1, {stamp} = excluded.{stamp}",
+                (dep, arr, now),
+            )
+            self._counters["successes_recorded" if has_flights else "empties_recorded"] += 1
+            loaded_at, route = self._memory.get((dep, arr), (time.monotonic(), None))
+            route = route or {"successes": 0, "empties": 0, "last_success": None, "last_empty": None}
+            self._memory[(dep, arr)] = (loaded_at, {**route, column: route[column] + 1, stamp: now})
+
+    def forget_empty(self):
+        """Drop every empty-result mark (e.g. after a schedule change)."""
+        with self._lock:
+            self._conn.execute("UPDATE routes SET last_empty = NULL")
+            self._memory.clear()
+
+    def stats(self):
+        cutoff = time.time() - self.empty_ttl
+        with self._lock:
+            pairs, with_flights, known_empty = self._conn.execute(
+                "SELECT COUNT(*), "
+                "COALESCE(SUM(successes > 0), 0), "
+                "COALESCE(SUM(last_empty > ? AND (last_success IS NULL OR last_success < last_empty)), 0) "
+                "FROM routes",
+                (cutoff,),
+            ).fetchone()
+            counters = dict(self._counters)
+        return {
+            "pairs": pairs,
+            "with_flights": with_flights,
+            "known_empty": known_empty,
+            "empty_ttl_seconds": self.empty_ttl,
+            **counters,
+        }
+
+
+route_index = RouteIndex() if ROUTE_INDEX_ENABLED else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the airport-pair route index.")
+    parser.add_argument("--forget-empty", action="store_true", help="Clear all empty-result marks")
+    args = parser.parse_args()
+
+    index = route_index or RouteIndex()
+    if args.forget_empty:
+        index.forget_empty()
+        print("Cleared empty-result marks.")
+    for key, value in index.stats().items():
+        print(f"{key:<20} {value}")
@@ -0,0 +1,232 @@
+# Serp_cache.py
+from collections import OrderedDict, defaultdict
+from dotenv import load_dotenv
+import threading
+import sqlite3
+import json
+import time
+import os
+
+load_dotenv()
+
+# ---------------------------------------------------
+# SERPAPI RESPONSE CACHE
+# ---------------------------------------------------
+# Responses are keyed on their normalized engine parameters (api_key
+# dropped, strings case/whitespace-folded, keys sorted) so "Paris" and
+# " paris " share one entry. Each engine has its own TTL: geocodes and
+# place searches barely change, flight prices move by the hour.
+
+SERP_CACHE_BACKEND = os.getenv("SERP_CACHE_BACKEND", "memory")      # memory | sqlite | none
+SERP_CACHE_PATH = os.getenv(
+    "SERP_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), "data", "serp_cache.sqlite3"),
+)
+SERP_CACHE_MAX_ENTRIES = int(os.getenv("SERP_CACHE_MAX_ENTRIES", "5000"))
+
+DEFAULT_TTL_SECONDS = 3600
+ENGINE_TTL_SECONDS = {
+    "google_maps": 7 * 86400,      # geocoding / place search
+    "google_hotels": 3 * 3600,
+    "google_flights": 30 * 60,
+}
+
+# Override per engine, e.g. SERP_CACHE_TTL_GOOGLE_FLIGHTS=600
+for _engine in list(ENGINE_TTL_SECONDS):
+    _override = os.getenv(f"SERP_CACHE_TTL_{_engine.upper()}")
+    if _override:
+        ENGINE_TTL_SECONDS[_engine] = float(_override)
+
+IGNORED_PARAMS = {"api_key", "output", "source", "async", "no_cache"}
+
+
+def normalize_params(params):
+    """Canonical cache key for a set of SerpAPI parameters."""
+    normalized = {}
+    for key, value in params.items():
+        if key in IGNORED_PARAMS or value is None:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.lower().split())
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+
+
+# ---------------------------------------------------
+# BACKENDS
+# ---------------------------------------------------
+
+class MemoryBackend:
+    """In-process LRU. Values are shared objects — treat them as read-only."""
+
+    def __init__(self, max_entries=SERP_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key → (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        """Store a value; returns how many entries were evicted."""
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def expires_at(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """Local-disk LRU shared by every worker on the host; survives restarts."""
+
+    def __init__(self, path=SERP_CACHE_PATH, max_entries=SERP_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS serp_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS serp_cache_lru ON serp_cache (last_access)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM serp_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM serp_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE serp_cache SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO serp_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            overflow = len(self) - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM serp_cache WHERE key IN "
+                    "(SELECT key FROM serp_cache ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+            return max(0, overflow)
+
+    def expires_at(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at FROM serp_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM serp_cache").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM serp_cache")
+
+
+# ---------------------------------------------------
+# CACHE FRONT
+# ---------------------------------------------------
+
+class SerpCache:
+    """Per-engine TTL cache over a pluggable backend, with hit/miss counters."""
+
+    def __init__(self, backend, ttls=None):
+        self.backend = backend
+        self.ttls = dict(ENGINE_TTL_SECONDS if ttls is None else ttls)
+        self._counters = defaultdict(lambda: {"hits": 0, "misses": 0, "stores": 0, "evictions": 0})
+        self._lock = threading.Lock()
+
+    def ttl_for(self, engine):
+        return self.ttls.get(engine, DEFAULT_TTL_SECONDS)
+
+    def _count(self, engine, name, amount=1):
+        with self._lock:
+            self._counters[engine][name] += amount
+
+    def get(self, params):
+        engine = params.get("engine", "unknown")
+        if self.backend is None:
+            return None
+        value = self.backend.get(normalize_params(params))
+        self._count(engine, "hits" if value is not None else "misses")
+        return value
+
+    def set(self, params, value):
+        engine = params.get("engine", "unknown")
+        if self.backend is None or self.ttl_for(engine) <= 0:
+            return
+        evicted = self.backend.set(normalize_params(params), value, self.ttl_for(engine))
+        self._count(engine, "stores")
+        if evicted:
+            self._count(engine, "evictions", evicted)
+
+    def expires_at(self, params):
+        """Expiry timestamp of a cached response, or None if not cached."""
+        if self.backend is None:
+            return None
+        return self.backend.expires_at(normalize_params(params))
+
+    def stats(self):
+        with self._lock:
+            per_engine = {engine: dict(c) for engine, c in self._counters.items()}
+        hits = sum(c["hits"] for c in per_engine.values())
+        misses = sum(c["misses"] for c in per_engine.values())
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "entries": len(self.backend) if self.backend else 0,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "engines": per_engine,
+        }
+
+
+def create_backend(kind=SERP_CACHE_BACKEND):
+    if kind == "sqlite":
+        return SQLiteBackend()
+    if kind == "memory":
+        return MemoryBackend()
+    return None
+
+
+serp_cache = SerpCache(create_backend())
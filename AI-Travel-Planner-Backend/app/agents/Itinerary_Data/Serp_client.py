@@ -0,0 +1,105 @@
+# Serp_client.py
+from app.agents.Itinerary_Data.Serp_cache import serp_cache, normalize_params
+from app.agents.Itinerary_Data.Serp_quota import serp_scheduler, charge_budget, current_priority, QUOTA_ERRORS
+from app.utils.single_flight import SingleFlight
+from app.utils import http_client
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+import os
+
+# ---------------------------------------------------
+# SINGLE ENTRY POINT FOR SERPAPI QUERIES
+# ---------------------------------------------------
+# Every data helper (Maps, Hotels, Flight, Airport_helper) goes through
+# serp_search() instead of calling the API directly, so caching and
+# other cross-cutting policies live in one place. Identical queries that
+# miss the cache at the same moment share one upstream request, and all
+# requests go over the shared keep-alive client (app/utils/http_client.py).
+# Only real upstream calls (not cache hits or shared ones) take a turn
+# from the rate limiter and count against the quota (Serp_quota.py).
+# Only callers of the same priority class share a call, and a refusal by
+# the rate limiter, quota or a task budget is never shared: it was about
+# the leader's turn and budget, so each follower then tries on its own.
+
+SERPAPI_URL = "https://serpapi.com/search"
+SERPAPI_TIMEOUT = float(os.getenv("SERPAPI_TIMEOUT", "60"))
+
+_QUOTA_MESSAGES = set(QUOTA_ERRORS.values())
+
+
+def _shareable(results):
+    return not isinstance(results, dict) or results.get("error") not in _QUOTA_MESSAGES
+
+
+_in_flight = SingleFlight("serpapi", shareable=_shareable)
+
+# Inside serp_refresh_ahead(seconds), cached answers that expire sooner
+# than that are fetched again (and re-cached) instead of being returned
+_refresh_ahead = ContextVar("serp_refresh_ahead", default=0)
+
+
+@contextmanager
+def serp_refresh_ahead(seconds):
+    """Treat cache entries expiring within `seconds` as misses inside this block."""
+    token = _refresh_ahead.set(seconds)
+    try:
+        yield
+    finally:
+        _refresh_ahead.reset(token)
+
+
+def _due_for_refresh(params):
+    window = _refresh_ahead.get()
+    if not window:
+        return False
+    expires_at = serp_cache.expires_at(params)
+    return expires_at is not None and expires_at - time.time() < window
+
+
+def serp_search(params, use_cache=True):
+    """
+    Run a SerpAPI query and return the JSON response as a dict.
+    Successful responses are cached per engine (see Serp_cache.py);
+    error responses are never cached.
+    """
+    if use_cache:
+        cached = serp_cache.get(params)
+        if cached is not None and not _due_for_refresh(params):
+            return cached
+
+    key = (normalize_params(params), use_cache, current_priority())
+    return _in_flight.do(key, _fetch, params, use_cache)
+
+
+def _fetch(params, use_cache):
+    if not charge_budget():
+        return {"error": QUOTA_ERRORS["budget_spent"]}
+    if serp_scheduler is not None:
+        outcome = serp_scheduler.acquire(params.get("engine"))
+        if outcome != "ok":
+            return {"error": QUOTA_ERRORS[outcome]}
+
+    # Same query string the serpapi package sends; params itself is left untouched.
+    # Every request SerpAPI receives is a billed search (and a 429 means the
+    # account is out of searches), so only connect errors are retried: the
+    # quota above is charged once, and that stays true
+    response = http_client.get(
+        SERPAPI_URL,
+        params={
+            **{key: value for key, value in params.items() if value is not None},
+            "output": "json",
+            "source": "python",
+        },
+        timeout=SERPAPI_TIMEOUT,
+        retry_sent=False,
+    )
+    try:
+        results = response.json()   # API errors come back as JSON {"error": ...}
+    except ValueError:
+        results = {"error": f"SerpAPI returned HTTP {response.status_code}"}
+
+    if use_cache and "error" not in results:
+        serp_cache.set(params, results)
+
+    return results
@@ -0,0 +1,342 @@
+# Serp_quota.py
+"""
+Outbound SerpAPI budget: per-engine rate limits, a global search quota
+and priority classes, applied to every upstream call serp_search makes.
+
+Show this period's usage:
+    python -m app.agents.Itinerary_Data.Serp_quota
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dotenv import load_dotenv
+import itertools
+import threading
+import argparse
+import sqlite3
+import heapq
+import time
+import os
+
+from app.utils.metrics import observe_serp_wait, count_event
+
+load_dotenv()
+
+# ---------------------------------------------------
+# SERPAPI RATE LIMITS, QUOTA AND PRIORITIES
+# ---------------------------------------------------
+# Cache misses used to go straight to SerpAPI, so one burst of itinerary
+# requests could burn through the month's searches (or get throttled) in
+# minutes. Every upstream search now takes a token from its engine's
+# bucket (SERP_RATE_<ENGINE> per second, bursts up to SERP_BURST_<ENGINE>)
+# and one search from the period quota (SERP_QUOTA per SERP_QUOTA_PERIOD,
+# counted in SQLite so restarts and other processes share the count).
+# Callers without a token wait in line, interactive requests ahead of
+# background work, and SERP_RATE_GLOBAL caps all engines together: its
+# tokens go to the best-placed caller across every engine's line, so a
+# background search on one engine cannot take the last global token from
+# an interactive one waiting on another. A caller that waits longer than its class allows, or
+# finds the quota spent, gets an error response instead of a search.
+# Background work may not touch the last SERP_BACKGROUND_RESERVE of the
+# quota, so prefetching can never starve real users, and a task can cap
+# its own spend with serp_budget(n).
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+SERP_SCHEDULER_ENABLED = os.getenv("SERP_SCHEDULER", "1") != "0"
+SERP_QUOTA_PATH = os.getenv("SERP_QUOTA_PATH", os.path.join(DATA_DIR, "serp_quota.sqlite3"))
+SERP_QUOTA = int(os.getenv("SERP_QUOTA", "0"))                    # searches per period, 0 = unlimited
+SERP_QUOTA_PERIOD = os.getenv("SERP_QUOTA_PERIOD", "month")        # month | day | hour (UTC)
+SERP_BACKGROUND_RESERVE = float(os.getenv("SERP_BACKGROUND_RESERVE", "0.2"))
+
+# Searches per second (0 = unlimited) and burst size, per engine
+SERP_RATE_DEFAULT = float(os.getenv("SERP_RATE_DEFAULT", "10"))
+SERP_BURST_DEFAULT = float(os.getenv("SERP_BURST_DEFAULT", "20"))
+# All engines together (0 = unlimited)
+SERP_RATE_GLOBAL = float(os.getenv("SERP_RATE_GLOBAL", "0"))
+SERP_BURST_GLOBAL = float(os.getenv("SERP_BURST_GLOBAL", "20"))
+
+# Priority classes: rank (lower goes first), share of the quota, longest wait in line
+PRIORITY_CLASSES = {
+    "interactive": (0, 1.0, float(os.getenv("SERP_MAX_WAIT_INTERACTIVE", "10"))),
+    "background": (1, 1.0 - SERP_BACKGROUND_RESERVE, float(os.getenv("SERP_MAX_WAIT_BACKGROUND", "120"))),
+}
+DEFAULT_PRIORITY = "interactive"
+
+PERIOD_FORMATS = {"month": "%Y-%m", "day": "%Y-%m-%d", "hour": "%Y-%m-%dT%H"}
+
+QUOTA_ERRORS = {
+    "timeout": "SerpAPI rate limit: request waited too long for its turn.",
+    "quota_exhausted": "SerpAPI search quota for this period is used up.",
+    "budget_spent": "SerpAPI search budget for this task is used up.",
+}
+
+_priority = ContextVar("serp_priority", default=DEFAULT_PRIORITY)
+_budget = ContextVar("serp_budget", default=None)
+
+
+@contextmanager
+def serp_priority(name):
+    """Run a block (and the pool tasks it submits with context) at priority class `name`."""
+    if name not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown SerpAPI priority class {name!r}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+class SearchBudget:
+    """Upstream searches one task (e.g. a cache-warming run) may still make."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.spent = 0
+        self.refused = 0
+        self._lock = threading.Lock()
+
+    def spend(self):
+        with self._lock:
+            if self.spent >= self.limit:
+                self.refused += 1
+                return False
+            self.spent += 1
+            return True
+
+    @property
+    def exhausted(self):
+        return self.spent >= self.limit
+
+
+@contextmanager
+def serp_budget(limit):
+    """Cap the upstream searches made inside a block (and its context-carrying pool tasks)."""
+    budget = SearchBudget(limit)
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+
+def charge_budget():
+    """Count one upstream search against the active budget; False when it is spent."""
+    budget = _budget.get()
+    return budget is None or budget.spend()
+
+
+def _engine_setting(prefix, engine, default):
+    value = os.getenv(f"{prefix}_{str(engine).upper()}")
+    return float(value) if value else default
+
+
+class TokenBucket:
+    """`rate` tokens per second up to `burst`; rate 0 never runs dry. Not thread-safe."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until_token(self, now):
+        """Seconds until a token is available (0 = now)."""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        if self.rate:
+            self._refill(now)
+            self.tokens -= 1
+
+    def give_back(self):
+        """Return a token taken for a search that did not happen."""
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+
+class QuotaStore:
+    """Searches used per quota period, persisted so every process shares one count."""
+
+    def __init__(self, path=SERP_QUOTA_PATH, limit=SERP_QUOTA, period=SERP_QUOTA_PERIOD):
+        if period not in PERIOD_FORMATS:
+            raise ValueError(f"SERP_QUOTA_PERIOD must be one of {', '.join(PERIOD_FORMATS)}")
+        self.path = path
+        self.limit = limit
+        self.period = period
+        self._lock = threading.Lock()
+        self._used = {}     # hot copy: period -> last count seen
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS quota (
+                period TEXT PRIMARY KEY,
+                used INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+    def period_key(self, now=None):
+        return time.strftime(PERIOD_FORMATS[self.period], time.gmtime(now or time.time()))
+
+    def consume(self, share=1.0):
+        """Count one search if this class's share of the quota allows it; False when spent."""
+        period = self.period_key()
+        cap = int(self.limit * share) if self.limit else None
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO quota (period, used) VALUES (?, 0)", (period,))
+            row = self._conn.execute(
+                "UPDATE quota SET used = used + 1 WHERE period = ? AND (? IS NULL OR used < ?) RETURNING used",
+                (period, cap, cap),
+            ).fetchone()
+            if row is None:
+                row = self._conn.execute("SELECT used FROM quota WHERE period = ?", (period,)).fetchone()
+                self._used[period] = row[0]
+                return False
+            self._used[period] = row[0]
+            return True
+
+    def usage(self):
+        period = self.period_key()
+        with self._lock:
+            if period not in self._used:
+                row = self._conn.execute("SELECT used FROM quota WHERE period = ?", (period,)).fetchone()
+                self._used[period] = row[0] if row else 0
+            used = self._used[period]
+        usage = {"quota_period": period, "quota_used": used, "quota_limit": self.limit}
+        if self.limit:
+            usage["quota_remaining"] = max(0, self.limit - used)
+        return usage
+
+
+class SerpScheduler:
+    """
+    Hands out upstream SerpAPI searches one at a time per engine: each
+    engine keeps a line of waiting callers ordered by (priority, arrival),
+    and only the head of the line may take a token. A global token goes to
+    the best-placed head among engines that have a token of their own.
+    """
+
+    def __init__(self, quota=None, global_rate=SERP_RATE_GLOBAL, global_burst=SERP_BURST_GLOBAL):
+        self.quota = quota or QuotaStore()
+        self._global = TokenBucket(global_rate, global_burst)
+        self._buckets = {}
+        self._lines = {}        # engine -> heap of (rank, seq)
+        self._arrivals = itertools.count()
+        self._cond = threading.Condition()
+        self._counters = {}     # engine -> {"granted", "timeouts", "quota_rejections"}
+
+    def _bucket(self, engine):
+        if engine not in self._buckets:
+            self._buckets[engine] = TokenBucket(
+                _engine_setting("SERP_RATE", engine, SERP_RATE_DEFAULT),
+                _engine_setting("SERP_BURST", engine, SERP_BURST_DEFAULT),
+            )
+            self._lines[engine] = []
+            self._counters[engine] = {"granted": 0, "timeouts": 0, "quota_rejections": 0}
+        return self._buckets[engine]
+
+    def _global_turn(self, engine, ticket, now):
+        """
+        True when no other engine's head that could search right now is
+        ahead of `ticket`; heads still waiting on their own engine's bucket
+        do not hold the global bucket back.
+        """
+        if not self._global.rate:
+            return True
+        for other, line in self._lines.items():
+            if other != engine and line and line[0] < ticket \
+                    and self._buckets[other].time_until_token(now) <= 0:
+                return False
+        return True
+
+    def acquire(self, engine, priority=None):
+        """
+        Wait for this caller's turn and a token, then count the search
+        against the quota (if one is set). Returns "ok", "timeout" or
+        "quota_exhausted". The quota write happens after leaving the line,
+        so the next caller does not wait on SQLite.
+        """
+        priority = priority or current_priority()
+        rank, share, max_wait = PRIORITY_CLASSES[priority]
+        started = time.monotonic()
+        deadline = started + max_wait
+
+        with self._cond:
+            bucket = self._bucket(engine)
+            line = self._lines[engine]
+            ticket = (rank, next(self._arrivals))
+            heapq.heappush(line, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait_for = None
+                    if line[0] == ticket:
+                        wait_for = max(bucket.time_until_token(now), self._global.time_until_token(now))
+                        if wait_for <= 0 and not self._global_turn(engine, ticket, now):
+                            wait_for = None     # woken when the caller ahead takes the token
+                        elif wait_for <= 0:
+                            bucket.take(now)
+                            self._global.take(now)
+                            outcome = "ok"
+                            break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        outcome = "timeout"
+                        break
+                    self._cond.wait(remaining if wait_for is None else min(wait_for, remaining))
+            finally:
+                line.remove(ticket)
+                heapq.heapify(line)
+                self._cond.notify_all()
+
+        refused = outcome == "ok" and self.quota.limit and not self.quota.consume(share)
+        with self._cond:
+            if refused:
+                outcome = "quota_exhausted"
+                bucket.give_back()
+                self._global.give_back()
+                self._cond.notify_all()
+            counter = {"ok": "granted", "timeout": "timeouts", "quota_exhausted": "quota_rejections"}[outcome]
+            self._counters[engine][counter] += 1
+
+        observe_serp_wait(engine, priority, outcome, time.monotonic() - started)
+        if outcome != "ok":
+            count_event(f"serpapi_{outcome}")
+        return outcome
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            engines = {}
+            for engine, bucket in self._buckets.items():
+                bucket.time_until_token(now)    # refill before reading
+                engines[engine] = {
+                    "rate": bucket.rate,
+                    "tokens": round(bucket.tokens, 2) if bucket.rate else None,
+                    "waiting": len(self._lines[engine]),
+                    **self._counters[engine],
+                }
+        return {**self.quota.usage(), "engines": engines}
+
+
+serp_scheduler = SerpScheduler() if SERP_SCHEDULER_ENABLED else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show SerpAPI quota usage for the current period.")
+    parser.parse_args()
+
+    for key, value in QuotaStore().usage().items():
+        print(f"{key:<16} {value}")
@@ -0,0 +1,140 @@
+# Itinerary_cache.py
+from dotenv import load_dotenv
+import threading
+import json
+import time
+import re
+import os
+
+from app.agents.Itinerary_Data.Serp_cache import MemoryBackend, SQLiteBackend
+from app.agents.Itinerary_Data.Place_store import normalize_place
+
+load_dotenv()
+
+# ---------------------------------------------------
+# GENERATED ITINERARY CACHE
+# ---------------------------------------------------
+# The day plans the LLM writes depend on where, how long, what kind of
+# trip, roughly how much money and which month — not on who asked or on
+# today's prices. The prompt is built from those features alone (see
+# itinerary_features), so a cached plan holds nothing from the request
+# that produced it. Only the parsed days + budget summary are stored here;
+# hotels, flights, location and the trip's total cost come from each
+# request's own live data and are attached to the cached days.
+
+ITINERARY_CACHE_BACKEND = os.getenv("ITINERARY_CACHE_BACKEND", "memory")     # memory | sqlite | none
+ITINERARY_CACHE_PATH = os.getenv(
+    "ITINERARY_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), "Itinerary_Data", "data", "itinerary_cache.sqlite3"),
+)
+ITINERARY_CACHE_MAX_ENTRIES = int(os.getenv("ITINERARY_CACHE_MAX_ENTRIES", "1000"))
+ITINERARY_CACHE_TTL_SECONDS = float(os.getenv("ITINERARY_CACHE_TTL_SECONDS", str(7 * 86400)))
+
+# Per-day spend (in whatever currency the user typed) → band
+BUDGET_BAND_LIMITS = [(100, "low"), (300, "mid")]
+BUDGET_BAND_WORDS = {
+    "low": ("low", "cheap", "budget", "backpack", "economy", "affordable", "tight"),
+    "high": ("high", "luxury", "luxurious", "premium", "expensive", "lavish", "splurge"),
+}
+
+
+def budget_band(budget, num_days):
+    """'$1,000' over 5 days → 'mid', 'luxury' → 'high', anything unclear → 'mid'."""
+    text = str(budget or "").lower()
+
+    amount = re.search(r"\d[\d,]*(?:\.\d+)?(?:\s*k\b)?", text)
+    if amount:
+        raw = amount.group().replace(",", "").strip()
+        value = float(raw.rstrip("k").strip()) * (1000 if raw.endswith("k") else 1)
+        per_day = value / max(int(num_days or 1), 1)
+        for limit, band in BUDGET_BAND_LIMITS:
+            if per_day < limit:
+                return band
+        return "high"
+
+    for band, words in BUDGET_BAND_WORDS.items():
+        if any(word in text for word in words):
+            return band
+    return "mid"
+
+
+def itinerary_features(destination, num_days, trip_type, budget, start_date):
+    """Normalized request features the generated days depend on — all the prompt may use."""
+    month = str(start_date or "")[5:7] or None     # YYYY-MM-DD → "MM"
+    return {
+        "destination": normalize_place(destination),
+        "num_days": int(num_days),
+        "trip_type": " ".join(str(trip_type or "").lower().split()),
+        "budget": budget_band(budget, num_days),
+        "month": month,
+    }
+
+
+def itinerary_key(features):
+    """Cache key for itinerary_features(...)."""
+    return json.dumps(features, sort_keys=True, separators=(",", ":"))
+
+
+class ItineraryCache:
+    """Day plans by normalized request features, with tokens-saved counters."""
+
+    def __init__(self, backend, ttl=ITINERARY_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0,
+                          "tokens_spent": 0, "tokens_saved": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, key):
+        """Cached {"days", "summary", "tokens", "created_at"} or None."""
+        if self.backend is None:
+            return None
+        entry = self.backend.get(key)
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        self._count("tokens_saved", entry.get("tokens", 0))
+        return entry
+
+    def set(self, key, days, summary, tokens):
+        """Store freshly generated days; `tokens` is what generating them cost."""
+        self._count("tokens_spent", tokens)
+        if self.backend is None or self.ttl <= 0 or not days:
+            return
+        evicted = self.backend.set(key, {
+            "days": days,
+            "summary": summary,
+            "tokens": tokens,
+            "created_at": time.time(),
+        }, self.ttl)
+        self._count("stores")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "entries": len(self.backend) if self.backend else 0,
+            "ttl_seconds": self.ttl,
+            "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0,
+            **counters,
+        }
+
+
+def create_backend(kind=ITINERARY_CACHE_BACKEND):
+    if kind == "sqlite":
+        return SQLiteBackend(path=ITINERARY_CACHE_PATH, max_entries=ITINERARY_CACHE_MAX_ENTRIES)
+    if kind == "memory":
+        return MemoryBackend(max_entries=ITINERARY_CACHE_MAX_ENTRIES)
+    return None
+
+
+itinerary_cache = ItineraryCache(create_backend())
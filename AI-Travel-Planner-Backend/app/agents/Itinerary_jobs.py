@@ -0,0 +1,399 @@
+# Itinerary_jobs.py
+"""
+Persistent queue of itinerary jobs, worked by a bounded pool of threads.
+
+Show what is queued / clear out expired jobs:
+    python -m app.agents.Itinerary_jobs
+    python -m app.agents.Itinerary_jobs --cleanup
+"""
+from dotenv import load_dotenv
+import threading
+import argparse
+import socket
+import sqlite3
+import json
+import time
+import uuid
+import os
+
+from app.utils.logger import get_logger, request_id_var
+from app.utils.metrics import observe_stage, count_event
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# ---------------------------------------------------
+# ITINERARY JOBS (submit now, poll for the result)
+# ---------------------------------------------------
+# A full itinerary takes geocoding, hotels, up to 25 flight searches and
+# an 1800-token completion: far longer than a client (or proxy) should
+# hold a request open. POST /api/itinerary_jobs stores the inputs here and
+# answers with a job ID straight away; ITINERARY_JOB_WORKERS threads take
+# jobs oldest-first and write progress and the result back to the row.
+# Jobs live in SQLite, so queued work survives a restart and several
+# processes can share one queue (a job is claimed by a single UPDATE).
+# Finished jobs are deleted ITINERARY_JOB_TTL_SECONDS after they finish.
+# Every write a worker makes is conditional on the job still being its own
+# claim (same worker and attempt), so a job that was requeued or timed out
+# meanwhile never gets a stale result. A claim carries a lease that its
+# process renews every few seconds; a job whose lease ran out belongs to a
+# process that is gone (crashed, restarted, container replaced) and is
+# requeued. Host names and PIDs are reused across restarts, so they are
+# never taken as proof that the owner is alive.
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "Itinerary_Data", "data")
+ITINERARY_JOBS_PATH = os.getenv("ITINERARY_JOBS_PATH", os.path.join(DATA_DIR, "itinerary_jobs.sqlite3"))
+ITINERARY_JOB_WORKERS = int(os.getenv("ITINERARY_JOB_WORKERS", "4"))
+ITINERARY_JOB_MAX_QUEUED = int(os.getenv("ITINERARY_JOB_MAX_QUEUED", "500"))
+ITINERARY_JOB_TTL_SECONDS = float(os.getenv("ITINERARY_JOB_TTL_SECONDS", "3600"))
+# A job running longer than this while its owner still holds the lease is
+# failed as timed out (its result is then dropped)
+ITINERARY_JOB_TIMEOUT_SECONDS = float(os.getenv("ITINERARY_JOB_TIMEOUT_SECONDS", "600"))
+ITINERARY_JOB_MAX_ATTEMPTS = int(os.getenv("ITINERARY_JOB_MAX_ATTEMPTS", "2"))
+# Idle workers re-check the table this often (jobs submitted by other processes)
+ITINERARY_JOB_POLL_SECONDS = float(os.getenv("ITINERARY_JOB_POLL_SECONDS", "1"))
+# Claims not renewed for this long are orphaned (renewed every third of it)
+ITINERARY_JOB_LEASE_SECONDS = float(os.getenv("ITINERARY_JOB_LEASE_SECONDS", "30"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+WORKER_HOST = socket.gethostname()
+_worker_ids = {}
+
+
+class QueueFull(Exception):
+    """Raised by submit() when ITINERARY_JOB_MAX_QUEUED jobs are already waiting."""
+
+
+def worker_id():
+    """This process as recorded on the jobs it claims: host:pid:boot-token (new after a fork or restart)."""
+    pid = os.getpid()
+    if pid not in _worker_ids:
+        _worker_ids.clear()
+        _worker_ids[pid] = f"{WORKER_HOST}:{pid}:{uuid.uuid4().hex[:12]}"
+    return _worker_ids[pid]
+
+
+class JobQueue:
+    """
+    SQLite-backed job table plus the worker threads that run `handler`.
+    handler(params, progress) returns the job's result; an {"error": ...}
+    result (or an exception) marks the job failed. progress(stage, **details)
+    records how far the job has got for pollers.
+    """
+
+    def __init__(self, handler, path=ITINERARY_JOBS_PATH, workers=ITINERARY_JOB_WORKERS,
+                 max_queued=ITINERARY_JOB_MAX_QUEUED, ttl=ITINERARY_JOB_TTL_SECONDS,
+                 timeout=ITINERARY_JOB_TIMEOUT_SECONDS, max_attempts=ITINERARY_JOB_MAX_ATTEMPTS,
+                 poll=ITINERARY_JOB_POLL_SECONDS, lease=ITINERARY_JOB_LEASE_SECONDS):
+        self.handler = handler
+        self.path = path
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.poll = poll
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads = []
+        # runs_* count handler runs by outcome; "failed" etc. in stats() count jobs by status
+        self._counters = {"submitted": 0, "rejected": 0, "runs_completed": 0, "runs_failed": 0,
+                          "runs_superseded": 0, "requeued": 0, "orphaned": 0, "timed_out": 0, "expired": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                version INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    # ---------------------------------------------------
+    # SUBMIT / LOOK UP
+    # ---------------------------------------------------
+
+    def submit(self, params):
+        """Queue a job; returns its view. Raises QueueFull when the backlog is at the limit."""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+            if queued >= self.max_queued:
+                self._counters["rejected"] += 1
+                raise QueueFull(f"{queued} itinerary jobs already waiting")
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, params, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(params, default=str), now, now),
+            )
+            self._counters["submitted"] += 1
+
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """The job as clients see it, or None if unknown (or already expired)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, progress, result, error, attempts, version, "
+                "created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        job_id, status, progress, result, error, attempts, version, created_at, started_at, finished_at = row
+        job = {
+            "job_id": job_id,
+            "status": status,
+            "progress": json.loads(progress) if progress else None,
+            "attempts": attempts,
+            "version": version,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+        }
+        if finished_at:
+            job["expires_at"] = finished_at + self.ttl
+        if status == DONE:
+            job["itinerary"] = json.loads(result)
+        elif status == FAILED:
+            job["error"] = error
+        return job
+
+    # ---------------------------------------------------
+    # WORKERS
+    # ---------------------------------------------------
+
+    def start(self):
+        """Start the worker and cleanup threads (idempotent; no-op with 0 workers)."""
+        with self._lock:
+            if self._threads or self.workers <= 0 or self.handler is None:
+                return
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"itinerary-job-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            self._threads.append(threading.Thread(target=self._janitor, name="itinerary-job-cleanup", daemon=True))
+            self._threads.append(threading.Thread(target=self._heartbeat, name="itinerary-job-heartbeat", daemon=True))
+
+        self.recover()
+        for thread in self._threads:
+            thread.start()
+        logger.info("Started %d itinerary job workers", self.workers)
+
+    def stop(self, timeout=5.0):
+        """Ask the threads to finish; a job still running is picked up again after restart."""
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def _claim(self):
+        """
+        Atomically move the oldest queued job to running under this
+        process's lease; (id, params, created_at, worker, attempts) or None.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "version = version + 1, started_at = ?, updated_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1) AND status = ? "
+                "RETURNING id, params, created_at, worker, attempts",
+                (RUNNING, worker_id(), now + self.lease, now, now, QUEUED, QUEUED),
+            ).fetchone()
+        return row
+
+    def renew_leases(self):
+        """Extend the lease on every job this process is running; returns how many."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE status = ? AND worker = ?",
+                (time.time() + self.lease, RUNNING, worker_id()),
+            ).rowcount
+
+    def _heartbeat(self):
+        while not self._stopping.wait(self.lease / 3):
+            try:
+                self.renew_leases()
+            except sqlite3.Error as e:
+                logger.error("Could not renew itinerary job leases: %s", e)
+
+    def _update(self, job_id, claim, **columns):
+        """
+        Write columns only while the job is still running under `claim`
+        (worker, attempts); False when it has been requeued or given up since.
+        """
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._lock:
+            return self._conn.execute(
+                f"UPDATE jobs SET {assignments}, version = version + 1, updated_at = ? "
+                "WHERE id = ? AND status = ? AND worker = ? AND attempts = ?",
+                (*columns.values(), time.time(), job_id, RUNNING, *claim),
+            ).rowcount > 0
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                claimed = self._claim()
+            except sqlite3.Error as e:
+                logger.error("Could not claim an itinerary job: %s", e)
+                claimed = None
+            if claimed is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll)
+                continue
+            self._run(*claimed)
+
+    def _run(self, job_id, params, created_at, worker, attempts):
+        token = request_id_var.set(f"job-{job_id}")
+        started = time.time()
+        claim = (worker, attempts)
+        observe_stage("itinerary_job.queue_wait", started - created_at)
+
+        def progress(stage, **details):
+            self._update(job_id, claim, progress=json.dumps({"stage": stage, **details}, default=str))
+
+        try:
+            result = self.handler(json.loads(params), progress)
+            error = result.get("error") if isinstance(result, dict) else None
+        except Exception as e:
+            result, error = None, str(e) or type(e).__name__
+
+        stored = True
+        try:
+            if error:
+                logger.warning("Itinerary job %s failed: %s", job_id, error)
+                stored = self._update(job_id, claim, status=FAILED, error=error, finished_at=time.time())
+            else:
+                stored = self._update(job_id, claim, status=DONE, result=json.dumps(result, default=str),
+                                      progress=json.dumps({"stage": DONE}), finished_at=time.time())
+            if not stored:
+                logger.warning("Dropping the outcome of itinerary job %s: it was requeued or timed out", job_id)
+        except sqlite3.Error as e:
+            logger.error("Could not store the outcome of itinerary job %s: %s", job_id, e)
+        finally:
+            request_id_var.reset(token)
+
+        outcome = "superseded" if not stored else "failed" if error else "completed"
+        with self._lock:
+            self._counters[f"runs_{outcome}"] += 1
+        count_event(f"itinerary_job_{outcome}")
+        observe_stage("itinerary_job.run", time.time() - started, "error" if error else "ok")
+
+    # ---------------------------------------------------
+    # RECOVERY / CLEANUP
+    # ---------------------------------------------------
+
+    def recover(self):
+        """Requeue jobs whose owner stopped renewing its lease (another, now gone, process)."""
+        with self._lock:
+            orphaned = self._conn.execute(
+                "SELECT id, worker, attempts FROM jobs WHERE status = ? AND worker != ? AND lease_until < ?",
+                (RUNNING, worker_id(), time.time()),
+            ).fetchall()
+        for job_id, worker, attempts in orphaned:
+            if self._retry(job_id, (worker, attempts), "worker stopped renewing its lease"):
+                with self._lock:
+                    self._counters["orphaned"] += 1
+        return len(orphaned)
+
+    def _retry(self, job_id, claim, reason):
+        """Requeue (or, out of attempts, fail) a job still held by `claim`; False if it moved on."""
+        if claim[1] < self.max_attempts:
+            if self._update(job_id, claim, status=QUEUED, worker=None, lease_until=None, progress=None):
+                logger.warning("Requeuing itinerary job %s: %s", job_id, reason)
+                with self._lock:
+                    self._counters["requeued"] += 1
+                return True
+        elif self._update(job_id, claim, status=FAILED, error=f"Job abandoned: {reason}", finished_at=time.time()):
+            logger.warning("Giving up on itinerary job %s: %s", job_id, reason)
+            return True
+        return False
+
+    def cleanup(self):
+        """
+        Delete finished jobs past the TTL, requeue jobs whose owner's lease
+        ran out, and fail as timed out jobs still leased after `timeout`
+        (re-running those would duplicate work the owner is still doing).
+        Returns (expired, orphaned + timed out).
+        """
+        orphaned = self.recover()
+        now = time.time()
+        with self._lock:
+            expired = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED))}) AND finished_at < ?",
+                (*FINISHED, now - self.ttl),
+            ).rowcount
+            stuck = self._conn.execute(
+                "SELECT id, worker, attempts FROM jobs WHERE status = ? AND started_at < ?",
+                (RUNNING, now - self.timeout),
+            ).fetchall()
+            self._counters["expired"] += expired
+        reason = f"still running after {self.timeout:.0f}s"
+        for job_id, worker, attempts in stuck:
+            if self._update(job_id, (worker, attempts), status=FAILED,
+                            error=f"Job timed out: {reason}", finished_at=now):
+                logger.warning("Itinerary job %s timed out: %s", job_id, reason)
+                with self._lock:
+                    self._counters["timed_out"] += 1
+        return expired, orphaned + len(stuck)
+
+    def _janitor(self):
+        interval = max(1.0, min(self.ttl, self.timeout, self.lease, 60.0))
+        while not self._stopping.wait(interval):
+            try:
+                self.cleanup()
+            except sqlite3.Error as e:
+                logger.error("Itinerary job cleanup failed: %s", e)
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+            counters = dict(self._counters)
+        by_status = dict.fromkeys((QUEUED, RUNNING, DONE, FAILED), 0)
+        by_status.update(rows)
+        return {
+            **by_status,
+            "workers": len([t for t in self._threads if t.name[len("itinerary-job-"):].isdigit()]),
+            "max_queued": self.max_queued,
+            **counters,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the itinerary job queue.")
+    parser.add_argument("--cleanup", action="store_true", help="Delete expired jobs, requeue orphaned ones, time out stuck ones")
+    args = parser.parse_args()
+
+    queue = JobQueue(handler=None)
+    if args.cleanup:
+        expired, stuck = queue.cleanup()
+        print(f"Deleted {expired} expired job(s), requeued or timed out {stuck} stuck job(s).")
+    for key, value in queue.stats().items():
+        print(f"{key:<12} {value}")
@@ -0,0 +1,228 @@
+# Itinerary_parser.py
+"""
+Incremental parser for the itinerary LLM output.
+
+Feed it text as it streams in; it hands back each day as a structured dict
+as soon as the next day's header shows up, and the closing budget summary
+when the stream ends:
+    python -m app.agents.Itinerary_parser benchmarks/fixtures/llm/paris_3_days.md
+"""
+import argparse
+import json
+import re
+
+# ---------------------------------------------------
+# 1. INCREMENTAL DAY-BLOCK SPLITTER
+# ---------------------------------------------------
+# Same header pattern the itinerary agent has always split on. Each feed
+# only scans text it has not looked at yet (plus a short overlap for a
+# header split across two chunks), so a whole completion is one pass.
+
+DAY_HEADER = re.compile(r"(?:##\s*Day\s*\d+:|Day\s*\d+:|\*\*Day\s*\d+:)")
+HEADER_LOOKBACK = 32    # longest header we expect to straddle a chunk boundary
+
+
+class DayBlockSplitter:
+    def __init__(self):
+        self._buffer = ""
+        self._scan_from = 0     # buffer offset not yet searched for a header
+        self._header = None     # header of the day currently being read
+
+    def _emit(self, header, block):
+        return {"day": header.replace("**", "").strip(), "description": block.strip()}
+
+    def feed(self, chunk: str):
+        """Add streamed text; return the days completed by it."""
+        self._buffer += chunk
+        days = []
+
+        # The buffer holds everything after the current header, so any
+        # header found in it closes the current day
+        match = DAY_HEADER.search(self._buffer, self._scan_from)
+        while match:
+            if self._header is not None:
+                days.append(self._emit(self._header, self._buffer[:match.start()]))
+            self._header = match.group(0)
+            self._buffer = self._buffer[match.end():]
+            match = DAY_HEADER.search(self._buffer)
+
+        self._scan_from = max(0, len(self._buffer) - HEADER_LOOKBACK)
+        return days
+
+    def close(self):
+        """End of stream: return the last open day, if any."""
+        if self._header is None:
+            return []
+        day = self._emit(self._header, self._buffer)
+        self._header, self._buffer, self._scan_from = None, "", 0
+        return [day]
+
+
+# ---------------------------------------------------
+# 2. STRUCTURED DAY FIELDS
+# ---------------------------------------------------
+# The prompt asks for "- Morning: …", "Hotel Recommendation: …" etc., but
+# the model drifts: bold labels, "*" bullets, missing dashes, values on the
+# next line. A field runs until the next label; anything before the first
+# label is the day's title.
+
+DAY_FIELDS = {
+    "morning": "morning",
+    "afternoon": "afternoon",
+    "evening": "evening",
+    "hotel recommendation": "hotel_recommendation",
+    "hotel": "hotel_recommendation",
+    "accommodation": "hotel_recommendation",
+    "restaurant suggestion": "restaurant_suggestion",
+    "restaurant": "restaurant_suggestion",
+    "dining": "restaurant_suggestion",
+    "travel tip": "travel_tip",
+    "tip": "travel_tip",
+}
+
+FIELD_LINE = re.compile(
+    r"^\s*(?:[-*•]\s*)?(?:\*\*|__)?\s*(" + "|".join(sorted(DAY_FIELDS, key=len, reverse=True)) + r")s?"
+    r"\s*(?:\*\*|__)?\s*:\s*(?:\*\*|__)?\s*(.*)$",
+    re.IGNORECASE,
+)
+
+# First line of the closing summary ("Summary:", "**Budget Breakdown:**", …)
+SUMMARY_LINE = re.compile(
+    r"^\s*(?:[-*•#]+\s*)*(?:\*\*)?\s*(?:itinerary\s+)?(?:trip\s+)?"
+    r"(summary|budget\s+breakdown|total\s+cost)\b",
+    re.IGNORECASE,
+)
+
+# "- Food: 25%", "**Food:** ~25%" or inline "Accommodation 45%, Food 25%"
+BREAKDOWN_SHARE = re.compile(r"([A-Za-z][A-Za-z &/'-]*?)\s*(?:\*\*)?\s*[:\-–]?\s*(?:\*\*)?\s*~?(\d+(?:\.\d+)?)\s*%")
+BREAKDOWN_PREFIX = re.compile(r"^.*?budget\s+breakdown[^:]*:", re.IGNORECASE)
+TOTAL_LINE = re.compile(r"total\s+cost[^:]*:\s*(?:\*\*)?\s*(.+)", re.IGNORECASE)
+NOTE_LINE = re.compile(r"^\s*(?:[-*•]\s*)?(?:\*\*)?\s*notes?\s*(?:\*\*)?\s*:\s*(?:\*\*)?\s*(.*)", re.IGNORECASE)
+
+
+def _clean(text):
+    return " ".join(text.replace("**", "").replace("__", "").split()).strip(" -*•")
+
+
+def split_summary(block: str):
+    """Split a day's text into (day part, summary part or "")."""
+    offset = 0
+    for line in block.splitlines(keepends=True):
+        if SUMMARY_LINE.match(line) and not FIELD_LINE.match(line):
+            return block[:offset], block[offset:]
+        offset += len(line)
+    return block, ""
+
+
+def parse_day_fields(block: str):
+    """Title + Morning/Afternoon/… fields of one day block (missing fields are None)."""
+    fields = {name: None for name in dict.fromkeys(DAY_FIELDS.values())}
+    title_lines, current, parts = [], None, {}
+
+    for line in block.splitlines():
+        if not line.strip():
+            continue
+        match = FIELD_LINE.match(line)
+        if match:
+            current = DAY_FIELDS[match.group(1).lower()]
+            parts.setdefault(current, []).append(match.group(2))
+        elif current is None:
+            title_lines.append(line)
+        else:
+            parts[current].append(line)
+
+    for name, lines in parts.items():
+        fields[name] = _clean(" ".join(lines)) or None
+
+    title = _clean(title_lines[0]).strip("[]").strip() if title_lines else ""
+    return {"title": title or None, **fields}
+
+
+def parse_summary(text: str):
+    """Budget breakdown (category → percent), total cost and note of the closing summary."""
+    text = text.strip()
+    if not text:
+        return None
+
+    breakdown, total_cost, notes = {}, None, []
+    in_note = False
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        total = TOTAL_LINE.search(line)
+        note = NOTE_LINE.match(line)
+        shares = BREAKDOWN_SHARE.findall(BREAKDOWN_PREFIX.sub("", line)) if "%" in line else []
+        if total:
+            total_cost, in_note = _clean(total.group(1)), False
+        elif note:
+            notes.append(note.group(1))
+            in_note = True
+        elif shares:
+            for category, percent in shares:
+                breakdown[_clean(category)] = float(percent)
+            in_note = False
+        elif in_note:
+            notes.append(line)
+
+    return {
+        "budget_breakdown": breakdown,
+        "total_cost": total_cost or None,
+        "note": _clean(" ".join(notes)) or None,
+        "text": text,
+    }
+
+
+# ---------------------------------------------------
+# 3. STREAMING ITINERARY PARSER
+# ---------------------------------------------------
+
+class ItineraryParser:
+    """
+    Chunks in, structured days out. Each day keeps the raw "day" header and
+    "description" text the frontend renders, plus:
+      title, morning, afternoon, evening,
+      hotel_recommendation, restaurant_suggestion, travel_tip
+    The closing budget summary stays at the end of the last day's
+    description and is also parsed into `summary` on close().
+    """
+
+    def __init__(self):
+        self._splitter = DayBlockSplitter()
+        self.summary = None
+
+    def _structure(self, day):
+        body, summary = split_summary(day["description"])
+        if summary:
+            self.summary = parse_summary(summary)
+        return {**day, **parse_day_fields(body)}
+
+    def feed(self, chunk: str):
+        """Add streamed text; return the structured days completed by it."""
+        return [self._structure(day) for day in self._splitter.feed(chunk)]
+
+    def close(self):
+        """End of stream: return the last day (if any); `summary` is set afterwards."""
+        return [self._structure(day) for day in self._splitter.close()]
+
+
+def parse_itinerary(text: str):
+    """Whole-output convenience: returns (days, summary)."""
+    parser = ItineraryParser()
+    days = parser.feed(text) + parser.close()
+    return days, parser.summary
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Parse a saved itinerary LLM output.")
+    arg_parser.add_argument("path", help="Markdown file with a raw model completion")
+    args = arg_parser.parse_args()
+
+    with open(args.path, encoding="utf-8") as f:
+        days, summary = parse_itinerary(f.read())
+
+    for day in days:
+        print(f"📅 {day['day']} {day['title'] or ''}")
+        for field in ("morning", "afternoon", "evening", "hotel_recommendation",
+                      "restaurant_suggestion", "travel_tip"):
+            print(f"   {field:<22} {day[field] or '—'}")
+    print(json.dumps({k: v for k, v in (summary or {}).items() if k != "text"}, indent=2))
@@ -1,7 +1,10 @@
 import os
 import re
 import json
+import calendar
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import time
 from dotenv import load_dotenv
 from huggingface_hub import InferenceClient
 
@@ -15,10 +18,62 @@ from app.agents.Itinerary_Data.Hotels import get_hotels
 # --- Import flight data helper ---
 from app.agents.Itinerary_Data.Flight import get_flights
 
+# --- Day-block parser (whole output or streamed) ---
+from app.agents.Itinerary_parser import ItineraryParser, parse_itinerary
+
+# --- Generated day plans, reused across requests ---
+from app.agents.Itinerary_cache import itinerary_cache, itinerary_features, itinerary_key
+from app.utils.single_flight import SingleFlight
+from app.utils.threads import submit_with_context
+from app.utils.logger import get_logger, log_fields
+from app.utils.metrics import stage, timed, observe_stage, count_event
+import logging
+
 # --- Load environment variables ---
 load_dotenv()
+logger = get_logger(__name__)
 HF_TOKEN = os.getenv("HF_TOKEN")
 
+# --- Per-source time budgets (seconds) for the concurrent data fetch
+LOCATION_TIMEOUT = float(os.getenv("LOCATION_TIMEOUT", "10"))
+HOTELS_TIMEOUT = float(os.getenv("HOTELS_TIMEOUT", "15"))
+FLIGHTS_TIMEOUT = float(os.getenv("FLIGHTS_TIMEOUT", "45"))
+
+# Flights payload embedded in itineraries: "summary" (what the UI renders) or "full"
+FLIGHTS_VIEW = os.getenv("ITINERARY_FLIGHTS_VIEW", "summary")
+
+# How each budget band is put to the model
+BUDGET_BAND_PROMPTS = {
+    "low": "low-cost (under about 100 per day)",
+    "mid": "mid-range (about 100-300 per day)",
+    "high": "luxury (over about 300 per day)",
+}
+
+# Concurrent requests for the same trip features share one Llama completion
+_llm_in_flight = SingleFlight("itinerary_llm")
+
+# Shared across requests: 3 fetches per itinerary
+_fetch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ITINERARY_FETCH_POOL_SIZE", "24")),
+    thread_name_prefix="itinerary-fetch"
+)
+
+
+def _price_value(price):
+    """'$1,234' / '666 USD' → 1234.0 / 666.0; None when there is no number."""
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", str(price or ""))
+    return float(match.group().replace(",", "")) if match else None
+
+
+def _parse_json(value, fallback):
+    """Helpers may hand back JSON strings; decode them (or fall back)."""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return fallback
+    return value
+
 
 class ItineraryAgent2:
     def __init__(self):
@@ -28,120 +83,183 @@ class ItineraryAgent2:
             token=HF_TOKEN
         )
 
-    
-
     # ======================================================
-    # 🧠 Generate AI-enhanced itinerary (with hotel info + images)
+    # 📡 Fetch location, hotels and flights in parallel
     # ======================================================
-    def generate_itinerary(self, destination, start_date, num_days, budget, departure_city, trip_type):
-        try:
-            # Convert start_date from string to datetime object if needed
-            if isinstance(start_date, str):
-                start_date = start_date.strip()
-            # --- Format travel dates
-            start = datetime.strptime(start_date, "%Y-%m-%d")
-            end = start + timedelta(days=int(num_days) - 1)
-            formatted_start = start.strftime("%d %b %Y")
-            formatted_end = end.strftime("%d %b %Y")
-
-            # --- Step 0: Fetch location data
-            print("🌍 Fetching location data...")
-            location = maps.get_location(destination)
-            if isinstance(location, str):
-                try:
-                    location = json.loads(location)
-                except:
-                    location = {}
-
+    def _submit_trip_data(self, destination, departure_city, start, end):
+        """Start the three independent lookups; returns {name: (timeout, fallback, future)}."""
+        log_fields(
+            logger, logging.INFO, "Fetching location, hotel and flight data",
+            departure_city=departure_city,
+            destination=destination,
+            start=start.strftime("%Y-%m-%d"),
+            end=end.strftime("%Y-%m-%d"),
+        )
 
-            # --- Step 1: Fetch hotel data
-            print("🏨 Fetching hotel data...")
-            hotels = get_hotels(destination, start_date, end.strftime("%Y-%m-%d"))
-            if isinstance(hotels, str):
-                try:
-                    hotels = json.loads(hotels)
-                except:
-                    hotels = []
-
-            # --- Step 2: Prepare hotel text summary for AI prompt
-            hotel_context = (
-                "\n".join([
-                    f"{i+1}. {h['name']} — {h['price_per_night']} per night — {h['hotel_class']}★"
-                    for i, h in enumerate(hotels[:5])
-                ])
-                if isinstance(hotels, list) else "No hotel data available."
+        return {
+            "location": (
+                LOCATION_TIMEOUT, {},
+                submit_with_context(_fetch_pool, maps.get_location, destination),
+            ),
+            "hotels": (
+                HOTELS_TIMEOUT, [],
+                submit_with_context(_fetch_pool, get_hotels, destination, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")),
+            ),
+            "flights": (
+                FLIGHTS_TIMEOUT, {"error": "Flight search timed out."},
+                submit_with_context(
+                    _fetch_pool,
+                    get_flights,
+                    departure_city,
+                    destination,
+                    start.strftime("%Y-%m-%d"),   # correct format for API
+                    end.strftime("%Y-%m-%d"),     # correct format
+                    view=FLIGHTS_VIEW
+                ),
+            ),
+        }
+
+    def _collect_trip_data(self, sources):
+        """
+        Yield (name, value, ok) for each source as soon as it finishes.
+        A source that fails or runs past its own timeout yields its empty
+        fallback with ok=False, so callers can carry on without it.
+        """
+        started = time.monotonic()
+        pending = dict(sources)
+
+        while pending:
+            now = time.monotonic()
+            for name, (timeout, fallback, future) in list(pending.items()):
+                if not future.done() and now - started >= timeout:
+                    logger.warning("%s not ready after %ss, continuing without it", name, timeout)
+                    count_event(f"{name}_timeout")
+                    future.cancel()
+                    del pending[name]
+                    yield name, fallback, False
+
+            if not pending:
+                break
+
+            next_deadline = min(started + timeout for timeout, _, _ in pending.values())
+            done, _ = wait(
+                [future for _, _, future in pending.values()],
+                timeout=max(0.0, next_deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED,
             )
 
-            # --- Step 3: Fetch flight data
-            print("🛫 Fetching flight data...")
-            print(departure_city, destination, formatted_start, formatted_end)
-            print("--------------------------------")
-            flights = get_flights(
-                departure_city,
-                destination,
-                start.strftime("%Y-%m-%d"),   # correct format for API
-                end.strftime("%Y-%m-%d")      # correct format
-                )
-
-            if isinstance(flights, str):
+            for name, (timeout, fallback, future) in list(pending.items()):
+                if future not in done:
+                    continue
+                del pending[name]
                 try:
-                    flights = json.loads(flights)
-                   
-                except:
-                    print("❌ Error fetching flights: {e}")
-                    flights = []
+                    yield name, _parse_json(future.result(), fallback), True
+                except Exception as e:
+                    logger.error("Error fetching %s: %s", name, e)
+                    count_event(f"{name}_error")
+                    yield name, fallback, False
+
+    def _fetch_trip_data(self, destination, departure_city, start, end, progress=None):
+        """
+        Run the three lookups concurrently, each with its own timeout.
+        Returns (location, hotels, flights, missing_sources).
+        """
+        results = {}
+        missing_sources = []
+        sources = self._submit_trip_data(destination, departure_city, start, end)
+
+        for name, value, ok in self._collect_trip_data(sources):
+            results[name] = value
+            if not ok:
+                missing_sources.append(name)
+            if progress:
+                progress("fetching", source=name, ok=ok, fetched=len(results), sources=len(sources))
+
+        return results["location"], results["hotels"], results["flights"], missing_sources
 
+    # ======================================================
+    # ✏️ Prompt + response helpers
+    # ======================================================
+    def _first_flight(self, flights):
+        """Compact details of the first (cheapest) summary flight, or None."""
+        first_flight = None
 
-            # ================================
-            # ✨ GET ONLY THE FIRST FLIGHT
-            # ================================
-            first_flight = None
-
-            try:
-                summary_flights = flights.get("summary", {}).get("flights", [])
-
-                if summary_flights:
-                    f = summary_flights[0]   # 👉 ONLY FIRST FLIGHT
-
-                    departure_airport = f["legs"][0]["departure"]
-                    arrival_airport = f["legs"][-1]["arrival"]
-
-                    duration_min = f.get("total_duration_min")
-                    price = f.get("price")
+        try:
+            summary_flights = flights.get("summary", {}).get("flights", [])
 
-                    airlines = list({leg["airline"] for leg in f["legs"]})
+            if summary_flights:
+                f = summary_flights[0]   # 👉 ONLY FIRST FLIGHT
 
-                    first_flight = {
-                        "departure_airport": departure_airport,
-                        "arrival_airport": arrival_airport,
-                        "duration_min": duration_min,
-                        "cheapest_price": price,
-                        "airlines": airlines
-                    }
+                departure_airport = f["legs"][0]["departure"]
+                arrival_airport = f["legs"][-1]["arrival"]
 
-            except Exception as e:
-                print("⚠️ Error extracting first flight:", e)
+                duration_min = f.get("total_duration_min")
+                price = f.get("price")
 
-            print("🎯 First flight extracted:")
-            print(first_flight)
+                airlines = list({leg["airline"] for leg in f["legs"]})
 
+                first_flight = {
+                    "departure_airport": departure_airport,
+                    "arrival_airport": arrival_airport,
+                    "duration_min": duration_min,
+                    "cheapest_price": price,
+                    "airlines": airlines
+                }
 
-            # --- Step 4: Create structured prompt for AI
-            prompt = f"""
+        except Exception as e:
+            logger.warning("Error extracting first flight: %s", e)
+
+        logger.debug("First flight extracted: %s", first_flight)
+        return first_flight
+
+    def _hotels_payload(self, hotels):
+        return [
+            {
+                "name": h.get("name"),
+                "description": h.get("description"),
+                "price_per_night": h.get("price_per_night"),
+                "hotel_class": h.get("hotel_class"),
+                "link": h.get("link"),
+                "images": h.get("images", [])[:3]  # Limit 3 images per hotel
+            }
+            for h in (hotels[:4] if isinstance(hotels, list) else [])
+        ]
+
+    def _with_live_costs(self, summary, hotels, flights, num_days):
+        """
+        The (possibly cached) summary with a total cost worked out from this
+        request's own hotel and flight prices; None when either is missing.
+        """
+        if not summary:
+            return summary
+        nights = max(int(num_days) - 1, 1)
+        hotel_prices = [
+            price for price in (
+                _price_value(h.get("price_per_night")) for h in (hotels if isinstance(hotels, list) else [])
+            )
+            if price is not None
+        ]
+        flight_price = _price_value((self._first_flight(flights) or {}).get("cheapest_price"))
+
+        total_cost = None
+        if hotel_prices and flight_price is not None:
+            total = min(hotel_prices) * nights + flight_price
+            total_cost = f"{total:,.0f} USD (cheapest hotel for {nights} nights + cheapest flight)"
+        return {**summary, "total_cost": total_cost}
+
+    def _build_prompt(self, features):
+        """
+        Prompt for the cacheable day plans: built from the cache-key features
+        only, never from who asked (departure city) or live hotels/flights.
+        """
+        month = calendar.month_name[int(features["month"])] if features["month"] else "Not specified"
+        return f"""
 You are an AI travel planner.
 
-Generate a **{num_days}-day itinerary** for {destination}.
-Trip Type: {trip_type}
-Budget: {budget}
-Departure City: {departure_city or 'Not specified'}
-Dates: {formatted_start} to {formatted_end}
-
-Top hotel options:
-{hotel_context}
-
-This is the cheapest flight details:
-First flight details:
-{first_flight}
+Generate a **{features["num_days"]}-day itinerary** for {features["destination"].title()}.
+Trip Type: {features["trip_type"] or 'Not specified'}
+Budget: {BUDGET_BAND_PROMPTS[features["budget"]]}
+Travel month: {month}
 
 ⚠️ STRICT FORMAT INSTRUCTIONS:
 Each day MUST begin with a markdown header in this format:
@@ -152,45 +270,94 @@ Follow this exact pattern for each day must follow strictly this format:
 - Morning: ...
 - Afternoon: ...
 - Evening: ...
-Hotel Recommendation: ...
+Hotel Recommendation: ... (the area to stay in, no specific hotel names)
 Restaurant Suggestion: ...
 Travel Tip: ...
 
-Repeat for all {num_days} days.
+Repeat for all {features["num_days"]} days.
 Do NOT merge all days into one section.
 
 And at last give me a summary of the itinerary With the following information:
 -Budget Breakdown: In percentage for each
--Total cost of the trip
 -Note
 
+Do not quote hotel or flight prices or a total cost; live prices are added separately.
+
 """
 
-            # --- Step 4: Call Llama 3 API
-            response = self.client.chat.completions.create(
-                model="meta-llama/Meta-Llama-3-8B-Instruct",
-                messages=[
-                    {"role": "system", "content": "You are a helpful and structured travel itinerary planner."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1800
-            )
-            ai_output = response.choices[0].message["content"].strip()
+    def _completion_tokens(self, response, text):
+        """Tokens the completion cost (reported usage, else ~4 chars per token)."""
+        usage = getattr(response, "usage", None)
+        tokens = getattr(usage, "completion_tokens", None) if usage is not None else None
+        return int(tokens) if tokens else len(text) // 4
+
+    def _generate_days(self, cache_key, prompt):
+        """One Llama completion → (days, summary), stored in the itinerary cache."""
+        with stage("itinerary.llm"):
+            response = self.client.chat.completions.create(**self._llm_request(prompt))
+        ai_output = response.choices[0].message["content"].strip()
+
+        # Parse day blocks + closing budget summary in one pass
+        with stage("itinerary.parse"):
+            days_output, summary = parse_itinerary(ai_output)
+        itinerary_cache.set(cache_key, days_output, summary, self._completion_tokens(response, ai_output))
+        return days_output, summary
+
+    def _llm_request(self, prompt):
+        return dict(
+            model="meta-llama/Meta-Llama-3-8B-Instruct",
+            messages=[
+                {"role": "system", "content": "You are a helpful and structured travel itinerary planner."},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1800
+        )
+
+    # ======================================================
+    # 🧠 Generate AI-enhanced itinerary (with hotel info + images)
+    # ======================================================
+    @timed("itinerary")
+    def generate_itinerary(self, destination, start_date, num_days, budget, departure_city, trip_type,
+                           progress=None):
+        """
+        Full itinerary in one call. `progress(stage, **details)`, when given,
+        is told as each data source lands and when the LLM starts (jobs use
+        it to report how far a queued itinerary has got).
+        """
+        try:
+            # Convert start_date from string to datetime object if needed
+            if isinstance(start_date, str):
+                start_date = start_date.strip()
+            # --- Format travel dates
+            start = datetime.strptime(start_date, "%Y-%m-%d")
+            end = start + timedelta(days=int(num_days) - 1)
+            formatted_start = start.strftime("%d %b %Y")
+            formatted_end = end.strftime("%d %b %Y")
 
-            # --- Step 5: Split days robustly (handles multiple markdown formats)
-            day_blocks = re.split(r"(?:##\s*Day\s*\d+:|Day\s*\d+:|\*\*Day\s*\d+:)", ai_output)
-            headers = re.findall(r"(?:##\s*Day\s*\d+:|Day\s*\d+:|\*\*Day\s*\d+:)", ai_output)
+            # --- Steps 0, 1, 3: Fetch location, hotel and flight data concurrently
+            with stage("itinerary.fetch"):
+                location, hotels, flights, missing_sources = self._fetch_trip_data(
+                    destination, departure_city, start, end, progress
+                )
 
-            days_output = []
-            for i, block in enumerate(day_blocks[1:]):  # Skip text before Day 1
-                title = headers[i].replace("**", "").strip()
-                days_output.append({
-                    "day": title,
-                    "description": block.strip()
-                })
+            # --- Same trip features generated recently → reuse the day plans
+            features = itinerary_features(destination, num_days, trip_type, budget, start.strftime("%Y-%m-%d"))
+            cache_key = itinerary_key(features)
+            cached = itinerary_cache.get(cache_key)
 
-            
+            if cached:
+                logger.info("Reusing cached day plans: %s", cache_key)
+                days_output, summary = cached["days"], cached["summary"]
+            else:
+                if progress:
+                    progress("generating")
 
+                # --- Steps 4-5: Call Llama 3 API (shared with identical in-flight requests)
+                prompt = self._build_prompt(features)
+                days_output, summary = _llm_in_flight.do(cache_key, self._generate_days, cache_key, prompt)
+
+            # --- This request's own prices, attached after the cache step
+            summary = self._with_live_costs(summary, hotels, flights, num_days)
 
             # --- Step 6: Build clean structured response
             return {
@@ -199,24 +366,144 @@ And at last give me a summary of the itinerary With the following information:
                 "trip_type": trip_type,
                 "budget": budget,
                 "dates": f"{formatted_start} - {formatted_end}",
-                "hotels": [
-                    {
-                        "name": h.get("name"),
-                        "description": h.get("description"),
-                        "price_per_night": h.get("price_per_night"),
-                        "hotel_class": h.get("hotel_class"),
-                        "link": h.get("link"),
-                        "images": h.get("images", [])[:3]  # Limit 3 images per hotel
-                    }
-                    for h in (hotels[:4] if isinstance(hotels, list) else [])
-                ],
+                "hotels": self._hotels_payload(hotels),
                 "days": days_output,
+                "summary": summary,
                 "location": location,
-                "flights": flights
+                "flights": flights,
+                **({"missing_sources": missing_sources} if missing_sources else {}),
+                **({"cached": True} if cached else {})
             }
 
         except Exception as e:
             return {"error": str(e)}
 
+    # ======================================================
+    # 📺 Streaming variant (server-sent events)
+    # ======================================================
+    def stream_itinerary(self, destination, start_date, num_days, budget, departure_city, trip_type):
+        """
+        Same itinerary as generate_itinerary, produced as a stream of
+        (event, data) pairs:
+          meta → location / hotels / flights (as each arrives) → day (one per
+          "## Day X:" block, as soon as the next header closes it) → summary
+          (when the model wrote one) → done
+        Cached day plans are sent straight after meta, before the live data;
+        the summary waits for hotels and flights (its total cost is live).
+        An "error" event ends the stream early.
+        """
+        try:
+            if isinstance(start_date, str):
+                start_date = start_date.strip()
+            start = datetime.strptime(start_date, "%Y-%m-%d")
+            end = start + timedelta(days=int(num_days) - 1)
+            formatted_start = start.strftime("%d %b %Y")
+            formatted_end = end.strftime("%d %b %Y")
 
+            yield "meta", {
+                "destination": destination,
+                "departure_city": departure_city,
+                "trip_type": trip_type,
+                "budget": budget,
+                "dates": f"{formatted_start} - {formatted_end}",
+            }
+
+            sources = self._submit_trip_data(destination, departure_city, start, end)
+
+            # --- Cached day plans don't wait for live data: send them first
+            features = itinerary_features(destination, num_days, trip_type, budget, start.strftime("%Y-%m-%d"))
+            cache_key = itinerary_key(features)
+            cached = itinerary_cache.get(cache_key)
+
+            if cached:
+                days = len(cached["days"])
+                for day in cached["days"]:
+                    yield "day", day
+
+            # --- Data sources, streamed in completion order
+            results = {}
+            missing_sources = []
+            for name, value, ok in self._collect_trip_data(sources):
+                results[name] = value
+                if not ok:
+                    missing_sources.append(name)
+                yield name, self._hotels_payload(value) if name == "hotels" else value
+
+            def live_summary(summary):
+                return self._with_live_costs(summary, results["hotels"], results["flights"], num_days)
+
+            if cached:
+                if cached["summary"]:
+                    yield "summary", live_summary(cached["summary"])
+            else:
+                call, leader = _llm_in_flight.begin(cache_key)
+                if leader:
+                    try:
+                        streamed_days, summary = [], None
+                        for event, data in self._stream_days(cache_key, features):
+                            if event == "day":
+                                streamed_days.append(data)
+                            else:
+                                summary = data
+                                data = live_summary(data)
+                            yield event, data
+                    except BaseException as e:
+                        # Client gone (GeneratorExit) → waiting requests get a plain error
+                        if not isinstance(e, Exception):
+                            e = RuntimeError("Itinerary generation was cancelled.")
+                        _llm_in_flight.finish(cache_key, call, error=e)
+                        raise
+                    _llm_in_flight.finish(cache_key, call, result=(streamed_days, summary))
+                else:
+                    # Same trip already being generated for someone else
+                    streamed_days, summary = call.wait()
+                    for day in streamed_days:
+                        yield "day", day
+                    if summary:
+                        yield "summary", live_summary(summary)
+
+                days = len(streamed_days)
+
+            yield "done", {
+                "days": days,
+                **({"missing_sources": missing_sources} if missing_sources else {}),
+                **({"cached": True} if cached else {})
+            }
 
+        except Exception as e:
+            yield "error", {"error": str(e)}
+
+    def _stream_days(self, cache_key, features):
+        """Streamed Llama completion → ("day", day)… then ("summary", summary) if any."""
+        prompt = self._build_prompt(features)
+
+        # --- Llama 3, token stream → day blocks
+        # (timed by hand: a stage() would also count the time spent sending each day)
+        parser = ItineraryParser()
+        streamed_days = []
+        characters = 0
+        started = time.perf_counter()
+        generating = 0.0
+        for chunk in self.client.chat.completions.create(**self._llm_request(prompt), stream=True):
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content or ""
+            characters += len(text)
+            for day in parser.feed(text):
+                if not streamed_days:
+                    observe_stage("itinerary.llm_first_day", time.perf_counter() - started)
+                streamed_days.append(day)
+                generating += time.perf_counter() - started
+                yield "day", day
+                started = time.perf_counter()
+
+        observe_stage("itinerary.llm_stream", generating + time.perf_counter() - started)
+
+        for day in parser.close():
+            streamed_days.append(day)
+            yield "day", day
+
+        if parser.summary:
+            yield "summary", parser.summary
+
+        itinerary_cache.set(cache_key, streamed_days, parser.summary, characters // 4)
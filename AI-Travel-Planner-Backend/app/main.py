@@ -1,9 +1,27 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from app.router import chatbot
 from fastapi.middleware.cors import CORSMiddleware
 from app.router import test
+from app.utils import http_client
+from app.utils.responses import FastJSONResponse
+from app.utils.compression import CompressionMiddleware
+from app.utils.etag import ETagMiddleware
+from app.utils.logger import configure_logging, RequestIdMiddleware
+from app.utils import metrics
+from app.agents.Itinerary_Data.Serp_cache import serp_cache
+from app.agents.Itinerary_cache import itinerary_cache
+from app.agents.Itinerary_Data.Route_index import route_index
+from app.agents.Itinerary_Data.Serp_quota import serp_scheduler
+from app.agents.Itinerary_Data.Cache_warmer import cache_warmer
+from app.utils.single_flight import single_flight_stats
 
-app = FastAPI(title="AI Travel Planner")
+# Queue-backed structured logs (LOG_LEVEL / LOG_FORMAT), before anything logs
+configure_logging()
+
+# Stage spans over OTLP when OTEL_EXPORTER_OTLP_ENDPOINT is set
+metrics.configure_tracing()
+
+app = FastAPI(title="AI Travel Planner", default_response_class=FastJSONResponse)
 
 
 # ✅ Allow CORS for your frontend
@@ -21,9 +39,62 @@ app.add_middleware(
     allow_headers=["*"],           # allow all headers
 )
 
+# ETags on GET bodies, then gzip/brotli on the way out (added last = runs outermost)
+app.add_middleware(ETagMiddleware)
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency histograms for /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Outermost: X-Request-ID on every log line and response, plus one access log line
+app.add_middleware(RequestIdMiddleware)
+
 app.include_router(chatbot.router, prefix="/api", tags=["Chatbot"])
 app.include_router(test.router, prefix="/api", tags=["Test"])
 
+@app.on_event("startup")
+def start_itinerary_jobs():
+    # Background itinerary workers (also resumes jobs queued before a restart)
+    chatbot.itinerary_jobs.start()
+
+@app.on_event("shutdown")
+def stop_itinerary_jobs():
+    chatbot.itinerary_jobs.stop()
+
+@app.on_event("startup")
+def start_cache_warmer():
+    # Popular trips refreshed ahead of expiry in the background (CACHE_WARMER=1)
+    if cache_warmer is not None:
+        cache_warmer.start()
+
+@app.on_event("shutdown")
+def stop_cache_warmer():
+    if cache_warmer is not None:
+        cache_warmer.stop()
+
+@app.on_event("shutdown")
+def close_http_client():
+    # Drop the pooled upstream connections cleanly
+    http_client.close()
+
+# Cache and single-flight counters, alongside the stage histograms
+metrics.register_stats("serp_cache", serp_cache.stats, label="engine")
+metrics.register_stats("itinerary_cache", itinerary_cache.stats)
+metrics.register_stats("single_flight", single_flight_stats, label="group")
+metrics.register_stats("itinerary_jobs", chatbot.itinerary_jobs.stats)
+if route_index is not None:
+    metrics.register_stats("route_index", route_index.stats)
+if serp_scheduler is not None:
+    metrics.register_stats("serp_quota", serp_scheduler.stats, label="engine")
+if cache_warmer is not None:
+    metrics.register_stats("cache_warmer", cache_warmer.stats)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = metrics.render_metrics()
+    return Response(body, media_type=content_type)
+
 @app.get("/")
 def home():
     return {"message": "AI Travel Planner Backend running ✅"}
@@ -1,38 +1,44 @@
 from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+import asyncio
 import re
 from datetime import datetime, date, timedelta
 import pytz
 
 from app.agents.itinerary_agent2 import ItineraryAgent2
+from app.agents.Itinerary_jobs import JobQueue, QueueFull, FINISHED
+from app.agents.Itinerary_Data.Cache_warmer import cache_warmer
+from app.utils.threads import run_blocking, iterate_blocking
+from app.utils.sse import format_sse
+from app.utils.responses import FastJSONResponse
+from app.utils.logger import get_logger, log_fields, log_payload
+import logging
 
 router = APIRouter()
+logger = get_logger(__name__)
 itinerary_agent2 = ItineraryAgent2()
 
-@router.post("/generate_itinerary")
-async def generate_itinerary2(request: Request):
-    data = await request.json()
-    print(data)
-    print("--------------------------------")
-    print("--------------------------------")
-    print(data.get("destination"))
-    print("--------------------------------")
-    print(data.get("start_date"))
-    print("--------------------------------")
-    print(data.get("num_days"))
-    print("--------------------------------")
-    print(data.get("budget"))
-    print("--------------------------------")
-    print(data.get("departure_city"))
-    print("--------------------------------")
-    print(data.get("trip_type"))
-    print("--------------------------------")
+
+def _run_itinerary_job(params, progress):
+    return itinerary_agent2.generate_itinerary(**params, progress=progress)
+
+
+# Background itinerary generation behind /itinerary_jobs (workers start with the app)
+itinerary_jobs = JobQueue(_run_itinerary_job)
+
+# How often an /events stream re-reads its job, and sends a keep-alive when idle
+JOB_EVENTS_POLL_SECONDS = 0.5
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+
+def _clean_itinerary_request(data):
+    """Pull the itinerary inputs out of a request body and normalize num_days / start_date."""
+    log_payload(logger, "Itinerary request", data)
     destination = data.get("destination")
     start_date = data.get("start_date")
     num_days = data.get("num_days")
     budget = data.get("budget")
     departure_city = data.get("departure_city")
     trip_type = data.get("trip_type")
-    """Generate full itinerary once details are collected."""
 
     # Dallas timezone
     dallas_tz = pytz.timezone("America/Chicago")
@@ -40,11 +46,15 @@ async def generate_itinerary2(request: Request):
     # Current time in Dallas
     dallas_now = datetime.now(dallas_tz)
 
-    print("Current Dallas time:", dallas_now.strftime("%Y-%m-%d %H:%M:%S %Z"))
-
-    print(
-        "🧭 Itinerary Inputs:",
-        destination, start_date, num_days, budget, departure_city, trip_type
+    log_fields(
+        logger, logging.INFO, "Itinerary inputs",
+        dallas_time=dallas_now.strftime("%Y-%m-%d %H:%M:%S %Z"),
+        destination=destination,
+        start_date=start_date,
+        num_days=num_days,
+        budget=budget,
+        departure_city=departure_city,
+        trip_type=trip_type,
     )
 
     # Clean up num_days to extract just the number
@@ -74,7 +84,7 @@ async def generate_itinerary2(request: Request):
                     # Add 5 days buffer to the specified number of days
                     future_date = date.today() + timedelta(days=days_from_now + 5)
                     start_date = future_date.strftime("%Y-%m-%d")
-                    print(f"📅 Parsed '{data.get('start_date')}' as {days_from_now} days + 5 buffer = {start_date}")
+                    logger.info("Parsed %r as %d days + 5 buffer = %s", data.get("start_date"), days_from_now, start_date)
                 else:
                     # Common date formats to try
                     date_formats = [
@@ -102,25 +112,59 @@ async def generate_itinerary2(request: Request):
                         # Last chance: use future dates in ISO format (5 days from today)
                         fallback_date = date.today() + timedelta(days=5)
                         start_date = fallback_date.isoformat()  # ISO format YYYY-MM-DD
-                        print(f"⚠️ Could not parse date '{data.get('start_date')}', using future ISO date: {start_date}")
+                        logger.warning("Could not parse date %r, using future ISO date: %s", data.get("start_date"), start_date)
                     
             except Exception as e:
                 # Final fallback: use future dates in ISO format (5 days from today)
                
                 fallback_date = date.today() + timedelta(days=5)
                 start_date = fallback_date.isoformat()  # ISO format YYYY-MM-DD
-                print(f"⚠️ Date parsing error: {e}, using future ISO date: {start_date}")
+                logger.warning("Date parsing error: %s, using future ISO date: %s", e, start_date)
     else:
         # If start_date is not a string, use future ISO format as last resort
         
         fallback_date = date.today() + timedelta(days=5)
         start_date = fallback_date.isoformat()
-        print(f"⚠️ start_date was not a string, using future ISO date: {start_date}")
+        logger.warning("start_date was not a string, using future ISO date: %s", start_date)
 
-        
-    print("--------------------------------")
+    # Trips asked for repeatedly are kept warm in the caches
+    if cache_warmer is not None:
+        cache_warmer.record(destination, departure_city, start_date, num_days)
+
+    return destination, start_date, num_days, budget, departure_city, trip_type
+
+
+@router.post("/generate_itinerary")
+async def generate_itinerary2(request: Request):
+    """Generate full itinerary once details are collected."""
+    data = await request.json()
+    destination, start_date, num_days, budget, departure_city, trip_type = _clean_itinerary_request(data)
+
+    itinerary = await run_blocking(
+        itinerary_agent2.generate_itinerary,
+        destination,
+        start_date,
+        num_days,
+        budget,
+        departure_city,
+        trip_type
+    )
+
+    # Returned as a response object: serialized once by orjson, no jsonable_encoder pass
+    return FastJSONResponse({"itinerary": itinerary})
+
+
+@router.post("/generate_itinerary/stream")
+async def stream_itinerary(request: Request):
+    """
+    Same inputs as /generate_itinerary, answered as server-sent events:
+    meta, location, hotels, flights, one "day" event per day, then done
+    (or error). The first bytes go out before the LLM has started.
+    """
+    data = await request.json()
+    destination, start_date, num_days, budget, departure_city, trip_type = _clean_itinerary_request(data)
 
-    itinerary = itinerary_agent2.generate_itinerary(
+    events = itinerary_agent2.stream_itinerary(
         destination,
         start_date,
         num_days,
@@ -129,4 +173,107 @@ async def generate_itinerary2(request: Request):
         trip_type
     )
 
-    return {"itinerary": itinerary}
+    async def body():
+        async for event, payload in iterate_blocking(events):
+            yield format_sse(event, payload)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------------------------------------------------
+# ITINERARY JOBS: submit, then poll or subscribe
+# ---------------------------------------------------
+
+def _job_not_found(job_id):
+    return FastJSONResponse({"error": f"Job {job_id} not found (it may have expired)."}, status_code=404)
+
+
+@router.post("/itinerary_jobs", status_code=202)
+async def submit_itinerary_job(request: Request):
+    """
+    Same inputs as /generate_itinerary, but answered at once with a job ID.
+    Poll GET /itinerary_jobs/{job_id} (or stream /events) for progress and
+    the itinerary.
+    """
+    data = await request.json()
+    destination, start_date, num_days, budget, departure_city, trip_type = _clean_itinerary_request(data)
+    params = {
+        "destination": destination,
+        "start_date": start_date,
+        "num_days": num_days,
+        "budget": budget,
+        "departure_city": departure_city,
+        "trip_type": trip_type,
+    }
+
+    try:
+        job = await run_blocking(itinerary_jobs.submit, params)
+    except QueueFull as e:
+        return FastJSONResponse(
+            {"error": f"Too many itineraries in progress ({e}), try again shortly."},
+            status_code=503,
+            headers={"Retry-After": "30"},
+        )
+
+    poll_url = f"{request.url.path}/{job['job_id']}"
+    return FastJSONResponse(
+        {**job, "poll_url": poll_url, "events_url": f"{poll_url}/events"},
+        status_code=202,
+        headers={"Location": poll_url},
+    )
+
+
+@router.get("/itinerary_jobs/{job_id}")
+async def get_itinerary_job(job_id: str):
+    """Status, progress and (once done) the itinerary of a submitted job."""
+    job = await run_blocking(itinerary_jobs.get, job_id)
+    if job is None:
+        return _job_not_found(job_id)
+    return FastJSONResponse(job)
+
+
+@router.get("/itinerary_jobs/{job_id}/events")
+async def itinerary_job_events(job_id: str):
+    """
+    Server-sent events for a job: "status" whenever its status or progress
+    changes, then "done" with the itinerary (or "error"), then the stream ends.
+    """
+    job = await run_blocking(itinerary_jobs.get, job_id)
+    if job is None:
+        return _job_not_found(job_id)
+
+    async def body():
+        loop = asyncio.get_running_loop()
+        current, version, last_sent = job, None, loop.time()
+        while True:
+            if current is None:
+                yield format_sse("error", {"error": f"Job {job_id} expired."})
+                return
+            if current["version"] != version:
+                version = current["version"]
+                if current["status"] in FINISHED:
+                    event = "done" if "itinerary" in current else "error"
+                    yield format_sse(event, current)
+                    return
+                yield format_sse("status", {
+                    "job_id": job_id,
+                    "status": current["status"],
+                    "progress": current["progress"],
+                })
+                last_sent = loop.time()
+            elif loop.time() - last_sent >= JOB_EVENTS_KEEPALIVE_SECONDS:
+                # Comment line: keeps proxies from timing out an idle stream
+                yield ": waiting\n\n"
+                last_sent = loop.time()
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+            current = await run_blocking(itinerary_jobs.get, job_id)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,36 +1,111 @@
 from fastapi import APIRouter
-from app.agents.Itinerary_Data.Flight import get_flights
+from app.agents.Itinerary_Data.Flight import get_flights, get_price_calendar
 from app.agents.Itinerary_Data.Airport_helper import resolve_airport_code
+from app.agents.Itinerary_Data.Serp_cache import serp_cache
+from app.agents.Itinerary_cache import itinerary_cache
+from app.agents.Itinerary_Data.Route_index import route_index
+from app.agents.Itinerary_Data.Serp_quota import serp_scheduler
+from app.agents.Itinerary_Data.Cache_warmer import cache_warmer
+from app.utils.threads import run_blocking
+from app.utils.single_flight import single_flight_stats
+from app.utils.responses import FastJSONResponse
+from app.utils.logger import get_logger, log_payload
 from fastapi import Request
 import os
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 
 @router.post("/airports")
 async def get_airports(request: Request):
     data = await request.json() 
     search = data.get("search")
-    result = resolve_airport_code(search)
+    result = await run_blocking(resolve_airport_code, search)
     return result
 
 @router.post("/flight")
 async def get_flight(request: Request):
     data = await request.json()
-    print("------------------Flight Request--------------")
-    print(data)
-    print("------------------Flight Request--------------")
+    log_payload(logger, "Flight request", data)
     departure_id = data.get("departure_id")
     arrival_id = data.get("arrival_id")
     outbound_date = data.get("outbound_date")
     return_date = data.get("return_date")
     currency = data.get("currency")
-   
-    result = get_flights(departure_id, arrival_id, outbound_date, return_date, currency)
-    print("------------------Flight Result--------------")
-    print(result)
-    print("------------------Flight Result--------------")
-    return result
+    view = data.get("view", "full")      # "full" | "summary"
+    fields = data.get("fields")          # e.g. ["summary", "coordinates"] or "summary,coordinates"
+
+    result = await run_blocking(
+        get_flights, departure_id, arrival_id, outbound_date, return_date, currency,
+        view=view, fields=fields
+    )
+    log_payload(logger, "Flight result", result)
+    return FastJSONResponse(result)
+
+
+@router.post("/flight/calendar")
+async def get_flight_calendar(request: Request):
+    """
+    Flexible dates: lowest price per outbound/return date combination.
+    Body: departure_id, arrival_id, outbound_from, outbound_to, and either
+    return_from/return_to or min_nights/max_nights; currency optional.
+    """
+    data = await request.json()
+    log_payload(logger, "Flight calendar request", data)
+
+    result = await run_blocking(
+        get_price_calendar,
+        data.get("departure_id"),
+        data.get("arrival_id"),
+        data.get("outbound_from"),
+        data.get("outbound_to"),
+        return_from=data.get("return_from"),
+        return_to=data.get("return_to"),
+        min_nights=data.get("min_nights", 1),
+        max_nights=data.get("max_nights"),
+        currency=data.get("currency"),
+    )
+    return FastJSONResponse(result)
+
+
+@router.get("/serp_cache")
+async def get_serp_cache_stats():
+    """Hit/miss counters for the shared SerpAPI response cache."""
+    return serp_cache.stats()
+
+
+@router.get("/itinerary_cache")
+async def get_itinerary_cache_stats():
+    """Hit/miss counters and LLM tokens saved by the generated-itinerary cache."""
+    return itinerary_cache.stats()
+
+
+@router.get("/single_flight")
+async def get_single_flight_stats():
+    """Upstream calls made vs. shared between identical concurrent requests."""
+    return single_flight_stats()
+
+
+@router.get("/route_index")
+async def get_route_index_stats():
+    """Airport pairs known to have flights / to be empty, and pairs pushed back for being empty."""
+    if route_index is None:
+        return {"enabled": False}
+    return await run_blocking(route_index.stats)
+
+
+@router.get("/serp_quota")
+async def get_serp_quota_stats():
+    """SerpAPI searches used / left this period, and per-engine rate-limit queues."""
+    if serp_scheduler is None:
+        return {"enabled": False}
+    return await run_blocking(serp_scheduler.stats)
 
 
-   
\ No newline at end of file
+@router.get("/cache_warmer")
+async def get_cache_warmer_stats():
+    """Warming passes so far, searches they spent, and the last pass."""
+    if cache_warmer is None:
+        return {"enabled": False}
+    return await run_blocking(cache_warmer.stats)
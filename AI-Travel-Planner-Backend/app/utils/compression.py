@@ -0,0 +1,56 @@
+# compression.py
+import os
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, IdentityResponder
+
+try:
+    import brotli
+except ImportError:     # optional: pip install brotli
+    brotli = None
+
+# ---------------------------------------------------
+# RESPONSE COMPRESSION
+# ---------------------------------------------------
+# Bodies above COMPRESSION_MIN_BYTES are compressed: brotli when the client
+# accepts it and the `brotli` package is installed, gzip otherwise.
+# Event streams are left alone (see starlette's excluded content types).
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size, quality=BROTLI_QUALITY, **kwargs):
+        super().__init__(app, minimum_size, **kwargs)
+        self.quality = quality
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        data = self._compressor.process(body)
+        return data + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_BYTES, compresslevel=GZIP_LEVEL, quality=BROTLI_QUALITY):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.quality = quality
+
+    async def __call__(self, scope, receive, send):
+        if brotli is not None and scope["type"] == "http":
+            accepted = Headers(scope=scope).get("Accept-Encoding", "")
+            if "br" in [part.split(";")[0].strip() for part in accepted.split(",")]:
+                responder = BrotliResponder(
+                    self.app,
+                    self.minimum_size,
+                    quality=self.quality,
+                    exclude_content_types=self.exclude_content_types,
+                )
+                await responder(scope, receive, send)
+                return
+
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,84 @@
+# etag.py
+import hashlib
+from starlette.datastructures import Headers, MutableHeaders
+
+# ---------------------------------------------------
+# ETAGS FOR GET RESPONSES
+# ---------------------------------------------------
+# Every complete (non-streamed) 200 answer to a GET gets a content-hash
+# ETag. A client that sends it back in If-None-Match gets an empty 304
+# instead of the same body again. Runs inside compression, so the tag
+# describes the uncompressed representation.
+
+
+def make_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: W/"x" and "x" are the same representation
+    return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
+
+class ETagMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("If-None-Match")
+        start = None
+        passthrough = False
+
+        async def send_with_etag(message):
+            nonlocal start, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                cacheable = (
+                    message["status"] == 200
+                    and "etag" not in headers
+                    and "no-store" not in headers.get("cache-control", "")
+                    and not headers.get("content-type", "").startswith("text/event-stream")
+                )
+                if cacheable:
+                    start = message         # held until the body is known
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if message.get("more_body", False):
+                # Streamed body: no tag, send as-is
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            etag = make_etag(body)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["ETag"] = etag
+            if "cache-control" not in headers:
+                headers["Cache-Control"] = "no-cache"     # may store, must revalidate
+
+            if _matches(if_none_match, etag):
+                del headers["Content-Length"]
+                await send({"type": "http.response.start", "status": 304, "headers": start["headers"]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
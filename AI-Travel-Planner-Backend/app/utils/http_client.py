@@ -0,0 +1,125 @@
+# http_client.py
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+import threading
+import random
+import time
+import os
+import httpx
+
+load_dotenv()
+
+# ---------------------------------------------------
+# SHARED OUTBOUND HTTP CLIENT
+# ---------------------------------------------------
+# One pooled httpx.Client for every upstream the data helpers talk to
+# (SerpAPI, the airports dataset). Connections are kept alive and reused,
+# so only the first call to a host pays DNS + TCP + TLS. HTTP/2 is used
+# when the optional `h2` package is installed (pip install "httpx[http2]").
+# Each host gets its own concurrency cap, and transient failures are
+# retried with jittered exponential backoff. Upstreams that bill every
+# request they receive (SerpAPI) pass retry_sent=False: only requests that
+# never reached the server (connect errors) are retried there.
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "16"))      # requests in flight per host
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))                 # extra attempts after the first
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "4"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Failures where the request was never sent, so retrying cannot double-bill
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP2_ENABLED = HTTP2_AVAILABLE and os.getenv("HTTP2", "1") != "0"
+
+_client = None
+_client_lock = threading.Lock()
+_host_limits = {}
+_host_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide pooled client (created on first use)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    http2=HTTP2_ENABLED,
+                    timeout=HTTP_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                        keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+                    ),
+                    follow_redirects=True,
+                )
+    return _client
+
+
+def _host_limit(url):
+    host = urlsplit(url).netloc
+    with _host_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(HTTP_MAX_PER_HOST)
+        return _host_limits[host]
+
+
+def _backoff(attempt, response=None):
+    """Seconds to wait before retry `attempt` (1-based): Retry-After, else full jitter."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), HTTP_BACKOFF_MAX)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+def request(method, url, retries=None, retry_sent=True, **kwargs):
+    """
+    Send a request on the shared client; returns the httpx.Response.
+    Connection errors, timeouts and 429/5xx answers are retried; the last
+    response (whatever its status) is returned, the last transport error
+    is raised. With retry_sent=False only connect errors are retried: a
+    request the server may have received (and billed) is never sent again.
+    """
+    retries = HTTP_RETRIES if retries is None else retries
+    retryable = httpx.TransportError if retry_sent else UNSENT_ERRORS
+    limit = _host_limit(url)
+
+    for attempt in range(retries + 1):
+        response = None
+        try:
+            with limit:
+                response = get_client().request(method, url, **kwargs)
+            if not retry_sent or response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+        except retryable:
+            if attempt == retries:
+                raise
+        time.sleep(_backoff(attempt + 1, response))
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def get_json(url, **kwargs):
+    """GET and decode a JSON body (error statuses included, so API error payloads come through)."""
+    return get(url, **kwargs).json()
+
+
+def close():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,182 @@
+# logger.py
+from logging.handlers import QueueHandler, QueueListener
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+import threading
+import logging
+import random
+import atexit
+import queue
+import json
+import time
+import uuid
+import sys
+import os
+
+load_dotenv()
+
+# ---------------------------------------------------
+# STRUCTURED, NON-BLOCKING LOGGING
+# ---------------------------------------------------
+# Request code only puts records on an in-memory queue; one background
+# thread formats and writes them, so a slow stdout never adds latency.
+# Every record carries the request ID of the request that produced it
+# (also across worker threads, see app/utils/threads.py), and large
+# payloads are only logged for a sampled fraction of requests.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")                    # json | text
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_id_var = ContextVar("request_id", default="-")
+
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def get_logger(name):
+    """Loggers live under "app" so one configuration covers them all."""
+    return logging.getLogger(name if name.startswith("app") else f"app.{name}")
+
+
+class RequestIdFilter(logging.Filter):
+    # Runs in the calling thread, before the record is queued
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class _DropWhenFullQueueHandler(QueueHandler):
+    """Never block a request on logging: if the queue is full, drop the record."""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    """Route the "app" loggers through a queue to a background writer (idempotent)."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        writer = logging.StreamHandler(sys.stdout)
+        writer.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        handler = _DropWhenFullQueueHandler(log_queue)
+        handler.addFilter(RequestIdFilter())
+
+        app_logger = logging.getLogger("app")
+        app_logger.setLevel(level)
+        app_logger.addHandler(handler)
+        app_logger.propagate = False
+
+        _listener = QueueListener(log_queue, writer, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def log_fields(logger, level, message, **fields):
+    """logger.log with structured fields (JSON keys / key=value in text mode)."""
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"fields": fields})
+
+
+def log_payload(logger, message, payload, rate=None, **fields):
+    """
+    DEBUG-log a (possibly huge) payload for a sampled fraction of calls,
+    truncated to LOG_PAYLOAD_MAX_CHARS. Costs nothing when DEBUG is off.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if random.random() >= (LOG_PAYLOAD_SAMPLE_RATE if rate is None else rate):
+        return
+    text = json.dumps(payload, ensure_ascii=False, default=str)
+    if len(text) > LOG_PAYLOAD_MAX_CHARS:
+        text = text[:LOG_PAYLOAD_MAX_CHARS] + f"… ({len(text)} chars)"
+    logger.debug(message, extra={"fields": {**fields, "payload": text}})
+
+
+# ---------------------------------------------------
+# CORRELATION-ID MIDDLEWARE
+# ---------------------------------------------------
+
+_access_log = get_logger("app.access")
+
+
+class RequestIdMiddleware:
+    """
+    Takes X-Request-ID from the client (or makes one), exposes it to every
+    log record of the request and echoes it in the response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER.lower().encode())
+        request_id = incoming.decode("latin-1")[:64] if incoming else uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message["headers"]) + [
+                    (REQUEST_ID_HEADER.lower().encode(), request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            log_fields(
+                _access_log, logging.INFO, "request",
+                method=scope["method"],
+                path=scope["path"],
+                status=status,
+                duration_ms=round((time.perf_counter() - started) * 1000, 1),
+            )
+            request_id_var.reset(token)
@@ -0,0 +1,307 @@
+# metrics.py
+from contextlib import contextmanager
+from dotenv import load_dotenv
+import functools
+import time
+import os
+
+load_dotenv()
+
+# ---------------------------------------------------
+# STAGE TIMINGS, COUNTERS AND /metrics
+# ---------------------------------------------------
+# Every expensive step of a request (geocoding, airport resolution, the
+# airport-pair search, hotels, the Llama completion, ...) runs inside
+# stage("name"), which records its duration in a Prometheus histogram
+# labelled by stage and outcome. /metrics serves those histograms plus the
+# cache and single-flight counters. When OTEL_EXPORTER_OTLP_ENDPOINT is set
+# and the OpenTelemetry SDK is installed, each stage is also exported as a
+# span, so one slow request can be followed stage by stage.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+OTEL_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "ai-travel-planner")
+
+# Upstream calls range from a few ms (cache hits) to a minute (the LLM)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 120)
+PAIR_BUCKETS = (1, 2, 3, 5, 8, 10, 15, 20, 25)
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest,
+    )
+    from prometheus_client.core import GaugeMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+try:
+    from opentelemetry import trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+PROMETHEUS_ENABLED = PROMETHEUS_AVAILABLE and METRICS_ENABLED
+
+_tracer = None
+_stats_sources = {}     # name -> (stats function, label for nested dicts)
+
+if PROMETHEUS_ENABLED:
+    registry = CollectorRegistry()
+
+    STAGE_SECONDS = Histogram(
+        "travel_planner_stage_seconds",
+        "Time spent in one stage of request handling.",
+        ["stage", "outcome"],
+        buckets=STAGE_BUCKETS,
+        registry=registry,
+    )
+    REQUEST_SECONDS = Histogram(
+        "travel_planner_http_request_seconds",
+        "End-to-end HTTP request latency.",
+        ["method", "route", "status"],
+        buckets=STAGE_BUCKETS,
+        registry=registry,
+    )
+    FLIGHT_PAIRS_TRIED = Histogram(
+        "travel_planner_flight_pairs_tried",
+        "Airport pairs queried before a search found flights (or gave up).",
+        ["outcome"],
+        buckets=PAIR_BUCKETS,
+        registry=registry,
+    )
+    SERP_WAIT_SECONDS = Histogram(
+        "travel_planner_serpapi_wait_seconds",
+        "Time a SerpAPI search waited for its rate-limit turn, by priority class.",
+        ["engine", "priority", "outcome"],
+        buckets=STAGE_BUCKETS,
+        registry=registry,
+    )
+    EVENTS = Counter(
+        "travel_planner_events",
+        "Notable events (timeouts, fallbacks, cache reuse), by name.",
+        ["event"],
+        registry=registry,
+    )
+
+
+def _failed(result):
+    # Data helpers report failures as {"error": ...} rather than raising
+    return isinstance(result, dict) and "error" in result
+
+
+class Stage:
+    """Handle yielded by stage(); set .outcome to label a non-exception failure."""
+
+    __slots__ = ("name", "outcome", "span")
+
+    def __init__(self, name, span=None):
+        self.name = name
+        self.outcome = "ok"
+        self.span = span
+
+    def check(self, result):
+        """Mark the stage failed if `result` is an error dict; returns result."""
+        if _failed(result):
+            self.outcome = "error"
+        return result
+
+
+@contextmanager
+def stage(name, **attributes):
+    """Time a block as stage `name` (exceptions count as outcome="error")."""
+    started = time.perf_counter()
+    if _tracer is None:
+        current = Stage(name)
+        try:
+            yield current
+        except BaseException:
+            current.outcome = "error"
+            raise
+        finally:
+            _observe(current, started)
+        return
+
+    with _tracer.start_as_current_span(name, attributes=attributes) as span:
+        current = Stage(name, span)
+        try:
+            yield current
+        except BaseException:
+            current.outcome = "error"
+            raise
+        finally:
+            span.set_attribute("outcome", current.outcome)
+            _observe(current, started)
+
+
+def _observe(current, started):
+    if PROMETHEUS_ENABLED:
+        STAGE_SECONDS.labels(current.name, current.outcome).observe(time.perf_counter() - started)
+
+
+def timed(name):
+    """Decorator form of stage(); an {"error": ...} return counts as a failure."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as current:
+                return current.check(func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def observe_stage(name, seconds, outcome="ok"):
+    """Record a stage timed by hand (e.g. across the yields of a stream)."""
+    if PROMETHEUS_ENABLED:
+        STAGE_SECONDS.labels(name, outcome).observe(seconds)
+
+
+def observe_pairs_tried(count, found):
+    if PROMETHEUS_ENABLED:
+        FLIGHT_PAIRS_TRIED.labels("found" if found else "none").observe(count)
+
+
+def observe_serp_wait(engine, priority, outcome, seconds):
+    if PROMETHEUS_ENABLED:
+        SERP_WAIT_SECONDS.labels(str(engine), priority, outcome).observe(seconds)
+
+
+def count_event(event, amount=1):
+    if PROMETHEUS_ENABLED:
+        EVENTS.labels(event).inc(amount)
+
+
+# ---------------------------------------------------
+# CACHE / SINGLE-FLIGHT COUNTERS
+# ---------------------------------------------------
+
+def register_stats(source, stats, label=None):
+    """
+    Export a stats() function on /metrics: each numeric field becomes the
+    gauge travel_planner_<source>_<field>. With `label`, dict values are
+    per-key breakdowns: {"hotels": {"calls": 2}} → <source>_calls{label="hotels"},
+    {"engines": {"google_flights": {"hits": 3}}} → <source>_<label>_hits{label=...}.
+    """
+    _stats_sources[source] = (stats, label)
+
+
+class _StatsCollector:
+    def collect(self):
+        for source, (stats, label) in list(_stats_sources.items()):
+            families = {}
+            for key, value in stats().items():
+                if not (label and isinstance(value, dict)):
+                    self._add(families, f"{source}_{key}", value, [], [])
+                elif all(isinstance(fields, dict) for fields in value.values()):
+                    for label_value, fields in value.items():
+                        for field, number in fields.items():
+                            self._add(families, f"{source}_{label}_{field}", number, [label], [label_value])
+                else:
+                    for field, number in value.items():
+                        self._add(families, f"{source}_{field}", number, [label], [key])
+            yield from families.values()
+
+    @staticmethod
+    def _add(families, metric, value, label_names, label_values):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return
+        name = f"travel_planner_{metric}"
+        if name not in families:
+            families[name] = GaugeMetricFamily(name, metric.replace("_", " "), labels=label_names)
+        families[name].add_metric(label_values, value)
+
+
+if PROMETHEUS_ENABLED:
+    registry.register(_StatsCollector())
+
+
+def render_metrics():
+    """(body, content type) for GET /metrics."""
+    if not PROMETHEUS_ENABLED:
+        return b"# prometheus_client is not installed or METRICS_ENABLED=0\n", CONTENT_TYPE_LATEST
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+# ---------------------------------------------------
+# OPTIONAL OPENTELEMETRY EXPORT
+# ---------------------------------------------------
+
+def configure_tracing():
+    """Export stages as OTLP spans when OTEL_EXPORTER_OTLP_ENDPOINT is set (idempotent)."""
+    global _tracer
+    if _tracer is not None or not (OTEL_AVAILABLE and OTEL_ENDPOINT):
+        return False
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("app")
+    return True
+
+
+# ---------------------------------------------------
+# REQUEST LATENCY MIDDLEWARE
+# ---------------------------------------------------
+
+class MetricsMiddleware:
+    """Per-route request latency histogram."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROMETHEUS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        if _tracer is None:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                self._observe(scope, status, started)
+            return
+
+        with _tracer.start_as_current_span(f"{scope['method']} {scope['path']}") as span:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                span.set_attribute("http.status_code", status)
+                self._observe(scope, status, started)
+
+    @staticmethod
+    def _route_label(scope):
+        # The matched route's template (/api/itinerary_jobs/{job_id}), so job IDs
+        # and scanners hitting random URLs can't grow the series count. Routes
+        # under an include_router prefix may carry only their own part of the
+        # path; the prefix is the leading segments of the request path.
+        route = scope.get("route")
+        template = getattr(route, "path", None)
+        if template is None:
+            return "unmatched"
+        segments = scope["path"].rstrip("/").split("/")
+        extra = len(segments) - len(template.rstrip("/").split("/"))
+        if extra <= 0:
+            return template
+        return "/".join(segments[:extra + 1]) + template
+
+    @classmethod
+    def _observe(cls, scope, status, started):
+        REQUEST_SECONDS.labels(scope["method"], cls._route_label(scope), str(status)).observe(time.perf_counter() - started)
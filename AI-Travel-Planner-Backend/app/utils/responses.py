@@ -0,0 +1,28 @@
+# responses.py
+import json
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:     # optional: pip install orjson
+    orjson = None
+
+# ---------------------------------------------------
+# FAST JSON RESPONSES
+# ---------------------------------------------------
+# orjson encodes the large itinerary / flight dicts several times faster
+# than the stdlib. Endpoints with big payloads return FastJSONResponse
+# directly, which also skips FastAPI's jsonable_encoder walk over the data.
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(
+                content,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+                default=str,
+            )
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
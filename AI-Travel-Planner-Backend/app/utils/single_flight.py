@@ -0,0 +1,95 @@
+# single_flight.py
+import threading
+
+# ---------------------------------------------------
+# COALESCE IDENTICAL IN-FLIGHT CALLS
+# ---------------------------------------------------
+# When the same search is already running (another user, same destination
+# and dates), a second caller waits for that call and gets its result
+# instead of going upstream again. Only concurrent calls are merged —
+# nothing is kept once the call returns; that is the caches' job.
+
+_groups = []    # every SingleFlight, for stats
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+    def wait(self, timeout=None):
+        """Block until the leader finishes; returns its result or raises its error."""
+        if not self.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for an identical in-flight call.")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """
+    One running call per key; callers that arrive meanwhile share its outcome.
+    shareable(result) -> False means the result only held for the leader
+    (e.g. its own budget ran out): followers then make the call themselves.
+    """
+
+    def __init__(self, name, shareable=None):
+        self.name = name
+        self.shareable = shareable
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "shared": 0, "not_shared": 0}
+        _groups.append(self)
+
+    def begin(self, key):
+        """
+        Join or start the call for `key`. Returns (call, is_leader); the
+        leader must end it with finish(). For callers that produce the
+        result themselves (e.g. while streaming it); otherwise use do().
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self._counters["shared"] += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self._counters["calls"] += 1
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result, call.error = result, error
+        call.done.set()
+
+    def do(self, key, func, *args, **kwargs):
+        """func(*args, **kwargs), run once for every concurrent caller with the same key."""
+        call, leader = self.begin(key)
+        if not leader:
+            result = call.wait()
+            if self.shareable is None or self.shareable(result):
+                return result
+            with self._lock:
+                self._counters["not_shared"] += 1
+            return func(*args, **kwargs)
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result=result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
+
+
+def single_flight_stats():
+    """Counters for every SingleFlight group, by name."""
+    return {group.name: group.stats() for group in _groups}
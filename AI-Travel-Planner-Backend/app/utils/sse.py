@@ -0,0 +1,13 @@
+# sse.py
+import json
+
+# ---------------------------------------------------
+# SERVER-SENT EVENTS
+# ---------------------------------------------------
+# text/event-stream framing: one "event:" line, the JSON payload on a
+# single "data:" line, and a blank line to end the event.
+
+
+def format_sse(event: str, data) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,56 @@
+# threads.py
+import contextvars
+import functools
+import os
+import anyio
+
+# ---------------------------------------------------
+# RUN BLOCKING DATA HELPERS OFF THE EVENT LOOP
+# ---------------------------------------------------
+# The data helpers (SerpAPI, restcountries, Hugging Face) are blocking.
+# Async endpoints hand them to worker threads so one slow upstream call
+# never stalls every other request on the worker. The limiter caps how
+# many requests can be inside blocking code at once; the rest wait
+# without holding a thread.
+
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", "64"))
+
+_limiter = None
+
+
+def _get_limiter():
+    # Created lazily: a CapacityLimiter must be made inside the running loop
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(BLOCKING_WORKERS)
+    return _limiter
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Await a blocking call in a worker thread (context vars are carried over)."""
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs),
+        limiter=_get_limiter(),
+    )
+
+
+_DONE = object()
+
+
+async def iterate_blocking(iterator):
+    """Async-iterate a blocking iterator, pulling each item in a worker thread."""
+    iterator = iter(iterator)
+    while True:
+        item = await run_blocking(next, iterator, _DONE)
+        if item is _DONE:
+            break
+        yield item
+
+
+def submit_with_context(pool, func, *args, **kwargs):
+    """
+    pool.submit that runs func inside a copy of the caller's context, so
+    the request ID (and anything else in a ContextVar) follows the work
+    into the executor thread. Plain executors start with an empty context.
+    """
+    return pool.submit(contextvars.copy_context().run, func, *args, **kwargs)
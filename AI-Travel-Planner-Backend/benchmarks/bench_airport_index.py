@@ -0,0 +1,103 @@
+# bench_airport_index.py
+"""
+Compare the AirportIndex k-d tree against the original linear haversine scan.
+
+Run from AI-Travel-Planner-Backend/:
+    python -m benchmarks.bench_airport_index
+"""
+import random
+import time
+from haversine import haversine, Unit
+
+from app.agents.Itinerary_Data.Airport_index import AirportIndex
+from app.agents.Itinerary_Data.Airport_table import AirportTable
+
+NUM_QUERIES = 500
+K = 5
+
+
+def synthetic_airports(n=5000, seed=7):
+    """Roughly airport-shaped data: clustered around land-ish latitudes."""
+    rng = random.Random(seed)
+    airports = []
+    for i in range(n):
+        airports.append({
+            "name": f"Airport {i}",
+            "city": f"City {i}",
+            "country": "XX",
+            "iata": f"{i:03d}"[-3:],
+            "lat": max(-89.9, min(89.9, rng.gauss(25, 28))),
+            "lon": rng.uniform(-180, 180),
+            "type": "large_airport",
+        })
+    return AirportTable.from_records(airports)
+
+
+def load_airports():
+    try:
+        from app.agents.Itinerary_Data.Airport_helper import get_airports
+        return get_airports(), "ourairports.com"
+    except Exception as e:
+        print(f"⚠️ Could not load real airports ({e}), using synthetic data")
+        return synthetic_airports(), "synthetic"
+
+
+# --- The code paths being replaced ---
+
+def linear_nearest(airports, lat, lon):
+    closest = None
+    min_dist = float("inf")
+    for ap in airports:
+        dist = haversine((lat, lon), (ap["lat"], ap["lon"]), unit=Unit.KILOMETERS)
+        if dist < min_dist:
+            closest = ap
+            min_dist = dist
+    return closest, min_dist
+
+
+def linear_top_k(airports, lat, lon, limit=K):
+    return sorted(
+        airports,
+        key=lambda ap: haversine((lat, lon), (ap["lat"], ap["lon"]), unit=Unit.KILOMETERS)
+    )[:limit]
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    out = [fn(lat, lon) for lat, lon in queries]
+    return out, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    airports, source = load_airports()
+    rng = random.Random(42)
+    queries = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(NUM_QUERIES)]
+
+    start = time.perf_counter()
+    index = AirportIndex(airports)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Airports: {len(airports)} ({source}), queries: {NUM_QUERIES}")
+    print(f"Index build: {build_ms:.1f} ms\n")
+
+    records = list(airports)   # the old AIRPORTS list-of-dicts
+    lin_1, lin_1_ms = timed(lambda la, lo: linear_nearest(records, la, lo), queries)
+    idx_1, idx_1_ms = timed(lambda la, lo: index.nearest(la, lo, k=1)[0], queries)
+
+    lin_k, lin_k_ms = timed(lambda la, lo: linear_top_k(records, la, lo), queries)
+    idx_k, idx_k_ms = timed(lambda la, lo: [ap for ap, _ in index.nearest(la, lo, k=K)], queries)
+
+    _, radius_ms = timed(lambda la, lo: index.within(la, lo, 250), queries)
+
+    assert [a for a, _ in lin_1] == [a for a, _ in idx_1], "nearest mismatch"
+    assert lin_k == idx_k, "top-k mismatch"
+
+    print(f"{'query':<22}{'linear (ms)':>14}{'index (ms)':>14}{'speedup':>10}")
+    print(f"{'nearest (k=1)':<22}{lin_1_ms:>14.3f}{idx_1_ms:>14.3f}{lin_1_ms / idx_1_ms:>9.0f}x")
+    print(f"{f'top {K}':<22}{lin_k_ms:>14.3f}{idx_k_ms:>14.3f}{lin_k_ms / idx_k_ms:>9.0f}x")
+    print(f"{'within 250 km':<22}{'-':>14}{radius_ms:>14.3f}")
+    print("\n✅ Index results identical to linear scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# bench_flight_fanout.py
+"""
+Wall-clock of get_flights' airport-pair search against a fake SerpAPI:
+sequential loop (concurrency=1) vs. parallel ranked waves.
+
+Run from AI-Travel-Planner-Backend/:
+    python -m benchmarks.bench_flight_fanout [--latency 0.4] [--concurrency 5]
+"""
+import argparse
+import threading
+import time
+
+from app.agents.Itinerary_Data import Flight
+
+DEP_CODES = ["D01", "D02", "D03", "D04", "D05"]
+ARR_CODES = ["A01", "A02", "A03", "A04", "A05"]
+
+# (scenario name, pairs that have flights)
+SCENARIOS = [
+    ("nearest pair has flights", {("D01", "A01")}),
+    ("remote destination (4th arrival airport)", {("D01", "A04"), ("D03", "A01")}),
+    ("only the last pair", {("D05", "A05")}),
+    ("no flights at all", set()),
+]
+
+
+class FakeSerpApi:
+    """Stand-in for serp_search() with fixed latency per google_flights query."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.routes = set()
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, params, use_cache=True):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if (params["departure_id"], params["arrival_id"]) in self.routes:
+            return {"best_flights": [{"price": 420, "flights": []}]}
+        return {"error": "Google Flights hasn't returned any results for this query."}
+
+
+def fake_resolve(place):
+    return {"place_coordinates": {"lat": 0.0, "lon": 0.0}, "airport_coordinates": {"lat": 0.0, "lon": 0.0}}
+
+
+def fake_nearest(codes):
+    return lambda lat, lon, limit=5: [({"iata": code}, 40.0 * i) for i, code in enumerate(codes[:limit])]
+
+
+def run(fake, concurrency):
+    fake.calls = 0
+    start = time.perf_counter()
+    result = Flight.get_flights("Origin", "Destination", "2026-03-01", "2026-03-08", "USD", concurrency=concurrency)
+    return result.get("summary", {}).get("route"), time.perf_counter() - start, fake.calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.4, help="Fake SerpAPI latency (s)")
+    parser.add_argument("--concurrency", type=int, default=Flight.FLIGHT_SEARCH_CONCURRENCY)
+    args = parser.parse_args()
+
+    fake = FakeSerpApi(args.latency)
+    Flight.serp_search = fake
+    Flight.resolve_airport_code = fake_resolve
+    nearest = iter([])
+
+    def get_nearest_airports(lat, lon, limit=5):
+        return next(nearest)(lat, lon, limit)
+
+    Flight.get_nearest_airports = get_nearest_airports
+    Flight.route_index = None             # fixed pair order: measure the fan-out only
+
+    print(f"Fake SerpAPI latency: {args.latency}s, concurrency: {args.concurrency}\n")
+    print(f"{'scenario':<44}{'sequential':>12}{'parallel':>12}{'speedup':>9}  route")
+
+    for name, routes in SCENARIOS:
+        fake.routes = routes
+
+        nearest = iter([fake_nearest(DEP_CODES), fake_nearest(ARR_CODES)])
+        seq_route, seq_s, seq_calls = run(fake, 1)
+        nearest = iter([fake_nearest(DEP_CODES), fake_nearest(ARR_CODES)])
+        par_route, par_s, par_calls = run(fake, args.concurrency)
+
+        assert seq_route == par_route, f"{name}: {seq_route} != {par_route}"
+        print(
+            f"{name:<44}{seq_s:>10.2f}s {par_s:>10.2f}s {seq_s / par_s:>7.1f}x  {par_route or '-'}"
+            f"  ({seq_calls} vs {par_calls} calls)"
+        )
+
+    print("\n✅ Parallel search picked the same airport pair as the sequential loop")
+
+
+if __name__ == "__main__":
+    main()
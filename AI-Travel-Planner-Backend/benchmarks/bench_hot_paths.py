@@ -0,0 +1,150 @@
+# bench_hot_paths.py
+"""
+Micro-benchmarks for the per-request hot spots, offline (recorded fixtures,
+see replay.py): airport lookup, itinerary parsing, flight response
+building, cache keys and response serialization.
+
+Save a baseline, then compare a later run against it; the compare run
+exits with status 1 when any benchmark got slower than --tolerance:
+    python -m benchmarks.bench_hot_paths --save baseline.json
+    python -m benchmarks.bench_hot_paths --compare baseline.json --tolerance 1.3
+
+Run from AI-Travel-Planner-Backend/.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+from benchmarks import replay
+
+replay.offline_environment(caches=True)
+
+from app.agents.Itinerary_Data.Airport_helper import resolve_airport_code  # noqa: E402
+from app.agents.Itinerary_Data.Airport_index import AirportIndex  # noqa: E402
+from app.agents.Itinerary_Data.Flight import build_flights_response  # noqa: E402
+from app.agents.Itinerary_Data.Serp_cache import normalize_params  # noqa: E402
+from app.agents.Itinerary_parser import ItineraryParser, parse_itinerary  # noqa: E402
+from app.utils.etag import make_etag  # noqa: E402
+from app.utils.responses import FastJSONResponse  # noqa: E402
+from benchmarks.bench_airport_index import synthetic_airports  # noqa: E402
+
+ROUND_SECONDS = 0.1     # each round runs at least this long
+ROUNDS = 5              # best round is reported
+
+
+def time_per_call(fn):
+    """Best-of-ROUNDS seconds per call, with enough calls per round to be stable."""
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        if time.perf_counter() - start >= ROUND_SECONDS / 10:
+            break
+        calls *= 2
+    calls = max(1, int(calls * ROUND_SECONDS / max(time.perf_counter() - start, 1e-9)))
+
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def cases():
+    """(name, zero-argument callable) for every benchmark."""
+    replay.install(serp_latency=0)
+
+    # --- Airports: k-d tree query over a realistic-size table, warm resolve
+    index = AirportIndex(synthetic_airports())
+    rng = random.Random(3)
+    points = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(256)]
+    point = iter(points * 10**6)
+    dep_info = resolve_airport_code("Dallas")
+    arr_info = resolve_airport_code("Paris")
+
+    # --- Parsing: every recorded model output, whole and streamed
+    outputs = []
+    for path in sorted(glob.glob(os.path.join(replay.LLM_FIXTURES, "*.md"))):
+        with open(path, encoding="utf-8") as f:
+            outputs.append(f.read())
+
+    def parse_streamed():
+        for text in outputs:
+            parser = ItineraryParser()
+            for start in range(0, len(text), 16):
+                parser.feed(text[start:start + 16])
+            parser.close()
+
+    # --- Flights: response views from the recorded google_flights answer
+    with open(os.path.join(replay.SERPAPI_FIXTURES, "google_flights.json"), encoding="utf-8") as f:
+        recorded = json.load(f)
+    search = {"results": recorded, "dep_code": "DFW", "arr_code": "CDG", "dep_info": dep_info, "arr_info": arr_info}
+    flight_params = {"engine": "google_flights", **recorded["search_parameters"], "api_key": "offline"}
+
+    # --- Serialization: a saved full itinerary response
+    with open(os.path.join(replay.FIXTURES, "itinerary_paris_full.json"), encoding="utf-8") as f:
+        itinerary = json.load(f)
+    body = FastJSONResponse(itinerary).body
+
+    return [
+        ("airports.nearest_k5", lambda: index.nearest(*next(point), k=5)),
+        ("airports.resolve_warm", lambda: resolve_airport_code("Paris")),
+        ("itinerary.parse_all_fixtures", lambda: [parse_itinerary(text) for text in outputs]),
+        ("itinerary.parse_streamed", parse_streamed),
+        ("flights.summary_view", lambda: build_flights_response(search, "USD", "summary")),
+        ("flights.full_view", lambda: build_flights_response(search, "USD", "full")),
+        ("serp_cache.key", lambda: normalize_params(flight_params)),
+        ("response.encode_itinerary", lambda: FastJSONResponse(itinerary)),
+        ("response.etag_itinerary", lambda: make_etag(body)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", help="Write the results (µs per call) to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier --save")
+    parser.add_argument("--tolerance", type=float, default=1.3, help="Allowed slowdown ratio vs. the baseline")
+    parser.add_argument("-k", help="Only run benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    for name, fn in cases():
+        if args.k and args.k not in name:
+            continue
+        micros = time_per_call(fn) * 1e6
+        results[name] = round(micros, 3)
+
+        line = f"{name:<30} {micros:12.2f} µs"
+        if name in baseline:
+            ratio = micros / baseline[name]
+            line += f"   {ratio:5.2f}x baseline"
+            if ratio > args.tolerance:
+                line += "  ⚠️ slower"
+                regressions.append(name)
+        print(line)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved to {args.save}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) over {args.tolerance}x baseline: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# bench_http_client.py
+"""
+Per-call latency: a new connection per request (what serpapi.GoogleSearch
+and bare requests.get did) vs. the shared keep-alive client.
+
+By default it runs against a local server that charges --setup-ms for every
+new connection (standing in for DNS + TCP + TLS) and --work-ms per request:
+    python -m benchmarks.bench_http_client
+    python -m benchmarks.bench_http_client --setup-ms 80 -n 50
+
+Or against a real host (only the connection reuse differs between the runs):
+    python -m benchmarks.bench_http_client --url https://serpapi.com/ -n 20
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import statistics
+import threading
+import time
+import requests
+
+from app.utils import http_client
+
+
+def start_server(setup_ms, work_ms):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"    # keep-alive
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            time.sleep(setup_ms / 1000)  # new connection
+            super().setup()
+
+        def do_GET(self):
+            time.sleep(work_ms / 1000)
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/search"
+
+
+def timed(fn, n):
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{label:<34} mean {statistics.mean(latencies):7.1f} ms | p50 {statistics.median(latencies):7.1f} ms | p95 {p95:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Real endpoint to call instead of the local server")
+    parser.add_argument("-n", type=int, default=30, help="Calls per client")
+    parser.add_argument("--setup-ms", type=float, default=40, help="Local server: cost of a new connection")
+    parser.add_argument("--work-ms", type=float, default=5, help="Local server: cost of a request")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = args.url
+        print(f"Target: {url}")
+    else:
+        server, url = start_server(args.setup_ms, args.work_ms)
+        print(f"Target: local server (connection setup {args.setup_ms:.0f} ms, request {args.work_ms:.0f} ms)")
+    http2 = "on" if http_client.HTTP2_ENABLED else 'off (pip install "httpx[http2]")'
+    print(f"HTTP/2: {http2}\n")
+
+    # Warm the pooled connection so the run measures steady state
+    http_client.get(url)
+
+    report("new connection per call (before)", timed(lambda: requests.get(url, timeout=30), args.n))
+    report("shared keep-alive client (after)", timed(lambda: http_client.get(url), args.n))
+
+    http_client.close()
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
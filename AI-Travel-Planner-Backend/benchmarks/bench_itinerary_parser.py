@@ -0,0 +1,63 @@
+# bench_itinerary_parser.py
+"""
+Times the incremental itinerary parser against the old re.split/findall on
+the recorded model outputs in benchmarks/fixtures/llm/. That both give the
+same days (whole or streamed) is checked in tests/test_itinerary_parser.py.
+
+Run from AI-Travel-Planner-Backend/:
+    python -m benchmarks.bench_itinerary_parser
+"""
+import glob
+import os
+import re
+import time
+
+from app.agents.Itinerary_parser import parse_itinerary
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "llm", "*.md")
+LEGACY_HEADER = r"(?:##\s*Day\s*\d+:|Day\s*\d+:|\*\*Day\s*\d+:)"
+REPEAT = 200
+
+
+def legacy_split(ai_output):
+    """The old two-pass split from itinerary_agent2.generate_itinerary."""
+    day_blocks = re.split(LEGACY_HEADER, ai_output)
+    headers = re.findall(LEGACY_HEADER, ai_output)
+    return [
+        {"day": headers[i].replace("**", "").strip(), "description": block.strip()}
+        for i, block in enumerate(day_blocks[1:])
+    ]
+
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def main():
+    paths = sorted(glob.glob(FIXTURES))
+    print(f"{len(paths)} fixtures\n")
+
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            text = f.read().strip()
+
+        days, summary = parse_itinerary(text)
+        filled = sum(
+            1 for d in days for k in ("morning", "afternoon", "evening", "hotel_recommendation",
+                                      "restaurant_suggestion", "travel_tip") if d[k]
+        )
+        print(
+            f"{os.path.basename(path):<24} days {len(days)}  fields {filled:>2}/{6 * len(days):<2}  "
+            f"summary {'yes' if summary else 'no ':<3}  "
+            f"legacy {best_of(lambda: legacy_split(text)):6.1f} µs  "
+            f"parser {best_of(lambda: parse_itinerary(text)):6.1f} µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# bench_response_encoding.py
+"""
+Encoding time and wire size of a saved itinerary response.
+
+Compares FastAPI's default path (jsonable_encoder + stdlib json) with
+FastJSONResponse (orjson, no encoder pass), then the payload size raw,
+gzipped and brotli-compressed, for the full and the summary flights view.
+
+Fixtures (benchmarks/fixtures/itinerary_paris_*.json) are real
+generate_itinerary output built from the recorded SerpAPI responses in
+benchmarks/fixtures/serpapi/ and the Paris model output in fixtures/llm/.
+
+Run from AI-Travel-Planner-Backend/:
+    python -m benchmarks.bench_response_encoding
+"""
+import gzip
+import json
+import os
+import time
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.utils.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from app.utils.responses import FastJSONResponse, orjson
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+VIEWS = ("full", "summary")
+REPEAT = 50
+
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"orjson: {'yes' if orjson else 'no (stdlib fallback)'} | brotli: {'yes' if brotli else 'no'}\n")
+
+    for view in VIEWS:
+        with open(os.path.join(FIXTURES, f"itinerary_paris_{view}.json"), encoding="utf-8") as f:
+            payload = json.load(f)
+
+        default_ms = best_of(lambda: JSONResponse(jsonable_encoder(payload)))
+        fast_ms = best_of(lambda: FastJSONResponse(payload))
+        body = FastJSONResponse(payload).body
+
+        print(f"— itinerary, {view} flights view")
+        print(f"  encode   default {default_ms:6.2f} ms | FastJSONResponse {fast_ms:6.2f} ms  ({default_ms / fast_ms:.1f}x)")
+
+        sizes = [("raw", len(body), 0.0)]
+        gz_ms = best_of(lambda: gzip.compress(body, GZIP_LEVEL))
+        sizes.append((f"gzip-{GZIP_LEVEL}", len(gzip.compress(body, GZIP_LEVEL)), gz_ms))
+        if brotli:
+            br_ms = best_of(lambda: brotli.compress(body, quality=BROTLI_QUALITY))
+            sizes.append((f"br-{BROTLI_QUALITY}", len(brotli.compress(body, quality=BROTLI_QUALITY)), br_ms))
+
+        for label, size, ms in sizes:
+            print(f"  {label:<8} {size / 1024:7.1f} KB" + (f"  ({ms:.2f} ms)" if ms else ""))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# load_test.py
+"""
+Concurrent load test for the itinerary / flight / airport endpoints.
+
+Against a running server:
+    python -m benchmarks.load_test --url http://localhost:8000 --endpoint airports -n 200 -c 50
+
+In-process and offline: the real app, with SerpAPI, the LLM and the
+airport download replayed from benchmarks/fixtures/ (see replay.py) at
+--serp-latency / --llm-first-token per call. Caches are off unless
+--caches is given, so every request takes the upstream path:
+    python -m benchmarks.load_test --endpoint all -n 100 -c 50
+    python -m benchmarks.load_test --endpoint itinerary -n 100 -c 50 --serp-latency 0.5 --caches
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+import httpx
+
+from benchmarks import replay
+
+TRIPS = [
+    ("Dallas", "Paris"),
+    ("New York", "Tokyo"),
+    ("London", "Rome"),
+    ("Dallas", "Bali"),
+]
+
+PAYLOADS = {
+    "airports": ("/api/airports", [
+        {"search": place} for place in ("Paris", "Tokyo", "Dallas", "Rome", "Bali", "London", "Japan")
+    ]),
+    "flight": ("/api/flight", [
+        {
+            "departure_id": origin,
+            "arrival_id": destination,
+            "outbound_date": "2026-03-01",
+            "return_date": "2026-03-08",
+            "currency": "USD",
+        }
+        for origin, destination in TRIPS
+    ]),
+    "itinerary": ("/api/generate_itinerary", [
+        {
+            "destination": destination,
+            "start_date": "2026-03-01",
+            "num_days": 3,
+            "budget": "$2000",
+            "departure_city": origin,
+            "trip_type": "culture",
+        }
+        for origin, destination in TRIPS
+    ]),
+}
+
+
+def in_process_app(args):
+    """The real FastAPI app, every upstream replayed offline."""
+    replay.offline_environment(caches=args.caches)
+    from app.main import app
+
+    upstreams = replay.install(
+        serp_latency=args.serp_latency,
+        llm_first_token=args.llm_first_token,
+        llm_tokens_per_second=args.llm_tps,
+        miss_rate=args.miss_rate,
+    )
+    return app, upstreams
+
+
+async def run(client, path, payloads, total, concurrency):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    bodies = itertools.cycle(payloads)
+
+    async def one(payload):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                response.raise_for_status()
+                if "error" in response.json():
+                    errors += 1
+            except (httpx.HTTPError, ValueError):
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(next(bodies)) for _ in range(total)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running backend (default: in-process app)")
+    parser.add_argument("--endpoint", choices=[*PAYLOADS, "all"], default="airports")
+    parser.add_argument("-n", "--requests", type=int, default=100)
+    parser.add_argument("-c", "--concurrency", type=int, default=25)
+    parser.add_argument("--serp-latency", "--latency", type=float, default=0.3, help="In-process: seconds per SerpAPI call")
+    parser.add_argument("--llm-first-token", type=float, default=1.0, help="In-process: seconds before the LLM answers")
+    parser.add_argument("--llm-tps", type=float, default=200.0, help="In-process: LLM tokens per second after that")
+    parser.add_argument("--miss-rate", type=float, default=0.3, help="In-process: share of airport pairs without flights")
+    parser.add_argument("--caches", action="store_true", help="In-process: keep the SerpAPI / itinerary caches on")
+    args = parser.parse_args()
+
+    upstreams = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=300)
+        target = args.url
+    else:
+        app, upstreams = in_process_app(args)
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300)
+        target = (f"in-process replay (SerpAPI {args.serp_latency}s/call, LLM {args.llm_first_token}s"
+                  f" + {args.llm_tps:.0f} tok/s, caches {'on' if args.caches else 'off'})")
+
+    print(f"Target:      {target}")
+    print(f"Load:        {args.requests} requests per endpoint, concurrency {args.concurrency}\n")
+
+    endpoints = list(PAYLOADS) if args.endpoint == "all" else [args.endpoint]
+    async with client:
+        for endpoint in endpoints:
+            path, payloads = PAYLOADS[endpoint]
+            calls_before = upstreams[0].total_calls() if upstreams else 0
+            llm_before = upstreams[1].calls if upstreams else 0
+
+            elapsed, latencies, errors = await run(client, path, payloads, args.requests, args.concurrency)
+
+            print(f"{path}")
+            print(f"  Wall time: {elapsed:.2f}s  →  {args.requests / elapsed:.1f} req/s")
+            print(f"  Latency:   p50 {statistics.median(latencies) * 1000:.0f} ms"
+                  f" | p95 {percentile(latencies, 95) * 1000:.0f} ms"
+                  f" | p99 {percentile(latencies, 99) * 1000:.0f} ms")
+            print(f"  Errors:    {errors}")
+            if upstreams:
+                print(f"  Upstream:  {upstreams[0].total_calls() - calls_before} SerpAPI calls,"
+                      f" {upstreams[1].calls - llm_before} LLM completions")
+            print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
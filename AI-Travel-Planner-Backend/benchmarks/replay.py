@@ -0,0 +1,225 @@
+# replay.py
+"""
+Offline stand-ins for every upstream the backend talks to, replaying the
+recorded responses in benchmarks/fixtures/ with configurable latency:
+
+  - SerpAPI (google_maps, google_hotels, google_flights) → ReplaySerpApi,
+    installed as Serp_client's HTTP client, so the response cache and
+    single-flight layers above it run exactly as in production
+  - the Hugging Face Llama completion → ReplayLLM (plain and streamed)
+  - the ourairports.com download → fixtures/airports.csv
+
+Usage (before anything imports `app`):
+    from benchmarks import replay
+    replay.offline_environment(caches=False)
+    serp, llm = replay.install(serp_latency=0.3, llm_first_token=1.0)
+"""
+import copy
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import types
+import zlib
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+SERPAPI_FIXTURES = os.path.join(FIXTURES, "serpapi")
+LLM_FIXTURES = os.path.join(FIXTURES, "llm")
+AIRPORTS_CSV = os.path.join(FIXTURES, "airports.csv")
+
+# Recorded model output used for a destination (others get Paris)
+LLM_OUTPUTS = {
+    "paris": "paris_3_days.md",
+    "tokyo": "tokyo_bold_labels.md",
+    "rome": "rome_drift.md",
+    "bali": "bali_no_summary.md",
+}
+
+
+def offline_environment(caches=False):
+    """
+    Point every on-disk store at a throwaway directory and switch the
+    response caches off (cold upstream path) or to memory. Must run before
+    `app` is imported: the stores read their settings at import time.
+    """
+    scratch = tempfile.mkdtemp(prefix="travel-bench-")
+    os.environ["PLACE_STORE_PATH"] = os.path.join(scratch, "place_store.sqlite3")
+    os.environ["AIRPORTS_DATA_PATH"] = os.path.join(scratch, "airports.bin")
+    os.environ["ROUTE_INDEX_PATH"] = os.path.join(scratch, "route_index.sqlite3")
+    os.environ["ITINERARY_JOBS_PATH"] = os.path.join(scratch, "itinerary_jobs.sqlite3")
+    os.environ["SERP_QUOTA_PATH"] = os.path.join(scratch, "serp_quota.sqlite3")
+    os.environ["CACHE_WARMER_PATH"] = os.path.join(scratch, "cache_warmer.sqlite3")
+    os.environ["SERP_CACHE_BACKEND"] = "memory" if caches else "none"
+    os.environ["ITINERARY_CACHE_BACKEND"] = "memory" if caches else "none"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("Serp_API", "offline")
+    # Measure the app, not the production rate limits (set SERP_RATE_* to test those)
+    os.environ.setdefault("SERP_RATE_DEFAULT", "0")
+    return scratch
+
+
+def _load_json(name):
+    with open(os.path.join(SERPAPI_FIXTURES, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _Response:
+    def __init__(self, body, status_code=200):
+        self._body = body
+        self.status_code = status_code
+
+    def json(self):
+        return self._body
+
+
+class ReplaySerpApi:
+    """
+    Answers SerpAPI requests from the recorded responses (same get() as
+    app.utils.http_client).
+
+    latency:   seconds per upstream call (± jitter, as a fraction)
+    miss_rate: share of airport pairs with no flights (fixed per pair), so
+               flight searches fan out over several pairs like real ones
+    """
+
+    def __init__(self, latency=0.3, jitter=0.2, miss_rate=0.3, seed=7):
+        self.latency = latency
+        self.jitter = jitter
+        self.miss_rate = miss_rate
+        self.responses = {
+            engine: _load_json(f"{engine}.json")
+            for engine in ("google_maps", "google_hotels", "google_flights")
+        }
+        self.places = _load_json("places.json")
+        self.calls = {engine: 0 for engine in self.responses}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, **kwargs):
+        return _Response(self.search(params or {}))
+
+    def search(self, params):
+        engine = params.get("engine")
+        with self._lock:
+            self.calls[engine] = self.calls.get(engine, 0) + 1
+            delay = self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+        time.sleep(max(0.0, delay))
+
+        if engine == "google_maps":
+            return self._maps(params)
+        if engine == "google_hotels":
+            return self._with_parameters(self.responses["google_hotels"], params)
+        if engine == "google_flights":
+            return self._flights(params)
+        return {"error": f"No recorded response for engine {engine!r}"}
+
+    def _with_parameters(self, recorded, params):
+        response = copy.copy(recorded)
+        response["search_parameters"] = self._parameters(params)
+        return response
+
+    def _maps(self, params):
+        response = self._with_parameters(self.responses["google_maps"], params)
+        place = self.places.get(str(params.get("q", "")).strip().lower())
+        if place:
+            response["place_results"] = {
+                **response["place_results"],
+                "title": place["title"],
+                "type": place["type"],
+                "gps_coordinates": {"latitude": place["latitude"], "longitude": place["longitude"]},
+            }
+        return response
+
+    def _flights(self, params):
+        pair = f"{params.get('departure_id')}-{params.get('arrival_id')}"
+        if zlib.crc32(pair.encode()) % 1000 < self.miss_rate * 1000:
+            return {
+                "search_parameters": self._parameters(params),
+                "error": "Google Flights hasn't returned any results for this query.",
+            }
+        return self._with_parameters(self.responses["google_flights"], params)
+
+    @staticmethod
+    def _parameters(params):
+        return {k: v for k, v in params.items() if k not in ("api_key", "output", "source")}
+
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+
+class ReplayLLM:
+    """
+    InferenceClient stand-in: chat.completions.create(...) returns a
+    recorded model output after `first_token` seconds, then generates at
+    `tokens_per_second` (~4 characters per token), plain or streamed.
+    """
+
+    CHUNK_CHARS = 16
+
+    def __init__(self, first_token=1.0, tokens_per_second=60.0):
+        self.first_token = first_token
+        self.tokens_per_second = tokens_per_second
+        self.outputs = {}
+        for destination, name in LLM_OUTPUTS.items():
+            with open(os.path.join(LLM_FIXTURES, name), encoding="utf-8") as f:
+                self.outputs[destination] = f.read()
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def _output_for(self, messages):
+        prompt = messages[-1]["content"].lower()
+        for destination, text in self.outputs.items():
+            if f"itinerary** for {destination}" in prompt:
+                return text
+        return self.outputs["paris"]
+
+    def _generation_seconds(self, chars):
+        return (chars / 4) / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def create(self, model=None, messages=(), max_tokens=None, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        text = self._output_for(messages)
+        if stream:
+            return self._stream(text)
+
+        time.sleep(self.first_token + self._generation_seconds(len(text)))
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message={"role": "assistant", "content": text})],
+            usage=types.SimpleNamespace(completion_tokens=len(text) // 4),
+        )
+
+    def _stream(self, text):
+        time.sleep(self.first_token)
+        for start in range(0, len(text), self.CHUNK_CHARS):
+            chunk = text[start:start + self.CHUNK_CHARS]
+            time.sleep(self._generation_seconds(len(chunk)))
+            yield types.SimpleNamespace(
+                choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=chunk))]
+            )
+
+
+def load_fixture_airports():
+    """Install the recorded airport table (no ourairports.com download)."""
+    from app.agents.Itinerary_Data import Airport_data, Airport_helper
+
+    Airport_data.build(csv_path=AIRPORTS_CSV, path=Airport_data.AIRPORTS_DATA_PATH)
+    Airport_helper.get_airports()
+
+
+def install(serp_latency=0.3, llm_first_token=1.0, llm_tokens_per_second=60.0, jitter=0.2, miss_rate=0.3):
+    """Swap every upstream for its replaying stand-in; returns (serp, llm)."""
+    from app.agents.Itinerary_Data import Serp_client
+    from app.router import chatbot
+
+    serp = ReplaySerpApi(latency=serp_latency, jitter=jitter, miss_rate=miss_rate)
+    llm = ReplayLLM(first_token=llm_first_token, tokens_per_second=llm_tokens_per_second)
+
+    Serp_client.http_client = serp
+    chatbot.itinerary_agent2.client = llm
+    load_fixture_airports()
+    return serp, llm
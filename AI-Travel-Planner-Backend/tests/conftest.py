@@ -0,0 +1,6 @@
+# conftest.py
+# Every on-disk store points at a throwaway directory and upstream settings
+# are offline before any test imports `app` (the stores read them at import).
+from benchmarks import replay
+
+replay.offline_environment(caches=True)
@@ -0,0 +1,55 @@
+# test_http_client.py
+"""
+Retries on the shared client: ordinary upstreams retry timeouts and
+429/5xx, billed ones (retry_sent=False) only what never reached the server.
+
+Run from AI-Travel-Planner-Backend/:
+    python -m pytest tests
+"""
+import httpx
+import pytest
+
+from app.utils import http_client
+
+URL = "https://upstream.test/search"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Replies from the `replies` list in order (an exception instance is raised)."""
+    state = {"replies": [], "calls": 0}
+
+    def handler(request):
+        state["calls"] += 1
+        reply = state["replies"].pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return httpx.Response(reply, json={})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_client, "get_client", lambda: client)
+    monkeypatch.setattr(http_client, "_backoff", lambda attempt, response=None: 0)
+    return state
+
+
+def test_retries_statuses_and_timeouts_by_default(upstream):
+    upstream["replies"] = [503, httpx.ReadTimeout("slow"), 200]
+    assert http_client.get(URL, retries=2).status_code == 200
+    assert upstream["calls"] == 3
+
+
+def test_billed_upstream_is_sent_once(upstream):
+    upstream["replies"] = [429, 200]
+    assert http_client.get(URL, retries=2, retry_sent=False).status_code == 429
+    assert upstream["calls"] == 1
+
+    upstream["replies"], upstream["calls"] = [httpx.ReadTimeout("slow"), 200], 0
+    with pytest.raises(httpx.ReadTimeout):
+        http_client.get(URL, retries=2, retry_sent=False)
+    assert upstream["calls"] == 1
+
+
+def test_billed_upstream_retries_connect_errors(upstream):
+    upstream["replies"] = [httpx.ConnectError("refused"), httpx.ConnectTimeout("slow"), 200]
+    assert http_client.get(URL, retries=2, retry_sent=False).status_code == 200
+    assert upstream["calls"] == 3
@@ -0,0 +1,130 @@
+# test_itinerary_cache.py
+"""
+Cached day plans are shared between requests with the same trip features,
+so nothing user-specific (departure city, this request's hotels, flights or
+their prices) may reach the prompt, the cached days or the shared summary.
+
+Run from AI-Travel-Planner-Backend/:
+    python -m pytest tests
+"""
+import json
+import os
+import types
+from concurrent.futures import Future
+
+import pytest
+
+from app.agents import itinerary_agent2
+from app.agents.Itinerary_cache import ItineraryCache
+from app.agents.Itinerary_Data.Serp_cache import MemoryBackend
+from app.agents.itinerary_agent2 import ItineraryAgent2
+from benchmarks.replay import LLM_FIXTURES
+
+
+def fixture(name):
+    with open(os.path.join(LLM_FIXTURES, name), encoding="utf-8") as f:
+        return f.read().strip()
+
+
+class EchoLLM:
+    """Answers with a recorded itinerary whose note repeats the trip part of the prompt."""
+
+    def __init__(self):
+        self.prompts = []
+        self.chat = types.SimpleNamespace(completions=self)
+
+    def create(self, messages=(), stream=False, **kwargs):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        trip = prompt.split("STRICT FORMAT")[0]     # the format example would parse as days
+        text = fixture("paris_3_days.md") + "\n- Note: " + " ".join(trip.split())
+        if stream:
+            return iter([types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=text))])])
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message={"role": "assistant", "content": text})], usage=None,
+        )
+
+
+def trip_data(hotel, hotel_price, flight_price):
+    hotels = [{"name": hotel, "description": f"{hotel} description", "price_per_night": hotel_price,
+               "hotel_class": 4, "link": None, "images": []}]
+    flights = {"summary": {"flights": [{
+        "legs": [{"departure": "TXL", "arrival": "CDG", "airline": f"{hotel} Air"}],
+        "total_duration_min": 120,
+        "price": flight_price,
+    }]}}
+    return {"location": {}, "hotels": hotels, "flights": flights}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(itinerary_agent2, "itinerary_cache", ItineraryCache(MemoryBackend()))
+    agent = ItineraryAgent2.__new__(ItineraryAgent2)
+    agent.client = EchoLLM()
+    agent.live = {}
+
+    def submit_trip_data(destination, departure_city, start, end):
+        sources = {}
+        for name, value in agent.live[departure_city].items():
+            future = Future()
+            future.set_result(value)
+            sources[name] = (60, None, future)
+        return sources
+
+    monkeypatch.setattr(agent, "_submit_trip_data", submit_trip_data)
+    agent.live["Berlin"] = trip_data("Hotel Alpha", "$100", "500 USD")
+    agent.live["Madrid"] = trip_data("Hotel Beta", "$250", "300 USD")
+    agent.live["Lisbon"] = trip_data("Hotel Gamma", "$50", "200 USD")
+    return agent
+
+
+def generate(agent, departure_city):
+    return agent.generate_itinerary("Paris", "2026-11-02", 3, "$1,500", departure_city, "culture")
+
+
+def shared_text(itinerary):
+    return json.dumps([itinerary["days"], itinerary["summary"]], ensure_ascii=False)
+
+
+def test_prompt_has_no_user_specific_data(agent):
+    generate(agent, "Berlin")
+    [prompt] = agent.client.prompts
+    for private in ("Berlin", "Hotel Alpha", "$100", "500", "TXL", "2026-11-02", "1,500"):
+        assert private not in prompt
+    assert "3-day itinerary** for Paris" in prompt and "November" in prompt
+
+
+def test_cached_days_never_carry_another_requests_hotels_or_departure(agent):
+    first = generate(agent, "Berlin")
+    second = generate(agent, "Madrid")
+
+    assert len(agent.client.prompts) == 1 and second.get("cached")
+    assert second["days"] == first["days"]
+    for private in ("Berlin", "Hotel Alpha", "TXL"):
+        assert private not in shared_text(second)
+
+    # Totals come from each request's own prices: 2 nights + the flight
+    assert first["summary"]["total_cost"].startswith("700 USD")
+    assert second["summary"]["total_cost"].startswith("800 USD")
+    assert [h["name"] for h in second["hotels"]] == ["Hotel Beta"]
+    assert second["departure_city"] == "Madrid"
+
+
+def test_streamed_cache_hit_uses_its_own_prices(agent):
+    generate(agent, "Berlin")
+    events = list(agent.stream_itinerary("Paris", "2026-11-02", 3, "$1,500", "Lisbon", "culture"))
+
+    assert len(agent.client.prompts) == 1
+    assert events[-1] == ("done", {"days": 3, "cached": True})
+    [summary] = [data for event, data in events if event == "summary"]
+    assert summary["total_cost"].startswith("300 USD")
+    streamed = json.dumps([data for event, data in events if event in ("day", "summary")], ensure_ascii=False)
+    for private in ("Berlin", "Hotel Alpha", "500 USD"):
+        assert private not in streamed
+
+
+def test_no_total_without_live_prices(agent):
+    agent.live["Oslo"] = {"location": {}, "hotels": [], "flights": {"error": "Flight search timed out."}}
+    itinerary = generate(agent, "Oslo")
+    assert itinerary["summary"]["total_cost"] is None
+    assert itinerary["summary"]["budget_breakdown"]
@@ -0,0 +1,209 @@
+# test_itinerary_jobs.py
+"""
+The itinerary job queue against a throwaway SQLite file: writes are tied to
+the claim that made them, dead owners are found by their lapsed lease, and
+the API answers 503 when the backlog is full.
+
+Run from AI-Travel-Planner-Backend/:
+    python -m pytest tests
+"""
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.agents.Itinerary_jobs import JobQueue, QueueFull, QUEUED, RUNNING, DONE, FAILED
+from app.router import chatbot
+
+PARAMS = {"destination": "Lisbon", "num_days": 2}
+DEAD_WORKER = "old-host:1:0123456789ab"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+def make_queue(path, handler=lambda params, progress: {"days": []}, **options):
+    """A queue with no worker threads: tests claim and run jobs by hand."""
+    return JobQueue(handler, path=path, workers=0, **options)
+
+
+def row(queue, job_id):
+    return queue._conn.execute(
+        "SELECT status, worker, lease_until, attempts FROM jobs WHERE id = ?", (job_id,)
+    ).fetchone()
+
+
+def hand_to_dead_worker(queue, job_id):
+    """Make a running job look like it belongs to a process that stopped renewing its lease."""
+    queue._conn.execute(
+        "UPDATE jobs SET worker = ?, lease_until = ? WHERE id = ?",
+        (DEAD_WORKER, time.time() - 1, job_id),
+    )
+
+
+# ---------------------------------------------------
+# CLAIMS
+# ---------------------------------------------------
+
+def test_a_job_is_claimed_once_and_leased(db_path):
+    first, second = make_queue(db_path), make_queue(db_path)
+    job_id = first.submit(PARAMS)["job_id"]
+
+    claimed = first._claim()
+    assert claimed[0] == job_id
+    assert second._claim() is None
+
+    status, worker, lease_until, attempts = row(first, job_id)
+    assert (status, worker, attempts) == (RUNNING, claimed[3], 1)
+    assert lease_until > time.time()
+
+
+def test_run_stores_the_result_under_its_claim(db_path):
+    queue = make_queue(db_path, handler=lambda params, progress: {"destination": params["destination"]})
+    job_id = queue.submit(PARAMS)["job_id"]
+
+    queue._run(*queue._claim())
+
+    job = queue.get(job_id)
+    assert job["status"] == DONE
+    assert job["itinerary"] == {"destination": "Lisbon"}
+    assert queue.stats()["runs_completed"] == 1
+
+
+def test_writes_from_a_superseded_claim_are_dropped(db_path):
+    queue = make_queue(db_path)
+    job_id = queue.submit(PARAMS)["job_id"]
+    job_id, _, _, worker, attempts = queue._claim()
+    stale = (worker, attempts)
+
+    # Requeued and claimed again: the first claim no longer owns the row
+    assert queue._retry(job_id, stale, "test")
+    queue._claim()
+
+    assert not queue._update(job_id, stale, status=DONE)
+    assert not queue._update(job_id, (DEAD_WORKER, attempts + 1), status=DONE)
+    assert row(queue, job_id)[0] == RUNNING
+
+
+# ---------------------------------------------------
+# RECOVERY
+# ---------------------------------------------------
+
+def test_job_of_a_dead_worker_is_requeued_and_its_late_result_dropped(db_path):
+    handler_calls = []
+    first = make_queue(db_path, handler=lambda params, progress: handler_calls.append(1) or {"days": []})
+    job_id = first.submit(PARAMS)["job_id"]
+    claimed = first._claim()
+    hand_to_dead_worker(first, job_id)
+
+    second = make_queue(db_path)
+    assert second.recover() == 1
+    status, worker, lease_until, _ = row(second, job_id)
+    assert (status, worker, lease_until) == (QUEUED, None, None)
+    assert second.stats()["orphaned"] == 1
+
+    # The original run finishing afterwards must not overwrite the requeued job
+    first._run(*claimed)
+    assert handler_calls == [1]
+    assert row(first, job_id)[0] == QUEUED
+    assert first.stats()["runs_superseded"] == 1
+
+
+def test_live_lease_is_not_recovered(db_path):
+    first, second = make_queue(db_path), make_queue(db_path)
+    job_id = first.submit(PARAMS)["job_id"]
+    first._claim()
+    first._conn.execute("UPDATE jobs SET worker = ? WHERE id = ?", (DEAD_WORKER, job_id))
+
+    # Same host and PID as a dead worker, but the lease is still being renewed
+    assert second.recover() == 0
+    assert row(second, job_id)[0] == RUNNING
+
+
+def test_dead_worker_out_of_attempts_fails_the_job(db_path):
+    queue = make_queue(db_path, max_attempts=1)
+    job_id = queue.submit(PARAMS)["job_id"]
+    queue._claim()
+    hand_to_dead_worker(queue, job_id)
+
+    assert queue.recover() == 1
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert job["error"].startswith("Job abandoned")
+
+
+def test_renewing_extends_only_this_processes_leases(db_path):
+    queue = make_queue(db_path, lease=30)
+    mine = queue.submit(PARAMS)["job_id"]
+    theirs = queue.submit(PARAMS)["job_id"]
+    queue._claim()
+    queue._claim()
+    hand_to_dead_worker(queue, theirs)
+
+    assert queue.renew_leases() == 1
+    assert row(queue, mine)[2] > time.time() + 20
+    assert row(queue, theirs)[2] < time.time()
+
+
+# ---------------------------------------------------
+# CLEANUP
+# ---------------------------------------------------
+
+def test_job_running_past_the_timeout_fails_and_drops_its_result(db_path):
+    queue = make_queue(db_path, timeout=60)
+    job_id = queue.submit(PARAMS)["job_id"]
+    claimed = queue._claim()
+    queue._conn.execute("UPDATE jobs SET started_at = ? WHERE id = ?", (time.time() - 120, job_id))
+
+    assert queue.cleanup() == (0, 1)
+    queue._run(*claimed)
+
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert job["error"].startswith("Job timed out")
+    stats = queue.stats()
+    assert (stats["timed_out"], stats["runs_superseded"]) == (1, 1)
+
+
+def test_finished_jobs_expire_after_the_ttl(db_path):
+    queue = make_queue(db_path, ttl=60)
+    old = queue.submit(PARAMS)["job_id"]
+    recent = queue.submit(PARAMS)["job_id"]
+    queue._run(*queue._claim())
+    queue._run(*queue._claim())
+    queue._conn.execute("UPDATE jobs SET finished_at = ? WHERE id = ?", (time.time() - 120, old))
+
+    assert queue.cleanup() == (1, 0)
+    assert queue.get(old) is None
+    assert queue.get(recent)["status"] == DONE
+    assert queue.stats()["expired"] == 1
+
+
+# ---------------------------------------------------
+# API
+# ---------------------------------------------------
+
+def test_submit_rejects_when_the_backlog_is_full(db_path):
+    queue = make_queue(db_path, max_queued=1)
+    queue.submit(PARAMS)
+    with pytest.raises(QueueFull):
+        queue.submit(PARAMS)
+    assert queue.stats()["rejected"] == 1
+
+
+def test_itinerary_jobs_endpoint_answers_503_when_full(db_path, monkeypatch):
+    monkeypatch.setattr(chatbot, "itinerary_jobs", make_queue(db_path, max_queued=0))
+    app = FastAPI()
+    app.include_router(chatbot.router, prefix="/api")
+
+    response = TestClient(app).post("/api/itinerary_jobs", json={
+        "destination": "Lisbon", "start_date": "2026-11-02", "num_days": "2 days",
+        "budget": "Moderate", "departure_city": "Dallas", "trip_type": "Solo",
+    })
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    assert "Too many itineraries" in response.json()["error"]
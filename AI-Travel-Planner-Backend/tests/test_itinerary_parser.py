@@ -0,0 +1,215 @@
+# test_itinerary_parser.py
+"""
+The incremental parser must give the same days however the completion is
+chunked, the same day/description pairs as the old regex split, and the
+structured day fields and budget summary the recorded outputs contain.
+
+Run from AI-Travel-Planner-Backend/:
+    python -m pytest tests
+"""
+import glob
+import os
+import random
+import re
+
+from app.agents.Itinerary_parser import (
+    HEADER_LOOKBACK, DayBlockSplitter, ItineraryParser, parse_itinerary,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures", "llm", "*.md")
+LEGACY_HEADER = r"(?:##\s*Day\s*\d+:|Day\s*\d+:|\*\*Day\s*\d+:)"
+
+
+def legacy_split(ai_output):
+    """The old two-pass split from itinerary_agent2.generate_itinerary (reference output)."""
+    day_blocks = re.split(LEGACY_HEADER, ai_output)
+    headers = re.findall(LEGACY_HEADER, ai_output)
+    return [
+        {"day": headers[i].replace("**", "").strip(), "description": block.strip()}
+        for i, block in enumerate(day_blocks[1:])
+    ]
+
+
+def fixtures():
+    paths = sorted(glob.glob(FIXTURES))
+    assert paths, "no recorded model outputs found"
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            yield os.path.basename(path), f.read().strip()
+
+
+def fixture(name):
+    with open(os.path.join(os.path.dirname(FIXTURES), name), encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def parse_chunks(chunks):
+    parser = ItineraryParser()
+    days = []
+    for chunk in chunks:
+        days.extend(parser.feed(chunk))
+    days.extend(parser.close())
+    return days, parser.summary
+
+
+def split_chunks(chunks):
+    splitter = DayBlockSplitter()
+    days = []
+    for chunk in chunks:
+        days.extend(splitter.feed(chunk))
+    return days + splitter.close()
+
+
+def random_chunks(text, rng, largest=12):
+    """Cut text the way a token stream does: 1–`largest` characters at a time."""
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, largest)
+        yield text[i:i + size]
+        i += size
+
+
+def fixed_chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+# ---------------------------------------------------
+# RECORDED OUTPUTS
+# ---------------------------------------------------
+
+def test_days_match_legacy_split():
+    for name, text in fixtures():
+        days, _ = parse_itinerary(text)
+        assert [(d["day"], d["description"]) for d in days] == \
+               [(d["day"], d["description"]) for d in legacy_split(text)], name
+
+
+def test_streamed_matches_whole():
+    rng = random.Random(7)
+    for name, text in fixtures():
+        whole = parse_itinerary(text)
+        for _ in range(20):
+            assert parse_chunks(random_chunks(text, rng)) == whole, name
+        # Chunks longer than the lookback window, too
+        for _ in range(5):
+            assert parse_chunks(random_chunks(text, rng, largest=4 * HEADER_LOOKBACK)) == whole, name
+
+
+def test_every_fixed_chunk_size():
+    for name, text in fixtures():
+        whole = parse_itinerary(text)
+        for size in range(1, 2 * HEADER_LOOKBACK + 2):
+            assert parse_chunks(fixed_chunks(text, size)) == whole, (name, size)
+
+
+# ---------------------------------------------------
+# CHUNK BOUNDARIES AND THE LOOKBACK WINDOW
+# ---------------------------------------------------
+
+def test_header_split_at_every_offset():
+    # Long text before the header, so the scan window has moved on when it arrives
+    for header in ("## Day 2:", "Day 2:", "**Day 2:**", "##" + " " * (HEADER_LOOKBACK - 10) + "Day 2:"):
+        text = "## Day 1: Arrival\n- Morning: " + "x" * (3 * HEADER_LOOKBACK) + f"\n{header} Museums\n- Evening: Dinner"
+        expected = legacy_split(text)
+        assert len(expected) == 2
+        for cut in range(1, len(text)):
+            assert split_chunks([text[:cut], text[cut:]]) == expected, (header, cut)
+
+
+def test_header_longer_than_lookback_in_one_chunk():
+    # A header is only ever missed if it straddles a boundary AND is longer than the window
+    header = "##" + " " * (2 * HEADER_LOOKBACK) + "Day 2:"
+    text = f"## Day 1: Arrival\n{header} Museums"
+    assert split_chunks([text]) == legacy_split(text)
+
+
+def test_header_straddling_many_small_chunks():
+    text = "Day 1: A\nsome text\n**Day 2:** B\nmore\n## Day 3: C"
+    expected = legacy_split(text)
+    assert [d["day"] for d in expected] == ["Day 1:", "Day 2:", "## Day 3:"]
+    assert split_chunks(list(text)) == expected
+
+
+# ---------------------------------------------------
+# MISSING PARTS
+# ---------------------------------------------------
+
+def test_missing_summary():
+    for name, text in fixtures():
+        if "no_summary" not in name:
+            continue
+        days, summary = parse_itinerary(text)
+        assert days and summary is None
+        assert parse_chunks(random_chunks(text, random.Random(3))) == (days, None)
+
+
+def test_no_headers():
+    assert parse_itinerary("Sorry, I can't help with that.") == ([], None)
+    assert parse_chunks(["Sorry, ", "I can't ", "help."]) == ([], None)
+
+
+def test_summary_only_on_last_day():
+    text = (
+        "## Day 1: Arrival\n- Morning: Walk\n"
+        "## Day 2: Museums\n- Evening: Dinner\n\n"
+        "Budget Breakdown:\n- Accommodation: 40%\n- Food: 30%\nTotal Cost: $2000\n"
+    )
+    days, summary = parse_itinerary(text)
+    assert summary is not None
+    assert days[0]["evening"] is None and days[1]["evening"] == "Dinner"
+    assert parse_chunks(fixed_chunks(text, 5)) == (days, summary)
+
+
+
+# ---------------------------------------------------
+# STRUCTURED FIELDS AND THE BUDGET SUMMARY
+# ---------------------------------------------------
+
+def test_fields_of_well_formed_output():
+    text = fixture("paris_3_days.md")
+    days, summary = parse_itinerary(text)
+
+    assert [d["title"] for d in days] == ["Arrival and the Left Bank", "Museums and Montmartre", "Versailles"]
+    assert days[0]["morning"] == "Land at CDG, take the RER B into the city and check in."
+    assert days[0]["afternoon"] == "Walk through the Luxembourg Gardens and the Latin Quarter."
+    assert days[0]["evening"] == "Sunset cruise on the Seine from Pont Neuf."
+    assert days[0]["hotel_recommendation"] == "Hôtel des Grands Hommes — boutique hotel facing the Panthéon."
+    assert days[0]["restaurant_suggestion"] == "Le Procope, the oldest café in Paris."
+    assert days[0]["travel_tip"] == "Buy a Navigo Easy card for the metro."
+    assert days[2]["restaurant_suggestion"] == "L'As du Fallafel for a quick, cheap dinner."
+
+    assert summary["budget_breakdown"] == {
+        "Accommodation": 40.0, "Food": 25.0, "Transportation": 15.0, "Activities": 20.0,
+    }
+    assert summary["total_cost"] == "$2,400 for one traveller"
+    assert summary["note"] == "Prices are estimates for November and exclude flights."
+    # The summary is not mistaken for part of the last day's fields
+    assert days[2]["travel_tip"] == "The Passport ticket covers the palace, gardens and Trianon."
+
+    assert parse_chunks(fixed_chunks(text, 7)) == (days, summary)
+
+
+def test_fields_of_malformed_output():
+    # Mixed headers, bracketed title, a field continued on the next line,
+    # short labels ("Hotel:", "Tip:"), a day missing fields, inline breakdown
+    text = fixture("rome_drift.md")
+    days, summary = parse_itinerary(text)
+
+    assert [d["day"] for d in days] == ["## Day 1:", "Day 2:", "## Day 3:", "## Day 4:"]
+    assert days[0]["title"] == "Ancient Rome"
+    assert days[1]["morning"] == "Vatican Museums and the Sistine Chapel."
+    assert days[2]["hotel_recommendation"] == "Hotel Artemide"
+    assert days[2]["restaurant_suggestion"] == "Roscioli"
+    assert days[2]["travel_tip"] == "Tap water from the nasoni fountains is safe to drink."
+    assert days[3]["afternoon"] == "Train to Fiumicino."
+    assert days[3]["evening"] is None
+    assert days[3]["hotel_recommendation"] is None
+    assert days[3]["restaurant_suggestion"] is None
+    assert days[3]["travel_tip"] == "The Leonardo Express runs every 15 minutes."
+
+    assert summary["budget_breakdown"] == {"Accommodation": 45.0, "Food": 25.0, "Activities": 20.0, "Transport": 10.0}
+    assert summary["total_cost"] == "€1,900"
+    assert summary["note"] == ("Museum bookings fill up weeks ahead in high season, "
+                               "so reserve the Vatican and Borghese as soon as dates are fixed.")
+
+    assert parse_chunks(random_chunks(text, random.Random(11))) == (days, summary)
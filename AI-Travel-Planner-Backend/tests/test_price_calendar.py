@@ -0,0 +1,105 @@
+# test_price_calendar.py
+"""
+Flexible-dates calendar: the date window it builds, and that finding the
+airport pair and the cells together stay within PRICE_CALENDAR_MAX_SEARCHES.
+
+Run from AI-Travel-Planner-Backend/:
+    python -m pytest tests
+"""
+import pytest
+
+from app.agents.Itinerary_Data import Flight
+from app.agents.Itinerary_Data.Serp_quota import charge_budget
+
+PAIRS = [(f"D{i}", f"A{i}") for i in range(10)]
+RESULTS = {"best_flights": [{"price": 420}]}
+
+
+# ---------------------------------------------------
+# DATE WINDOW
+# ---------------------------------------------------
+
+def test_min_nights_defaults_to_one():
+    _, return_dates, combos = Flight.calendar_date_pairs("2026-11-01", "2026-11-02", min_nights=None)
+    assert return_dates == ["2026-11-02", "2026-11-03"]
+    assert combos == [("2026-11-01", "2026-11-02"), ("2026-11-01", "2026-11-03"), ("2026-11-02", "2026-11-03")]
+
+
+def test_zero_min_nights_allows_day_trips():
+    _, _, combos = Flight.calendar_date_pairs("2026-11-01", None, min_nights=0)
+    assert combos == [("2026-11-01", "2026-11-01")]
+
+
+def test_oversized_window_is_rejected_before_searching():
+    with pytest.raises(ValueError):
+        Flight.calendar_date_pairs("2026-11-01", "2026-12-31", min_nights=1, max_nights=14, max_searches=60)
+
+
+# ---------------------------------------------------
+# SEARCH BUDGET
+# ---------------------------------------------------
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Flight searches that charge the active budget like serp_search; `found` = pairs with flights."""
+    state = {"searches": 0, "found": set()}
+
+    def search(dep_code, arr_code):
+        if not charge_budget():
+            return None
+        state["searches"] += 1
+        return RESULTS if (dep_code, arr_code) in state["found"] else None
+
+    def search_airport_pairs(pairs, outbound_date, return_date, currency, concurrency=None, first_wave=None):
+        for dep_code, arr_code in pairs:
+            if search(dep_code, arr_code):
+                return RESULTS, dep_code, arr_code
+        return None, None, None
+
+    def calendar_cell(dep_code, arr_code, outbound_date, return_date, currency):
+        return ("ok", 420) if search(dep_code, arr_code) else ("none", None)
+
+    trip = {"dep_info": {}, "arr_info": {}, "pairs": PAIRS, "proven": 0}
+    monkeypatch.setattr(Flight, "resolve_trip", lambda departure_id, arrival_id: trip)
+    monkeypatch.setattr(Flight, "search_airport_pairs", search_airport_pairs)
+    monkeypatch.setattr(Flight, "_calendar_cell", calendar_cell)
+    monkeypatch.setattr(Flight, "PRICE_CALENDAR_MAX_SEARCHES", 12)
+    return state
+
+
+def calendar(nights=7):
+    # 2 outbound days x `nights` trip lengths
+    return Flight.get_price_calendar("Dallas", "Paris", "2026-11-01", "2026-11-02",
+                                     min_nights=1, max_nights=nights)
+
+
+def test_pair_search_spends_only_what_the_cells_leave(upstream):
+    upstream["found"] = {PAIRS[-1]}
+
+    result = Flight.get_price_calendar("Dallas", "Paris", "2026-11-01", "2026-11-05", max_nights=2)
+
+    # 10 combinations of 12 searches: 3 pairs on the first attempt, then 1 each
+    assert "error" in result
+    assert upstream["searches"] == 5
+
+
+def test_every_cell_is_searched_within_the_budget(upstream):
+    upstream["found"] = {PAIRS[1]}
+
+    result = calendar(nights=5)    # 10 combinations, 12 searches
+
+    assert result["route"] == "D1 → A1"
+    assert result["searched"] == 10
+    assert result["failed"] == 0
+    assert result["upstream_searches"] == upstream["searches"] == 11
+
+
+def test_proven_pair_spends_nothing_on_finding_it(upstream, monkeypatch):
+    upstream["found"] = {PAIRS[0]}
+    trip = {"dep_info": {}, "arr_info": {}, "pairs": PAIRS, "proven": 1}
+    monkeypatch.setattr(Flight, "resolve_trip", lambda departure_id, arrival_id: trip)
+
+    result = calendar(nights=6)
+
+    assert result["searched"] == 12
+    assert result["upstream_searches"] == 12
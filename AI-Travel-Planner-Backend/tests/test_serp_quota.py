@@ -0,0 +1,225 @@
+# test_serp_quota.py
+"""
+SerpAPI budget: the scheduler's priority order (per engine and for the
+global rate), quota accounting, and how serp_search shares upstream calls
+without sharing one caller's refusal or charging a budget twice.
+
+Run from AI-Travel-Planner-Backend/:
+    python -m pytest tests
+"""
+import contextvars
+import threading
+import time
+
+import pytest
+
+from app.agents.Itinerary_Data import Serp_client
+from app.agents.Itinerary_Data.Serp_quota import (
+    SerpScheduler, QuotaStore, QUOTA_ERRORS, serp_budget, serp_priority,
+)
+
+PARAMS = {"engine": "google_hotels", "q": "Lisbon hotels", "check_in_date": "2026-11-02"}
+RESULTS = {"properties": [{"name": "Hotel Avenida"}]}
+
+
+def make_scheduler(tmp_path, limit=0, **options):
+    return SerpScheduler(QuotaStore(path=str(tmp_path / "quota.sqlite3"), limit=limit), **options)
+
+
+def start(func, *args):
+    """Run func in a thread that carries the caller's context (priority, budget)."""
+    context = contextvars.copy_context()
+    box = {}
+    thread = threading.Thread(target=lambda: box.setdefault("result", context.run(func, *args)))
+    thread.start()
+    return thread, box
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the test threads"
+        time.sleep(0.005)
+
+
+# ---------------------------------------------------
+# SCHEDULER
+# ---------------------------------------------------
+
+def test_interactive_goes_ahead_of_background_on_one_engine(tmp_path, monkeypatch):
+    monkeypatch.setenv("SERP_RATE_TEST_ENGINE", "10")
+    monkeypatch.setenv("SERP_BURST_TEST_ENGINE", "1")
+    scheduler = make_scheduler(tmp_path)
+    scheduler._bucket("test_engine").tokens = 0
+    order = []
+
+    def search(priority):
+        order.append((priority, scheduler.acquire("test_engine", priority)))
+
+    background = [start(search, "background")[0] for _ in range(2)]
+    wait_until(lambda: scheduler.stats()["engines"]["test_engine"]["waiting"] == 2)
+    interactive = start(search, "interactive")[0]
+    for thread in background + [interactive]:
+        thread.join()
+
+    assert order[0] == ("interactive", "ok")
+    assert [outcome for _, outcome in order] == ["ok"] * 3
+
+
+def test_global_tokens_go_to_interactive_across_engines(tmp_path):
+    scheduler = make_scheduler(tmp_path, global_rate=10, global_burst=1)
+    scheduler._global.tokens = 0
+    order = []
+
+    def search(engine, priority):
+        order.append((engine, scheduler.acquire(engine, priority)))
+
+    background = [start(search, "google_flights", "background")[0] for _ in range(2)]
+    wait_until(lambda: scheduler.stats()["engines"].get("google_flights", {}).get("waiting") == 2)
+    interactive = start(search, "google_hotels", "interactive")[0]
+    for thread in background + [interactive]:
+        thread.join()
+
+    assert order[0] == ("google_hotels", "ok")
+
+
+def test_no_quota_writes_without_a_limit(tmp_path):
+    scheduler = make_scheduler(tmp_path, limit=0)
+    assert scheduler.acquire("google_hotels") == "ok"
+    assert scheduler.quota._conn.execute("SELECT COUNT(*) FROM quota").fetchone()[0] == 0
+
+
+def test_background_cannot_use_the_reserve(tmp_path):
+    scheduler = make_scheduler(tmp_path, limit=5)    # background may use 4 (SERP_BACKGROUND_RESERVE=0.2)
+    assert [scheduler.acquire("google_hotels", "background") for _ in range(5)] == ["ok"] * 4 + ["quota_exhausted"]
+    assert scheduler.acquire("google_hotels", "interactive") == "ok"
+    assert scheduler.acquire("google_hotels", "interactive") == "quota_exhausted"
+    assert scheduler.quota.usage()["quota_used"] == 5
+
+
+def test_quota_refusal_gives_the_tokens_back(tmp_path, monkeypatch):
+    monkeypatch.setenv("SERP_RATE_TEST_ENGINE", "0.001")
+    monkeypatch.setenv("SERP_BURST_TEST_ENGINE", "2")
+    scheduler = make_scheduler(tmp_path, limit=1, global_rate=0.001, global_burst=2)
+
+    assert scheduler.acquire("test_engine") == "ok"
+    assert scheduler.acquire("test_engine") == "quota_exhausted"
+
+    # The refused search took no token: one of the two is still there
+    assert scheduler._bucket("test_engine").tokens == pytest.approx(1, abs=0.01)
+    assert scheduler._global.tokens == pytest.approx(1, abs=0.01)
+    assert scheduler.stats()["engines"]["test_engine"]["quota_rejections"] == 1
+
+
+# ---------------------------------------------------
+# SERP_SEARCH: SHARED CALLS, REFUSALS AND BUDGETS
+# ---------------------------------------------------
+
+class GatedScheduler:
+    """Holds acquire() until released; answers `outcomes` in order, then "ok"."""
+
+    def __init__(self, outcomes=()):
+        self.outcomes = list(outcomes)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def acquire(self, engine, priority=None):
+        self.calls += 1
+        self.entered.set()
+        self.release.wait(2)
+        return self.outcomes.pop(0) if self.outcomes else "ok"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    state = {"calls": 0}
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return dict(RESULTS)
+
+    def get(url, **kwargs):
+        state["calls"] += 1
+        return Response()
+
+    monkeypatch.setattr(Serp_client.http_client, "get", get)
+    return state
+
+
+def shared_search(monkeypatch, scheduler):
+    """A leader and one follower of the same query; returns both results."""
+    monkeypatch.setattr(Serp_client, "serp_scheduler", scheduler)
+    shared = Serp_client._in_flight.stats()["shared"]
+
+    leader, leader_box = start(Serp_client.serp_search, PARAMS, False)
+    assert scheduler.entered.wait(2)
+    follower, follower_box = start(Serp_client.serp_search, PARAMS, False)
+    wait_until(lambda: Serp_client._in_flight.stats()["shared"] == shared + 1)
+    scheduler.release.set()
+    leader.join()
+    follower.join()
+    return leader_box["result"], follower_box["result"]
+
+
+def test_concurrent_identical_searches_share_one_call(monkeypatch, upstream):
+    scheduler = GatedScheduler()
+    with serp_budget(5) as budget:
+        leader, follower = shared_search(monkeypatch, scheduler)
+
+    assert leader == follower == RESULTS
+    assert (scheduler.calls, upstream["calls"]) == (1, 1)
+    assert budget.spent == 1
+
+
+@pytest.mark.parametrize("refusal", ["timeout", "quota_exhausted"])
+def test_rate_limit_refusal_is_not_shared(monkeypatch, upstream, refusal):
+    not_shared = Serp_client._in_flight.stats()["not_shared"]
+    leader, follower = shared_search(monkeypatch, GatedScheduler([refusal]))
+
+    assert leader == {"error": QUOTA_ERRORS[refusal]}
+    assert follower == RESULTS
+    assert upstream["calls"] == 1
+    assert Serp_client._in_flight.stats()["not_shared"] == not_shared + 1
+
+
+def test_spent_budget_is_not_shared(monkeypatch, upstream):
+    monkeypatch.setattr(Serp_client, "serp_scheduler", GatedScheduler())
+    with serp_budget(0):
+        leader, leader_box = start(Serp_client.serp_search, PARAMS, False)
+    leader.join()
+    assert leader_box["result"] == {"error": QUOTA_ERRORS["budget_spent"]}
+
+    assert Serp_client.serp_search(PARAMS, use_cache=False) == RESULTS
+    assert upstream["calls"] == 1
+
+
+def test_calls_are_not_shared_across_priorities(monkeypatch, upstream):
+    scheduler = GatedScheduler()
+    monkeypatch.setattr(Serp_client, "serp_scheduler", scheduler)
+
+    with serp_priority("background"):
+        background, _ = start(Serp_client.serp_search, PARAMS, False)
+    assert scheduler.entered.wait(2)
+    interactive, _ = start(Serp_client.serp_search, PARAMS, False)
+    wait_until(lambda: scheduler.calls == 2)
+    scheduler.release.set()
+    background.join()
+    interactive.join()
+
+    assert upstream["calls"] == 2
+
+
+def test_each_upstream_search_is_charged_once(tmp_path, monkeypatch, upstream):
+    scheduler = make_scheduler(tmp_path, limit=10)
+    monkeypatch.setattr(Serp_client, "serp_scheduler", scheduler)
+
+    with serp_budget(10) as budget:
+        for day in ("2026-11-02", "2026-11-03"):
+            Serp_client.serp_search({**PARAMS, "check_in_date": day}, use_cache=False)
+
+    assert upstream["calls"] == 2
+    assert budget.spent == 2
+    assert scheduler.quota.usage()["quota_used"] == 2